@@ -0,0 +1,240 @@
+"""
+编译后的机器学习预测器模块
+将训练好的StandardScaler和sklearn模型导出为纯NumPy数组，推理时无需导入sklearn/joblib，
+一次计算同时得到预测标签和摔倒概率
+"""
+
+import json
+import numpy as np
+from typing import Any, Dict, List, Tuple
+
+FORMAT_VERSION = 1
+
+
+class CompiledMLPredictor:
+    """纯NumPy实现的摔倒分类器（支持SVM、随机森林、KNN）"""
+
+    def __init__(self, model_type: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.model_type = model_type
+        self.arrays = arrays
+        self.meta = meta
+        self.classes = arrays['classes']
+        self.mean = arrays['scaler_mean']
+        self.scale = arrays['scaler_scale']
+
+    # ------------------------------------------------------------------
+    # 导出
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_sklearn(cls, model_type: str, model, scaler) -> 'CompiledMLPredictor':
+        """
+        从已训练的sklearn模型和标准化器生成编译预测器
+
+        只读取模型的数组属性，不需要导入sklearn。
+        """
+        n_features = len(scaler.mean_) if scaler.mean_ is not None else model.n_features_in_
+        arrays = {
+            'classes': np.asarray(model.classes_),
+            'scaler_mean': (np.asarray(scaler.mean_, dtype=np.float64) if scaler.mean_ is not None
+                            else np.zeros(n_features)),
+            'scaler_scale': (np.asarray(scaler.scale_, dtype=np.float64) if scaler.scale_ is not None
+                             else np.ones(n_features)),
+        }
+        meta = {}
+
+        if model_type == 'svm':
+            if model.kernel not in ('linear', 'rbf', 'poly', 'sigmoid'):
+                raise ValueError(f"不支持的SVM核函数: {model.kernel}")
+            if len(model.classes_) != 2:
+                raise ValueError("编译预测器只支持二分类SVM")
+            arrays['support_vectors'] = np.asarray(model.support_vectors_, dtype=np.float64)
+            arrays['dual_coef'] = np.asarray(model.dual_coef_[0], dtype=np.float64)
+            arrays['intercept'] = np.asarray(model.intercept_, dtype=np.float64)
+            prob_a = getattr(model, 'probA_', np.empty(0))
+            prob_b = getattr(model, 'probB_', np.empty(0))
+            arrays['prob_a'] = np.asarray(prob_a, dtype=np.float64)
+            arrays['prob_b'] = np.asarray(prob_b, dtype=np.float64)
+            meta.update({
+                'kernel': model.kernel,
+                'gamma': float(model._gamma),
+                'coef0': float(model.coef0),
+                'degree': int(model.degree),
+            })
+        elif model_type == 'rf':
+            cls._flatten_forest(model, arrays, meta)
+        elif model_type == 'knn':
+            if model.metric not in ('minkowski', 'euclidean'):
+                raise ValueError(f"不支持的KNN距离度量: {model.metric}")
+            if callable(model.weights):
+                raise ValueError("编译预测器不支持自定义KNN权重函数")
+            arrays['fit_X'] = np.asarray(model._fit_X, dtype=np.float64)
+            arrays['fit_y'] = np.asarray(model._y, dtype=np.int64)
+            meta.update({
+                'n_neighbors': int(model.n_neighbors),
+                'weights': model.weights,
+                'p': 2.0 if model.metric == 'euclidean' else float(model.p),
+            })
+        else:
+            raise ValueError(f"不支持的模型类型: {model_type}")
+
+        return cls(model_type, arrays, meta)
+
+    @staticmethod
+    def _flatten_forest(model, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        """把随机森林的所有树拼接为一组扁平数组，叶子节点的子节点指向自身"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes) + offset
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, -1, tree.feature).astype(np.int64))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int64))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int64))
+            # 叶子的类别分布归一化为概率
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            values.append(value / np.where(totals > 0, totals, 1))
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        arrays['tree_feature'] = np.concatenate(features)
+        arrays['tree_threshold'] = np.concatenate(thresholds)
+        arrays['tree_left'] = np.concatenate(lefts)
+        arrays['tree_right'] = np.concatenate(rights)
+        arrays['tree_value'] = np.concatenate(values)
+        arrays['tree_roots'] = np.asarray(roots, dtype=np.int64)
+        meta['max_depth'] = int(max_depth)
+
+    # ------------------------------------------------------------------
+    # 保存与加载
+    # ------------------------------------------------------------------
+    def save(self, filepath: str):
+        """保存为npz文件（不含pickle对象）"""
+        header = {'format_version': FORMAT_VERSION, 'model_type': self.model_type, 'meta': self.meta}
+        np.savez(filepath, __header__=np.array(json.dumps(header)), **self.arrays)
+
+    @classmethod
+    def load(cls, filepath: str) -> 'CompiledMLPredictor':
+        """从npz文件加载"""
+        with np.load(filepath, allow_pickle=False) as data:
+            header = json.loads(str(data['__header__']))
+            if header.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"不支持的编译模型版本: {header.get('format_version')}")
+            arrays = {name: data[name] for name in data.files if name != '__header__'}
+        return cls(header['model_type'], arrays, header['meta'])
+
+    # ------------------------------------------------------------------
+    # 推理
+    # ------------------------------------------------------------------
+    def predict(self, features: np.ndarray) -> Tuple[List[Any], List[float]]:
+        """
+        一次计算返回预测标签和摔倒（第二个类别）的概率
+
+        Args:
+            features: 原始（未标准化）特征矩阵 (n_samples, n_features)
+        """
+        X = np.asarray(features, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X) == 0:
+            return [], []
+        X = (X - self.mean) / self.scale
+
+        if self.model_type == 'svm':
+            labels, proba = self._predict_svm(X)
+        elif self.model_type == 'rf':
+            labels, proba = self._predict_forest(X)
+        else:
+            labels, proba = self._predict_knn(X)
+
+        return labels.tolist(), proba.tolist()
+
+    def _kernel(self, X: np.ndarray) -> np.ndarray:
+        """计算样本与支持向量之间的核矩阵"""
+        sv = self.arrays['support_vectors']
+        kernel = self.meta['kernel']
+        gamma = self.meta['gamma']
+        if kernel == 'linear':
+            return X @ sv.T
+        if kernel == 'rbf':
+            sq_dist = (X * X).sum(axis=1)[:, None] + (sv * sv).sum(axis=1)[None, :] - 2 * X @ sv.T
+            return np.exp(-gamma * np.maximum(sq_dist, 0))
+        if kernel == 'poly':
+            return (gamma * (X @ sv.T) + self.meta['coef0']) ** self.meta['degree']
+        return np.tanh(gamma * (X @ sv.T) + self.meta['coef0'])
+
+    def _predict_svm(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        decision = self._kernel(X) @ self.arrays['dual_coef'] + self.arrays['intercept'][0]
+        labels = self.classes[(decision > 0).astype(int)]
+
+        prob_a, prob_b = self.arrays['prob_a'], self.arrays['prob_b']
+        if len(prob_a):
+            # libsvm的Platt缩放作用于取反后的决策值，给出第一个类别的概率；
+            # 二分类时直接取闭式解（sklearn内置libsvm迭代求解，两者相差<0.005）
+            with np.errstate(over='ignore'):
+                first_class = 1.0 / (1.0 + np.exp(prob_a[0] * -decision + prob_b[0]))
+            proba = 1.0 - np.clip(first_class, 1e-7, 1 - 1e-7)
+        else:
+            proba = (decision > 0).astype(np.float64)
+        return labels, proba
+
+    def _predict_forest(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # sklearn的树在float32上比较特征
+        X = X.astype(np.float32).astype(np.float64)
+        feature = self.arrays['tree_feature']
+        threshold = self.arrays['tree_threshold']
+        left, right = self.arrays['tree_left'], self.arrays['tree_right']
+
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.arrays['tree_roots'][None, :], len(X), axis=0)
+        for _ in range(self.meta['max_depth']):
+            node_feature = feature[node]
+            if (node_feature < 0).all():
+                break
+            go_left = X[rows, np.maximum(node_feature, 0)] <= threshold[node]
+            node = np.where(go_left, left[node], right[node])
+
+        class_proba = self.arrays['tree_value'][node].mean(axis=1)
+        labels = self.classes[class_proba.argmax(axis=1)]
+        return labels, class_proba[:, 1]
+
+    def _predict_knn(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        fit_X, fit_y = self.arrays['fit_X'], self.arrays['fit_y']
+        k = min(self.meta['n_neighbors'], len(fit_X))
+        p = self.meta['p']
+
+        if p == 2:
+            dist = (X * X).sum(axis=1)[:, None] + (fit_X * fit_X).sum(axis=1)[None, :] - 2 * X @ fit_X.T
+            dist = np.sqrt(np.maximum(dist, 0))
+        else:
+            dist = (np.abs(X[:, None, :] - fit_X[None, :, :]) ** p).sum(axis=2) ** (1.0 / p)
+
+        neighbors = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        neighbor_dist = np.take_along_axis(dist, neighbors, axis=1)
+        neighbor_y = fit_y[neighbors]
+
+        if self.meta['weights'] == 'distance':
+            # 与sklearn一致：存在零距离邻居时只使用这些邻居
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / neighbor_dist
+            zero = neighbor_dist == 0
+            has_zero = zero.any(axis=1, keepdims=True)
+            weights = np.where(has_zero, zero.astype(np.float64), weights)
+        else:
+            weights = np.ones_like(neighbor_dist)
+
+        n_classes = len(self.classes)
+        class_weight = np.zeros((len(X), n_classes))
+        for c in range(n_classes):
+            class_weight[:, c] = (weights * (neighbor_y == c)).sum(axis=1)
+        class_proba = class_weight / class_weight.sum(axis=1, keepdims=True)
+
+        labels = self.classes[class_proba.argmax(axis=1)]
+        return labels, class_proba[:, 1]
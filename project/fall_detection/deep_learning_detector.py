@@ -0,0 +1,510 @@
+"""
+深度学习摔倒检测模块
+LSTM序列模型及其训练/推理封装（依赖torch，由fall_detection_algorithms按需导入）
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Tuple
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import Dataset, DataLoader
+import os
+import copy
+import json
+import time
+import warnings
+
+from pose_detection import KEYPOINT_NAMES, poses_to_array
+
+# 序列特征使用的关键点（每个取 x, y, confidence）
+FEATURE_KEYPOINTS = ['nose', 'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip',
+                     'left_knee', 'right_knee', 'left_ankle', 'right_ankle']
+
+QUANTIZED_FORMAT_VERSION = 1
+
+
+def quantized_path(filepath: str) -> str:
+    """浮点模型 (.pth) 对应的INT8 TorchScript导出文件路径"""
+    return os.path.splitext(filepath)[0] + '_int8.pt'
+
+
+def compare_models(float_model: nn.Module, quantized_model: nn.Module, features: np.ndarray,
+                   batch_sizes: Tuple[int, ...] = (1, 8, 32), repeats: int = 30) -> Dict[str, Any]:
+    """
+    比较浮点模型与量化模型：摔倒概率的一致性和不同批大小下的CPU推理耗时
+    
+    Args:
+        features: (N, 序列长度, 特征数) 的样本特征，批大小超过N时循环取样
+    """
+    inputs = torch.from_numpy(np.asarray(features, dtype=np.float32))
+    float_model = float_model.cpu().eval()
+    quantized_model.eval()
+    
+    with torch.no_grad():
+        float_prob = torch.softmax(float_model(inputs), dim=1)[:, 1]
+        quant_prob = torch.softmax(quantized_model(inputs), dim=1)[:, 1]
+    diff = (float_prob - quant_prob).abs()
+    report = {
+        'samples': int(len(inputs)),
+        'max_prob_diff': float(diff.max()),
+        'mean_prob_diff': float(diff.mean()),
+        'agreement': float(((float_prob > 0.5) == (quant_prob > 0.5)).float().mean()),
+        'latency': {},
+    }
+    
+    for batch_size in batch_sizes:
+        batch = inputs[torch.arange(batch_size) % len(inputs)]
+        timings = {}
+        for name, model in (('float_ms', float_model), ('int8_ms', quantized_model)):
+            with torch.no_grad():
+                model(batch)  # 预热
+                t0 = time.perf_counter()
+                for _ in range(repeats):
+                    model(batch)
+            timings[name] = (time.perf_counter() - t0) * 1000 / repeats
+        timings['speedup'] = timings['float_ms'] / timings['int8_ms'] if timings['int8_ms'] > 0 else 0.0
+        report['latency'][batch_size] = timings
+    return report
+
+
+def format_comparison(report: Dict[str, Any]) -> str:
+    lines = [f"量化一致性: 最大概率差 {report['max_prob_diff']:.4f}, 平均 {report['mean_prob_diff']:.4f}, "
+             f"判定一致率 {report['agreement'] * 100:.1f}% ({report['samples']} 个样本)"]
+    for batch_size, t in report['latency'].items():
+        lines.append(f"  批大小 {batch_size:>3}: 浮点 {t['float_ms']:.3f} ms, INT8 {t['int8_ms']:.3f} ms, "
+                     f"加速 {t['speedup']:.2f}x")
+    return "\n".join(lines)
+
+
+class PoseDataset(Dataset):
+    """姿势数据集"""
+    
+    def __init__(self, features: np.ndarray, labels: np.ndarray):
+        self.features = torch.FloatTensor(features)
+        self.labels = torch.LongTensor(labels)
+    
+    def __len__(self):
+        return len(self.features)
+    
+    def __getitem__(self, idx):
+        return self.features[idx], self.labels[idx]
+
+class LSTMFallDetector(nn.Module):
+    """LSTM摔倒检测器"""
+    
+    def __init__(self, input_size: int, hidden_size: int = 128, num_layers: int = 2, dropout: float = 0.2):
+        super(LSTMFallDetector, self).__init__()
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+        
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, 
+                           batch_first=True, dropout=dropout)
+        self.fc = nn.Linear(hidden_size, 2)  # 2类：正常/摔倒
+        self.dropout = nn.Dropout(dropout)
+    
+    def forward(self, x):
+        # x shape: (batch_size, seq_len, input_size)
+        lstm_out, _ = self.lstm(x)
+        # 取最后一个时间步的输出
+        last_output = lstm_out[:, -1, :]
+        output = self.dropout(last_output)
+        output = self.fc(output)
+        return output
+
+class DeepLearningFallDetector:
+    """深度学习摔倒检测器"""
+    
+    def __init__(self, model_type: str = 'lstm', input_size: int = 51):
+        self.model_type = model_type
+        self.input_size = input_size
+        self.model = None
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.is_trained = False
+        self.quantized = False  # 当前模型是否为导出的INT8 TorchScript
+        
+    def create_model(self):
+        """创建模型"""
+        if self.model_type == 'lstm':
+            self.model = LSTMFallDetector(self.input_size)
+        else:
+            raise ValueError(f"不支持的模型类型: {self.model_type}")
+        
+        self.model.to(self.device)
+    
+    def prepare_sequence_data(self, pose_sequences: List[List[Dict[str, Any]]], 
+                            labels: List[int], sequence_length: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """准备序列数据"""
+        features_list = []
+        labels_list = []
+        
+        for sequence, label in zip(pose_sequences, labels):
+            if len(sequence) < sequence_length:
+                continue
+            
+            # 提取特征序列
+            sequence_features = []
+            for poses in sequence[-sequence_length:]:  # 取最后sequence_length帧
+                if poses:
+                    pose_features = self._extract_pose_features(poses[0])  # 取第一个人的姿势
+                else:
+                    pose_features = np.zeros(self.input_size)
+                sequence_features.append(pose_features)
+            
+            features_list.append(sequence_features)
+            labels_list.append(label)
+        
+        return np.array(features_list), np.array(labels_list)
+    
+    def prepare_sequence_arrays(self, pose_sequences: List[List[Dict[str, Any]]], 
+                                labels: List[int], sequence_length: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """准备关键点序列数组 (N, sequence_length, 17, 3)，供训练时在线增强"""
+        arrays_list = []
+        labels_list = []
+        
+        for sequence, label in zip(pose_sequences, labels):
+            if len(sequence) < sequence_length:
+                continue
+            arrays_list.append(poses_to_array(sequence[-sequence_length:]))
+            labels_list.append(label)
+        
+        if not arrays_list:
+            return np.zeros((0, sequence_length, len(KEYPOINT_NAMES), 3), dtype=np.float32), np.array(labels_list)
+        return np.stack(arrays_list), np.array(labels_list)
+    
+    def features_from_arrays(self, keypoints: np.ndarray) -> np.ndarray:
+        """
+        _extract_pose_features 的向量化版本：(..., 17, 3) 关键点数组 -> (..., 特征数)
+        
+        置信度为0的关键点视为缺失，与字典中缺少该关键点时的处理一致
+        """
+        keypoints = np.asarray(keypoints, dtype=np.float32)
+        index = {name: i for i, name in enumerate(KEYPOINT_NAMES)}
+        
+        def point(name):
+            kp = keypoints[..., index[name], :]
+            return kp[..., 0], kp[..., 1], kp[..., 2] > 0
+        
+        basic = keypoints[..., [index[name] for name in FEATURE_KEYPOINTS], :]
+        basic = basic.reshape(basic.shape[:-2] + (-1,))
+        
+        lsx, lsy, ls = point('left_shoulder')
+        rsx, rsy, rs = point('right_shoulder')
+        lhx, lhy, lh = point('left_hip')
+        rhx, rhy, rh = point('right_hip')
+        _, lky, lk = point('left_knee')
+        
+        # 躯干角度
+        dx = (lhx + rhx) / 2 - (lsx + rsx) / 2
+        dy = (lhy + rhy) / 2 - (lsy + rsy) / 2
+        angle = np.abs(np.degrees(np.arctan2(dx, dy)))
+        trunk_angle = np.where(ls & rs & lh & rh & (dx != 0), angle, 0)
+        
+        # 高度比例
+        trunk_height = np.abs(lsy - lhy)
+        total_height = trunk_height + np.abs(lhy - lky)
+        ratio = trunk_height / np.where(total_height > 0, total_height, 1)
+        height_ratio = np.where(ls & lh & lk & (total_height > 0), ratio, 0)
+        
+        return np.concatenate([basic, trunk_angle[..., None], height_ratio[..., None]],
+                              axis=-1).astype(np.float32)
+    
+    def _extract_pose_features(self, pose: Dict[str, Any]) -> np.ndarray:
+        """提取单个姿势的特征"""
+        keypoints = pose['keypoints']
+        features = []
+        
+        # 关键点坐标和置信度
+        for name in FEATURE_KEYPOINTS:
+            if name in keypoints:
+                kp = keypoints[name]
+                features.extend([kp['x'], kp['y'], kp['confidence']])
+            else:
+                features.extend([0, 0, 0])
+        
+        # 几何特征
+        geometric_features = self._calculate_geometric_features(pose)
+        features.extend(list(geometric_features.values()))
+        
+        return np.array(features)
+    
+    def _calculate_geometric_features(self, pose: Dict[str, Any]) -> Dict[str, float]:
+        """计算几何特征"""
+        keypoints = pose['keypoints']
+        features = {}
+        
+        # 计算躯干角度
+        if all(k in keypoints for k in ['left_shoulder', 'right_shoulder', 'left_hip', 'right_hip']):
+            angle = self._calculate_trunk_angle(keypoints)
+            features['trunk_angle'] = angle
+        else:
+            features['trunk_angle'] = 0
+        
+        # 计算高度比例
+        if all(k in keypoints for k in ['left_shoulder', 'left_hip', 'left_knee']):
+            shoulder_y = keypoints['left_shoulder']['y']
+            hip_y = keypoints['left_hip']['y']
+            knee_y = keypoints['left_knee']['y']
+            
+            trunk_height = abs(shoulder_y - hip_y)
+            leg_height = abs(hip_y - knee_y)
+            total_height = trunk_height + leg_height
+            
+            features['height_ratio'] = trunk_height / total_height if total_height > 0 else 0
+        else:
+            features['height_ratio'] = 0
+        
+        return features
+    
+    def _calculate_trunk_angle(self, keypoints: Dict[str, Any]) -> float:
+        """计算躯干角度"""
+        shoulder_center_x = (keypoints['left_shoulder']['x'] + keypoints['right_shoulder']['x']) / 2
+        shoulder_center_y = (keypoints['left_shoulder']['y'] + keypoints['right_shoulder']['y']) / 2
+        hip_center_x = (keypoints['left_hip']['x'] + keypoints['right_hip']['x']) / 2
+        hip_center_y = (keypoints['left_hip']['y'] + keypoints['right_hip']['y']) / 2
+        
+        dx = hip_center_x - shoulder_center_x
+        dy = hip_center_y - shoulder_center_y
+        
+        if dx == 0:
+            return 0
+        
+        angle = np.arctan2(dx, dy) * 180 / np.pi
+        return abs(angle)
+    
+    def train(self, pose_sequences: List[List[Dict[str, Any]]], labels: List[int], 
+              epochs: int = 50, batch_size: int = 32, learning_rate: float = 0.001,
+              augmenter=None):
+        """
+        训练模型
+        
+        Args:
+            augmenter: 可选的 PoseAugmenter；提供时训练集保留原始关键点数组，
+                       每个批次在线增强后再向量化提取特征，验证集不增强
+        """
+        from sklearn.model_selection import train_test_split
+        
+        # 准备数据
+        if augmenter is not None:
+            X, y = self.prepare_sequence_arrays(pose_sequences, labels)
+        else:
+            X, y = self.prepare_sequence_data(pose_sequences, labels)
+        
+        if len(X) == 0:
+            print("没有足够的数据进行训练")
+            return
+        
+        if self.model is None:
+            self.input_size = self.features_from_arrays(X[:1]).shape[-1] if augmenter is not None else X.shape[-1]
+            self.create_model()
+        
+        # 划分训练集和验证集
+        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+        if augmenter is not None:
+            X_val = self.features_from_arrays(X_val)
+        
+        # 创建数据加载器
+        train_dataset = PoseDataset(X_train, y_train)
+        val_dataset = PoseDataset(X_val, y_val)
+        
+        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
+        val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
+        
+        # 定义损失函数和优化器
+        criterion = nn.CrossEntropyLoss()
+        optimizer = optim.Adam(self.model.parameters(), lr=learning_rate)
+        
+        # 训练循环
+        for epoch in range(epochs):
+            self.model.train()
+            train_loss = 0
+            for batch_features, batch_labels in train_loader:
+                if augmenter is not None:
+                    batch_features = torch.from_numpy(
+                        self.features_from_arrays(augmenter(batch_features.numpy())))
+                batch_features = batch_features.to(self.device)
+                batch_labels = batch_labels.to(self.device)
+                
+                optimizer.zero_grad()
+                outputs = self.model(batch_features)
+                loss = criterion(outputs, batch_labels)
+                loss.backward()
+                optimizer.step()
+                
+                train_loss += loss.item()
+            
+            # 验证
+            self.model.eval()
+            val_loss = 0
+            correct = 0
+            total = 0
+            
+            with torch.no_grad():
+                for batch_features, batch_labels in val_loader:
+                    batch_features = batch_features.to(self.device)
+                    batch_labels = batch_labels.to(self.device)
+                    
+                    outputs = self.model(batch_features)
+                    loss = criterion(outputs, batch_labels)
+                    val_loss += loss.item()
+                    
+                    _, predicted = torch.max(outputs.data, 1)
+                    total += batch_labels.size(0)
+                    correct += (predicted == batch_labels).sum().item()
+            
+            if (epoch + 1) % 10 == 0:
+                print(f'Epoch [{epoch+1}/{epochs}], Train Loss: {train_loss/len(train_loader):.4f}, '
+                      f'Val Loss: {val_loss/len(val_loader):.4f}, Val Acc: {100*correct/total:.2f}%')
+        
+        self.is_trained = True
+        print("深度学习模型训练完成")
+    
+    def predict(self, pose_sequence: List[Dict[str, Any]], sequence_length: int = 10) -> Tuple[bool, float]:
+        """预测摔倒"""
+        if not self.is_trained:
+            raise ValueError("模型未训练")
+        
+        if len(pose_sequence) < sequence_length:
+            return False, 0.0
+        
+        # 准备输入数据
+        sequence_features = []
+        for poses in pose_sequence[-sequence_length:]:
+            if poses:
+                pose_features = self._extract_pose_features(poses[0])
+            else:
+                pose_features = np.zeros(self.input_size)
+            sequence_features.append(pose_features)
+        
+        # 转换为tensor
+        input_tensor = torch.FloatTensor([sequence_features]).to(self.device)
+        
+        # 预测
+        self.model.eval()
+        with torch.no_grad():
+            outputs = self.model(input_tensor)
+            probabilities = torch.softmax(outputs, dim=1)
+            fall_probability = probabilities[0, 1].item()
+            prediction = fall_probability > 0.5
+        
+        return prediction, fall_probability
+    
+    def predict_batch(self, pose_sequences: List[List[List[Dict[str, Any]]]],
+                      sequence_length: int = 10) -> Tuple[List[bool], List[float]]:
+        """
+        一次前向计算预测多个跟踪目标的摔倒
+        
+        Args:
+            pose_sequences: 每个目标的逐帧姿势列表，帧数不足 sequence_length 的目标判为正常
+        """
+        if not self.is_trained:
+            raise ValueError("模型未训练")
+        
+        predictions = [False] * len(pose_sequences)
+        probabilities = [0.0] * len(pose_sequences)
+        ready = [i for i, sequence in enumerate(pose_sequences) if len(sequence) >= sequence_length]
+        if not ready:
+            return predictions, probabilities
+        
+        arrays = np.stack([poses_to_array(pose_sequences[i][-sequence_length:]) for i in ready])
+        input_tensor = torch.from_numpy(self.features_from_arrays(arrays)).to(self.device)
+        
+        self.model.eval()
+        with torch.no_grad():
+            fall_probability = torch.softmax(self.model(input_tensor), dim=1)[:, 1].cpu().tolist()
+        for i, prob in zip(ready, fall_probability):
+            predictions[i] = prob > 0.5
+            probabilities[i] = prob
+        return predictions, probabilities
+    
+    def export_quantized(self, filepath: str, sample_features: np.ndarray = None) -> Dict[str, Any]:
+        """
+        导出动态INT8量化（LSTM和全连接层）的TorchScript模型，用于CPU推理
+        
+        Args:
+            filepath: 导出路径（通常为 quantized_path(浮点模型路径)）
+            sample_features: 用于一致性检查和测速的特征 (N, 序列长度, 特征数)，默认随机生成
+        
+        Returns:
+            compare_models 的比较结果
+        """
+        if not self.is_trained or self.quantized:
+            raise ValueError("只能从已训练的浮点模型导出")
+        
+        float_model = copy.deepcopy(self.model).cpu().eval()
+        with warnings.catch_warnings():
+            # torch.ao.quantization / torch.jit 在新版本中有弃用提示，不影响导出结果
+            warnings.simplefilter('ignore')
+            quantized = torch.ao.quantization.quantize_dynamic(
+                float_model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+            scripted = torch.jit.script(quantized)
+            meta = {
+                'format_version': QUANTIZED_FORMAT_VERSION,
+                'model_type': self.model_type,
+                'input_size': self.input_size,
+            }
+            torch.jit.save(scripted, filepath, _extra_files={'meta.json': json.dumps(meta)})
+        print(f"INT8量化模型已导出到: {filepath}")
+        
+        if sample_features is None or len(sample_features) == 0:
+            sample_features = np.random.default_rng(0).normal(size=(64, 10, self.input_size))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            report = compare_models(float_model, scripted, sample_features)
+        print(format_comparison(report))
+        return report
+    
+    def save_model(self, filepath: str):
+        """保存模型"""
+        if self.quantized:
+            print("量化模型不能保存为state_dict，请保留原始的 .pth 文件")
+            return
+        if self.is_trained:
+            torch.save({
+                'model_state_dict': self.model.state_dict(),
+                'model_type': self.model_type,
+                'input_size': self.input_size
+            }, filepath)
+            print(f"模型已保存到: {filepath}")
+    
+    def load_model(self, filepath: str, prefer_quantized: bool = True):
+        """
+        加载模型
+        
+        Args:
+            filepath: 浮点模型 (.pth) 或导出的INT8模型 (.pt)
+            prefer_quantized: 存在不早于 .pth 的INT8导出文件时优先加载（CPU推理更快）
+        """
+        if filepath.endswith('.pt'):
+            self._load_quantized(filepath)
+            return
+        artifact = quantized_path(filepath)
+        if (prefer_quantized and os.path.exists(filepath) and os.path.exists(artifact)
+                and os.path.getmtime(artifact) >= os.path.getmtime(filepath)):
+            self._load_quantized(artifact)
+            return
+        if os.path.exists(filepath):
+            checkpoint = torch.load(filepath, map_location=self.device)
+            self.model_type = checkpoint['model_type']
+            self.input_size = checkpoint['input_size']
+            self.create_model()
+            self.model.load_state_dict(checkpoint['model_state_dict'])
+            self.quantized = False
+            self.is_trained = True
+            print(f"模型已从 {filepath} 加载")
+    
+    def _load_quantized(self, filepath: str):
+        if not os.path.exists(filepath):
+            return
+        extra_files = {'meta.json': ''}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            module = torch.jit.load(filepath, map_location='cpu', _extra_files=extra_files)
+        meta = json.loads(extra_files['meta.json'] or '{}')
+        self.model_type = meta.get('model_type', self.model_type)
+        self.input_size = meta.get('input_size', self.input_size)
+        self.model = module.eval()
+        self.device = torch.device('cpu')  # 动态量化算子只支持CPU
+        self.quantized = True
+        self.is_trained = True
+        print(f"INT8量化模型已从 {filepath} 加载")
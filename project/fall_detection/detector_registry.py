@@ -0,0 +1,165 @@
+"""
+检测器注册表模块
+各检测后端（姿势模型、机器学习、深度学习）只在首次使用时才导入和初始化，
+较慢的模型权重可以在后台线程加载，界面通过状态回调显示就绪情况
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# 后端状态
+STATE_IDLE = "未加载"
+STATE_LOADING = "加载中"
+STATE_READY = "就绪"
+STATE_FAILED = "失败"
+
+
+class DetectorRegistry:
+    """按需创建检测器实例的注册表（线程安全）"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._states: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        self._load_times: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._listeners = []
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """
+        注册检测后端
+
+        Args:
+            name: 后端名称（与GUI算法选项一致，如 'threshold', 'ml', 'dl', 'pose'）
+            factory: 无参数工厂函数，在其中导入依赖并返回初始化好的实例
+        """
+        self._factories[name] = factory
+        self._states[name] = STATE_IDLE
+        self._locks[name] = threading.Lock()
+
+    def add_listener(self, callback: Callable[[str, str], None]):
+        """添加状态变化回调 callback(name, state)，可能在后台线程中调用"""
+        self._listeners.append(callback)
+
+    def _set_state(self, name: str, state: str):
+        self._states[name] = state
+        for callback in self._listeners:
+            try:
+                callback(name, state)
+            except Exception as e:
+                print(f"检测器状态回调失败: {e}")
+
+    def get(self, name: str) -> Any:
+        """获取检测器实例，首次调用时在当前线程导入并初始化"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(f"未注册的检测器: {name}")
+
+        with self._locks[name]:
+            # 其他线程可能已经完成加载
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+
+            self._set_state(name, STATE_LOADING)
+            t0 = time.perf_counter()
+            try:
+                instance = self._factories[name]()
+            except Exception as e:
+                self._errors[name] = str(e)
+                self._set_state(name, STATE_FAILED)
+                raise
+            self._load_times[name] = time.perf_counter() - t0
+            self._instances[name] = instance
+            self._set_state(name, STATE_READY)
+            return instance
+
+    def peek(self, name: str) -> Optional[Any]:
+        """已加载则返回实例，否则返回None（不会触发加载）"""
+        return self._instances.get(name)
+
+    def load_async(self, name: str, callback: Callable[[Any, Optional[Exception]], None] = None):
+        """在后台线程中加载检测器，完成后调用 callback(instance, error)"""
+        if name in self._instances:
+            if callback:
+                callback(self._instances[name], None)
+            return
+
+        def worker():
+            try:
+                instance = self.get(name)
+            except Exception as e:
+                if callback:
+                    callback(None, e)
+                return
+            if callback:
+                callback(instance, None)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._instances
+
+    def state(self, name: str) -> str:
+        return self._states.get(name, STATE_IDLE)
+
+    def error(self, name: str) -> Optional[str]:
+        return self._errors.get(name)
+
+    def load_time(self, name: str) -> Optional[float]:
+        """后端导入+初始化耗时（秒）"""
+        return self._load_times.get(name)
+
+
+def _create_pose_detector(model_path: str = "yolov8n-pose.pt", pose_server: str = None):
+    if pose_server:
+        # 连接共享的姿势模型服务，本进程不加载权重
+        from pose_server import PoseServerClient, parse_address
+        return PoseServerClient(parse_address(pose_server))
+    from pose_detection import PoseDetector
+    return PoseDetector(model_path)
+
+
+def _create_threshold_detector():
+    from fall_detection_algorithms import ThresholdFallDetector
+    return ThresholdFallDetector()
+
+
+def _create_ml_detector():
+    from fall_detection_algorithms import TraditionalMLFallDetector
+    return TraditionalMLFallDetector('svm')
+
+
+def _create_dl_detector():
+    from deep_learning_detector import DeepLearningFallDetector
+    return DeepLearningFallDetector('lstm')
+
+
+def create_default_registry(pose_model_path: str = "yolov8n-pose.pt", pose_server: str = None) -> DetectorRegistry:
+    """创建包含全部默认后端的注册表（pose_server 为 "host:port" 时使用共享的姿势模型服务）"""
+    registry = DetectorRegistry()
+    registry.register('pose', lambda: _create_pose_detector(pose_model_path, pose_server))
+    registry.register('threshold', _create_threshold_detector)
+    registry.register('ml', _create_ml_detector)
+    registry.register('dl', _create_dl_detector)
+    return registry
+
+
+# 算法选项到所需后端的映射
+ALGORITHM_BACKENDS = {
+    'threshold': ['threshold'],
+    'ml': ['ml'],
+    'dl': ['dl'],
+    'all': ['threshold', 'ml', 'dl'],
+}
+
+if __name__ == "__main__":
+    registry = create_default_registry()
+    for backend in ('threshold', 'ml', 'dl', 'pose'):
+        registry.get(backend)
+        print(f"{backend}: {registry.state(backend)} ({registry.load_time(backend) * 1000:.1f} ms)")
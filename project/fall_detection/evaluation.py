@@ -0,0 +1,285 @@
+"""
+评估工具模块
+在处理后的姿势数据集上回放阈值法、机器学习和深度学习检测器，
+同时统计事件级精确率/召回率、检测延迟和逐帧推理耗时分布
+"""
+
+import os
+import json
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fall_event_engine import FallEventEngine, FallEventConfig, EVENT_START
+from pose_detection import track_poses_sequence
+
+DETECTOR_NAMES = ['threshold', 'ml', 'dl']
+
+# 工作进程内缓存已加载的检测器，同一进程处理多个文件时只加载一次
+_worker_detectors: Dict[str, Any] = {}
+
+
+def _load_detector(name: str, model_paths: Dict[str, str]):
+    """在工作进程中按需创建检测器"""
+    key = f"{name}:{model_paths.get(name, '')}"
+    if key in _worker_detectors:
+        return _worker_detectors[key]
+
+    if name == 'threshold':
+        from fall_detection_algorithms import ThresholdFallDetector
+        detector = ThresholdFallDetector()
+    elif name == 'ml':
+        from fall_detection_algorithms import TraditionalMLFallDetector
+        detector = TraditionalMLFallDetector()
+        detector.load_model(model_paths['ml'])
+    elif name == 'dl':
+        from deep_learning_detector import DeepLearningFallDetector
+        detector = DeepLearningFallDetector()
+        detector.load_model(model_paths['dl'])
+    else:
+        raise ValueError(f"不支持的检测器: {name}")
+
+    _worker_detectors[key] = detector
+    return detector
+
+
+def replay_file(detector_name: str, file_path: str, model_paths: Dict[str, str],
+                engine_config: Dict[str, Any] = None, sequence_length: int = 10) -> Dict[str, Any]:
+    """
+    用一个检测器回放一个处理后的数据文件（在工作进程中执行）
+
+    Returns:
+        包含标签、事件列表和逐帧耗时的结果
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    detector = _load_detector(detector_name, model_paths)
+    fps = float(data.get('fps', 25.0))
+    engine = FallEventEngine(FallEventConfig(**(engine_config or {})))
+    # 按跟踪ID分别判定；旧数据文件中的 person_id 可能只是帧内顺序，统一重新跟踪
+    poses_sequence = track_poses_sequence(data['poses_sequence'])
+
+    latencies = []
+    events = []
+    for frame_index, poses in enumerate(poses_sequence):
+        timestamp = frame_index / fps
+        if not poses:
+            events.extend(engine.expire_tracks(timestamp, frame_index))
+            continue
+
+        t0 = time.perf_counter()
+        if detector_name == 'threshold':
+            track_results = {}
+            for pose in poses:
+                is_fall, confidence, _ = detector.detect_fall(pose)
+                track_results[pose.get('person_id', 0)] = {'threshold': (is_fall, confidence)}
+        elif detector_name == 'ml':
+            predictions, probabilities = detector.predict(poses)
+            track_results = {pose.get('person_id', 0): {'ml': (bool(p), float(prob))}
+                             for pose, p, prob in zip(poses, predictions, probabilities)}
+        else:
+            window = poses_sequence[max(0, frame_index + 1 - sequence_length):frame_index + 1]
+            is_fall, confidence = detector.predict(window, sequence_length)
+            track_results = {poses[0].get('person_id', 0): {'dl': (bool(is_fall), float(confidence))}}
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        for track_id, results in track_results.items():
+            events.extend(engine.update(track_id, results, frame_index, timestamp))
+        events.extend(engine.expire_tracks(timestamp, frame_index))
+
+    events.extend(engine.flush(len(poses_sequence) / fps, len(poses_sequence)))
+
+    return {
+        'detector': detector_name,
+        'file': os.path.basename(file_path),
+        'label': int(data['label']),
+        'fps': fps,
+        'frames': len(poses_sequence),
+        'fall_start_frame': data.get('fall_start_frame'),
+        'event_start_frames': [e['start_frame'] for e in events if e['type'] == EVENT_START],
+        'latencies_ms': latencies,
+    }
+
+
+def _latency_stats(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p90_ms': 0.0, 'p99_ms': 0.0,
+                'max_ms': 0.0, 'fps': 0.0}
+    values = np.asarray(latencies)
+    mean = float(values.mean())
+    return {
+        'count': int(len(values)),
+        'mean_ms': mean,
+        'p50_ms': float(np.percentile(values, 50)),
+        'p90_ms': float(np.percentile(values, 90)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+        'fps': 1000.0 / mean if mean > 0 else 0.0,
+    }
+
+
+def summarize(file_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总一个检测器在所有文件上的结果
+
+    事件级指标：摔倒视频中至少产生一个事件记为TP，否则为FN；
+    正常视频中产生的每个事件记为FP，摔倒视频中多余的事件也计为FP。
+    检测延迟：第一个事件开始帧相对标注的摔倒起始帧 (fall_start_frame)，只统计有标注的摔倒视频，
+    标注起始帧之前开始的事件不计为检测到；没有任何标注时延迟为None。
+    """
+    tp = fp = fn = 0
+    delays_s = []
+    latencies = []
+    for result in file_results:
+        starts = result['event_start_frames']
+        latencies.extend(result['latencies_ms'])
+        if result['label'] == 1:
+            onset = result.get('fall_start_frame')
+            valid = starts if onset is None else [frame for frame in starts if frame >= onset]
+            if valid:
+                tp += 1
+                fp += len(starts) - 1
+                if onset is not None:
+                    delays_s.append((valid[0] - onset) / result['fps'])
+            else:
+                fn += 1
+                fp += len(starts)
+        else:
+            fp += len(starts)
+
+    precision = tp / (tp + fp) if tp + fp > 0 else 0.0
+    recall = tp / (tp + fn) if tp + fn > 0 else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+    return {
+        'files': len(file_results),
+        'tp': tp, 'fp': fp, 'fn': fn,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'mean_delay_s': float(np.mean(delays_s)) if delays_s else None,
+        'max_delay_s': float(np.max(delays_s)) if delays_s else None,
+        'delay_files': len(delays_s),
+        'latency': _latency_stats(latencies),
+    }
+
+
+class DetectorEvaluator:
+    """检测器评估器：一条命令比较各检测器的准确率与速度"""
+
+    def __init__(self, data_path: str, model_paths: Dict[str, str] = None,
+                 engine_config: Dict[str, Any] = None, workers: int = None):
+        """
+        Args:
+            data_path: DataPreprocessor 输出的数据目录
+            model_paths: {'ml': 模型路径(.npz/.pkl), 'dl': 模型路径(.pth)}，缺失的检测器会被跳过
+            engine_config: FallEventConfig 参数
+            workers: 工作进程数，默认使用CPU核数
+        """
+        self.data_path = data_path
+        self.model_paths = {k: v for k, v in (model_paths or {}).items() if v}
+        self.engine_config = engine_config or {}
+        self.workers = workers or os.cpu_count() or 1
+
+    def _data_files(self) -> List[str]:
+        return sorted(
+            os.path.join(self.data_path, f) for f in os.listdir(self.data_path)
+            if f.endswith('.json') and f != 'metadata.json'
+        )
+
+    def _available_detectors(self, detectors: Optional[List[str]]) -> List[str]:
+        available = []
+        for name in detectors or DETECTOR_NAMES:
+            if name != 'threshold' and not os.path.exists(self.model_paths.get(name, '')):
+                print(f"跳过 {name} 检测器：未提供模型文件")
+                continue
+            available.append(name)
+        return available
+
+    def run(self, detectors: List[str] = None, output_dir: str = "evaluation_results") -> Dict[str, Any]:
+        """并行回放所有文件并生成对比报告"""
+        files = self._data_files()
+        detectors = self._available_detectors(detectors)
+        if not files or not detectors:
+            print("没有可评估的数据或检测器")
+            return {}
+
+        print(f"评估 {len(detectors)} 个检测器 x {len(files)} 个文件，工作进程数: {self.workers}")
+        file_results: Dict[str, List[Dict[str, Any]]] = {name: [] for name in detectors}
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(replay_file, name, path, self.model_paths, self.engine_config): (name, path)
+                for name in detectors for path in files
+            }
+            for future in as_completed(futures):
+                name, path = futures[future]
+                try:
+                    file_results[name].append(future.result())
+                except Exception as e:
+                    print(f"{name} 回放 {os.path.basename(path)} 失败: {e}")
+
+        summary = {name: summarize(results) for name, results in file_results.items()}
+        self.write_report(summary, file_results, output_dir)
+        return summary
+
+    def write_report(self, summary: Dict[str, Any], file_results: Dict[str, List[Dict[str, Any]]],
+                     output_dir: str):
+        """保存JSON详细结果和文本对比表"""
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        report = {
+            'data_path': self.data_path,
+            'model_paths': self.model_paths,
+            'engine_config': self.engine_config,
+            'evaluated_time': datetime.now().isoformat(),
+            'summary': summary,
+            'files': {name: [{k: v for k, v in r.items() if k != 'latencies_ms'} for r in results]
+                      for name, results in file_results.items()},
+        }
+        json_path = os.path.join(output_dir, 'evaluation.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        lines = [
+            "检测器评估报告",
+            "=" * 90,
+            f"{'检测器':<10}{'文件数':>6}{'精确率':>8}{'召回率':>8}{'F1':>8}{'平均延迟(s)':>12}"
+            f"{'P50(ms)':>10}{'P90(ms)':>10}{'P99(ms)':>10}{'FPS':>10}",
+        ]
+        for name, s in summary.items():
+            delay = f"{s['mean_delay_s']:.2f}" if s['mean_delay_s'] is not None else "-"
+            lat = s['latency']
+            lines.append(
+                f"{name:<10}{s['files']:>6}{s['precision']:>8.3f}{s['recall']:>8.3f}{s['f1']:>8.3f}"
+                f"{delay:>12}{lat['p50_ms']:>10.3f}{lat['p90_ms']:>10.3f}{lat['p99_ms']:>10.3f}{lat['fps']:>10.1f}"
+            )
+        lines.append("")
+        lines.append("平均延迟只统计标注了摔倒起始帧 (fall_start_frame) 且检测到的视频: " + ", ".join(
+            f"{name} {s['delay_files']} 个" for name, s in summary.items()))
+        lines.append("事件统计 (TP/FP/FN): " + ", ".join(
+            f"{name} {s['tp']}/{s['fp']}/{s['fn']}" for name, s in summary.items()))
+
+        report_path = os.path.join(output_dir, 'evaluation_report.txt')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+        print("\n".join(lines))
+        print(f"评估报告已保存到: {output_dir}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="摔倒检测器评估")
+    parser.add_argument('--data', required=True, help='处理后的数据目录')
+    parser.add_argument('--ml-model', help='机器学习模型路径 (.npz/.pkl)')
+    parser.add_argument('--dl-model', help='深度学习模型路径 (.pth)')
+    parser.add_argument('--output', default='evaluation_results', help='报告输出目录')
+    parser.add_argument('--workers', type=int, help='工作进程数')
+    args = parser.parse_args()
+
+    DetectorEvaluator(args.data, {'ml': args.ml_model, 'dl': args.dl_model},
+                      workers=args.workers).run(output_dir=args.output)
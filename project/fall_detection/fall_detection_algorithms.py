@@ -6,18 +6,11 @@
 import numpy as np
 import cv2
 from typing import List, Dict, Any, Tuple
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.svm import SVC
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-import torch
-import torch.nn as nn
-import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
-import joblib
+import importlib
 import os
 
+from compiled_predictor import CompiledMLPredictor
+
 class ThresholdFallDetector:
     """基于阈值的摔倒检测器"""
     
@@ -167,10 +160,12 @@ class ThresholdFallDetector:
 class TraditionalMLFallDetector:
     """传统机器学习摔倒检测器"""
     
-    def __init__(self, model_type: str = 'svm'):
+    def __init__(self, model_type: str = 'svm', model_params: Dict[str, Any] = None):
         self.model_type = model_type
+        self.model_params = dict(model_params or {})
         self.model = None
-        self.scaler = StandardScaler()
+        self.scaler = None
+        self.compiled = None  # 纯NumPy预测器，加载.npz模型时使用
         self.is_trained = False
         
     def extract_features(self, poses: List[Dict[str, Any]]) -> np.ndarray:
@@ -251,23 +246,42 @@ class TraditionalMLFallDetector:
         angle = np.arctan2(dx, dy) * 180 / np.pi
         return abs(angle)
     
-    def train(self, X: np.ndarray, y: np.ndarray):
-        """训练模型"""
-        # 数据预处理
-        X_scaled = self.scaler.fit_transform(X)
+    def create_model(self, probability: bool = True):
+        """
+        根据模型类型和超参数创建未训练的分类器
         
-        # 选择模型
+        Args:
+            probability: SVM是否启用概率输出（会额外进行5折内部校准，超参数搜索时可关闭）
+        """
+        # sklearn只在训练时需要，推理可使用编译后的预测器
+        from sklearn.neighbors import KNeighborsClassifier
+        from sklearn.svm import SVC
+        from sklearn.ensemble import RandomForestClassifier
+        
+        params = dict(self.model_params)
         if self.model_type == 'knn':
-            self.model = KNeighborsClassifier(n_neighbors=5)
+            return KNeighborsClassifier(**{'n_neighbors': 5, **params})
         elif self.model_type == 'svm':
-            self.model = SVC(kernel='rbf', probability=True)
+            return SVC(**{'kernel': 'rbf', 'probability': probability, **params})
         elif self.model_type == 'rf':
-            self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+            return RandomForestClassifier(**{'n_estimators': 100, 'random_state': 42, **params})
         else:
             raise ValueError(f"不支持的模型类型: {self.model_type}")
+    
+    def train(self, X: np.ndarray, y: np.ndarray):
+        """训练模型"""
+        from sklearn.preprocessing import StandardScaler
+        
+        # 数据预处理
+        self.scaler = StandardScaler()
+        X_scaled = self.scaler.fit_transform(X)
+        
+        # 选择模型
+        self.model = self.create_model()
         
         # 训练模型
         self.model.fit(X_scaled, y)
+        self.compiled = None
         self.is_trained = True
         print(f"{self.model_type.upper()} 模型训练完成")
     
@@ -277,297 +291,85 @@ class TraditionalMLFallDetector:
             raise ValueError("模型未训练")
         
         features = self.extract_features(poses)
+        return self.predict_features(features)
+    
+    def predict_features(self, features: np.ndarray) -> Tuple[List[bool], List[float]]:
+        """对已提取的特征矩阵进行预测"""
+        if not self.is_trained:
+            raise ValueError("模型未训练")
+        
         if len(features) == 0:
             return [], []
         
+        if self.compiled is not None:
+            return self.compiled.predict(features)
+        
         X_scaled = self.scaler.transform(features)
         predictions = self.model.predict(X_scaled)
         probabilities = self.model.predict_proba(X_scaled)[:, 1]  # 摔倒的概率
         
         return predictions.tolist(), probabilities.tolist()
     
+    def compile(self) -> CompiledMLPredictor:
+        """把已训练的sklearn模型编译为纯NumPy预测器"""
+        if self.model is None:
+            raise ValueError("模型未训练")
+        self.compiled = CompiledMLPredictor.from_sklearn(self.model_type, self.model, self.scaler)
+        return self.compiled
+    
+    def export_compiled(self, filepath: str):
+        """导出编译后的预测器（.npz），推理时无需sklearn"""
+        compiled = self.compiled if self.compiled is not None else self.compile()
+        compiled.save(filepath)
+        print(f"编译模型已导出到: {filepath}")
+    
     def save_model(self, filepath: str):
         """保存模型"""
-        if self.is_trained:
+        if self.is_trained and self.model is not None:
+            import joblib
             model_data = {
                 'model': self.model,
                 'scaler': self.scaler,
-                'model_type': self.model_type
+                'model_type': self.model_type,
+                'model_params': self.model_params
             }
             joblib.dump(model_data, filepath)
             print(f"模型已保存到: {filepath}")
     
     def load_model(self, filepath: str):
         """加载模型"""
-        if os.path.exists(filepath):
+        if not os.path.exists(filepath):
+            return
+        if filepath.endswith('.npz'):
+            self.compiled = CompiledMLPredictor.load(filepath)
+            self.model_type = self.compiled.model_type
+            self.model = None
+            self.scaler = None
+            self.is_trained = True
+            print(f"编译模型已从 {filepath} 加载")
+        else:
+            import joblib
             model_data = joblib.load(filepath)
             self.model = model_data['model']
             self.scaler = model_data['scaler']
             self.model_type = model_data['model_type']
+            self.model_params = model_data.get('model_params', {})
+            self.compiled = None
             self.is_trained = True
             print(f"模型已从 {filepath} 加载")
 
-class PoseDataset(Dataset):
-    """姿势数据集"""
-    
-    def __init__(self, features: np.ndarray, labels: np.ndarray):
-        self.features = torch.FloatTensor(features)
-        self.labels = torch.LongTensor(labels)
-    
-    def __len__(self):
-        return len(self.features)
-    
-    def __getitem__(self, idx):
-        return self.features[idx], self.labels[idx]
-
-class LSTMFallDetector(nn.Module):
-    """LSTM摔倒检测器"""
-    
-    def __init__(self, input_size: int, hidden_size: int = 128, num_layers: int = 2, dropout: float = 0.2):
-        super(LSTMFallDetector, self).__init__()
-        self.hidden_size = hidden_size
-        self.num_layers = num_layers
-        
-        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, 
-                           batch_first=True, dropout=dropout)
-        self.fc = nn.Linear(hidden_size, 2)  # 2类：正常/摔倒
-        self.dropout = nn.Dropout(dropout)
-    
-    def forward(self, x):
-        # x shape: (batch_size, seq_len, input_size)
-        lstm_out, _ = self.lstm(x)
-        # 取最后一个时间步的输出
-        last_output = lstm_out[:, -1, :]
-        output = self.dropout(last_output)
-        output = self.fc(output)
-        return output
+# 深度学习相关类依赖torch，首次访问时才导入，避免拖慢GUI启动
+_LAZY_ATTRIBUTES = {
+    'PoseDataset': 'deep_learning_detector',
+    'LSTMFallDetector': 'deep_learning_detector',
+    'DeepLearningFallDetector': 'deep_learning_detector',
+}
 
-class DeepLearningFallDetector:
-    """深度学习摔倒检测器"""
-    
-    def __init__(self, model_type: str = 'lstm', input_size: int = 51):
-        self.model_type = model_type
-        self.input_size = input_size
-        self.model = None
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.is_trained = False
-        
-    def create_model(self):
-        """创建模型"""
-        if self.model_type == 'lstm':
-            self.model = LSTMFallDetector(self.input_size)
-        else:
-            raise ValueError(f"不支持的模型类型: {self.model_type}")
-        
-        self.model.to(self.device)
-    
-    def prepare_sequence_data(self, pose_sequences: List[List[Dict[str, Any]]], 
-                            labels: List[int], sequence_length: int = 10) -> Tuple[np.ndarray, np.ndarray]:
-        """准备序列数据"""
-        features_list = []
-        labels_list = []
-        
-        for sequence, label in zip(pose_sequences, labels):
-            if len(sequence) < sequence_length:
-                continue
-            
-            # 提取特征序列
-            sequence_features = []
-            for poses in sequence[-sequence_length:]:  # 取最后sequence_length帧
-                if poses:
-                    pose_features = self._extract_pose_features(poses[0])  # 取第一个人的姿势
-                else:
-                    pose_features = np.zeros(self.input_size)
-                sequence_features.append(pose_features)
-            
-            features_list.append(sequence_features)
-            labels_list.append(label)
-        
-        return np.array(features_list), np.array(labels_list)
-    
-    def _extract_pose_features(self, pose: Dict[str, Any]) -> np.ndarray:
-        """提取单个姿势的特征"""
-        keypoints = pose['keypoints']
-        features = []
-        
-        # 关键点坐标和置信度
-        for name in ['nose', 'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip', 
-                    'left_knee', 'right_knee', 'left_ankle', 'right_ankle']:
-            if name in keypoints:
-                kp = keypoints[name]
-                features.extend([kp['x'], kp['y'], kp['confidence']])
-            else:
-                features.extend([0, 0, 0])
-        
-        # 几何特征
-        geometric_features = self._calculate_geometric_features(pose)
-        features.extend(list(geometric_features.values()))
-        
-        return np.array(features)
-    
-    def _calculate_geometric_features(self, pose: Dict[str, Any]) -> Dict[str, float]:
-        """计算几何特征"""
-        keypoints = pose['keypoints']
-        features = {}
-        
-        # 计算躯干角度
-        if all(k in keypoints for k in ['left_shoulder', 'right_shoulder', 'left_hip', 'right_hip']):
-            angle = self._calculate_trunk_angle(keypoints)
-            features['trunk_angle'] = angle
-        else:
-            features['trunk_angle'] = 0
-        
-        # 计算高度比例
-        if all(k in keypoints for k in ['left_shoulder', 'left_hip', 'left_knee']):
-            shoulder_y = keypoints['left_shoulder']['y']
-            hip_y = keypoints['left_hip']['y']
-            knee_y = keypoints['left_knee']['y']
-            
-            trunk_height = abs(shoulder_y - hip_y)
-            leg_height = abs(hip_y - knee_y)
-            total_height = trunk_height + leg_height
-            
-            features['height_ratio'] = trunk_height / total_height if total_height > 0 else 0
-        else:
-            features['height_ratio'] = 0
-        
-        return features
-    
-    def _calculate_trunk_angle(self, keypoints: Dict[str, Any]) -> float:
-        """计算躯干角度"""
-        shoulder_center_x = (keypoints['left_shoulder']['x'] + keypoints['right_shoulder']['x']) / 2
-        shoulder_center_y = (keypoints['left_shoulder']['y'] + keypoints['right_shoulder']['y']) / 2
-        hip_center_x = (keypoints['left_hip']['x'] + keypoints['right_hip']['x']) / 2
-        hip_center_y = (keypoints['left_hip']['y'] + keypoints['right_hip']['y']) / 2
-        
-        dx = hip_center_x - shoulder_center_x
-        dy = hip_center_y - shoulder_center_y
-        
-        if dx == 0:
-            return 0
-        
-        angle = np.arctan2(dx, dy) * 180 / np.pi
-        return abs(angle)
-    
-    def train(self, pose_sequences: List[List[Dict[str, Any]]], labels: List[int], 
-              epochs: int = 50, batch_size: int = 32, learning_rate: float = 0.001):
-        """训练模型"""
-        if self.model is None:
-            self.create_model()
-        
-        # 准备数据
-        X, y = self.prepare_sequence_data(pose_sequences, labels)
-        
-        if len(X) == 0:
-            print("没有足够的数据进行训练")
-            return
-        
-        # 划分训练集和验证集
-        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # 创建数据加载器
-        train_dataset = PoseDataset(X_train, y_train)
-        val_dataset = PoseDataset(X_val, y_val)
-        
-        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
-        val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
-        
-        # 定义损失函数和优化器
-        criterion = nn.CrossEntropyLoss()
-        optimizer = optim.Adam(self.model.parameters(), lr=learning_rate)
-        
-        # 训练循环
-        for epoch in range(epochs):
-            self.model.train()
-            train_loss = 0
-            for batch_features, batch_labels in train_loader:
-                batch_features = batch_features.to(self.device)
-                batch_labels = batch_labels.to(self.device)
-                
-                optimizer.zero_grad()
-                outputs = self.model(batch_features)
-                loss = criterion(outputs, batch_labels)
-                loss.backward()
-                optimizer.step()
-                
-                train_loss += loss.item()
-            
-            # 验证
-            self.model.eval()
-            val_loss = 0
-            correct = 0
-            total = 0
-            
-            with torch.no_grad():
-                for batch_features, batch_labels in val_loader:
-                    batch_features = batch_features.to(self.device)
-                    batch_labels = batch_labels.to(self.device)
-                    
-                    outputs = self.model(batch_features)
-                    loss = criterion(outputs, batch_labels)
-                    val_loss += loss.item()
-                    
-                    _, predicted = torch.max(outputs.data, 1)
-                    total += batch_labels.size(0)
-                    correct += (predicted == batch_labels).sum().item()
-            
-            if (epoch + 1) % 10 == 0:
-                print(f'Epoch [{epoch+1}/{epochs}], Train Loss: {train_loss/len(train_loader):.4f}, '
-                      f'Val Loss: {val_loss/len(val_loader):.4f}, Val Acc: {100*correct/total:.2f}%')
-        
-        self.is_trained = True
-        print("深度学习模型训练完成")
-    
-    def predict(self, pose_sequence: List[Dict[str, Any]], sequence_length: int = 10) -> Tuple[bool, float]:
-        """预测摔倒"""
-        if not self.is_trained:
-            raise ValueError("模型未训练")
-        
-        if len(pose_sequence) < sequence_length:
-            return False, 0.0
-        
-        # 准备输入数据
-        sequence_features = []
-        for poses in pose_sequence[-sequence_length:]:
-            if poses:
-                pose_features = self._extract_pose_features(poses[0])
-            else:
-                pose_features = np.zeros(self.input_size)
-            sequence_features.append(pose_features)
-        
-        # 转换为tensor
-        input_tensor = torch.FloatTensor([sequence_features]).to(self.device)
-        
-        # 预测
-        self.model.eval()
-        with torch.no_grad():
-            outputs = self.model(input_tensor)
-            probabilities = torch.softmax(outputs, dim=1)
-            fall_probability = probabilities[0, 1].item()
-            prediction = fall_probability > 0.5
-        
-        return prediction, fall_probability
-    
-    def save_model(self, filepath: str):
-        """保存模型"""
-        if self.is_trained:
-            torch.save({
-                'model_state_dict': self.model.state_dict(),
-                'model_type': self.model_type,
-                'input_size': self.input_size
-            }, filepath)
-            print(f"模型已保存到: {filepath}")
-    
-    def load_model(self, filepath: str):
-        """加载模型"""
-        if os.path.exists(filepath):
-            checkpoint = torch.load(filepath, map_location=self.device)
-            self.model_type = checkpoint['model_type']
-            self.input_size = checkpoint['input_size']
-            self.create_model()
-            self.model.load_state_dict(checkpoint['model_state_dict'])
-            self.is_trained = True
-            print(f"模型已从 {filepath} 加载")
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name])
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     # 测试代码
@@ -578,4 +380,5 @@ if __name__ == "__main__":
     ml_detector = TraditionalMLFallDetector('svm')
     
     print("测试深度学习检测器...")
+    from deep_learning_detector import DeepLearningFallDetector
     dl_detector = DeepLearningFallDetector('lstm') 
\ No newline at end of file
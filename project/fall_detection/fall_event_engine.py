@@ -0,0 +1,201 @@
+"""
+摔倒事件引擎模块
+把逐帧的检测结果转换为离散的摔倒事件：K-of-N投票开启事件、连续正常帧关闭事件，
+多算法结果按权重融合，每帧每个目标的处理为O(1)
+"""
+
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+# 目标状态
+STATE_NORMAL = "正常"
+STATE_FALLING = "摔倒"
+STATE_LYING = "躺地"
+STATE_RECOVERED = "已恢复"
+
+# 事件类型
+EVENT_START = "start"
+EVENT_END = "end"
+
+
+class FallEventConfig:
+    """事件引擎参数"""
+
+    def __init__(self, window_size: int = 10, min_positive: int = 6,
+                 score_threshold: float = 0.5, lying_frames: int = 15,
+                 recover_frames: int = 10, recovered_hold_frames: int = 30,
+                 track_timeout: float = 2.0, weights: Dict[str, float] = None):
+        """
+        Args:
+            window_size: 投票窗口长度N（帧）
+            min_positive: 窗口内至少K帧判为摔倒才开启事件
+            score_threshold: 融合置信度达到该值的帧记为摔倒帧
+            lying_frames: 事件开启后连续摔倒帧数达到该值进入躺地状态
+            recover_frames: 连续正常帧数达到该值关闭事件
+            recovered_hold_frames: 恢复状态保持的帧数，之后回到正常状态
+            track_timeout: 目标超过该时间（秒）未出现则移除，进行中的事件随之关闭
+            weights: 各算法的融合权重，如 {'threshold': 1.0, 'ml': 1.0, 'dl': 1.0}
+        """
+        if not 0 < min_positive <= window_size:
+            raise ValueError("min_positive 必须在 1 到 window_size 之间")
+        self.window_size = window_size
+        self.min_positive = min_positive
+        self.score_threshold = score_threshold
+        self.lying_frames = lying_frames
+        self.recover_frames = recover_frames
+        self.recovered_hold_frames = recovered_hold_frames
+        self.track_timeout = track_timeout
+        self.weights = dict(weights or {'threshold': 1.0, 'ml': 1.0, 'dl': 1.0})
+
+
+class _TrackState:
+    """单个目标的流式状态"""
+
+    __slots__ = ('votes', 'positive_count', 'state', 'positive_streak', 'negative_streak',
+                 'event', 'last_seen')
+
+    def __init__(self, window_size: int, timestamp: float):
+        self.votes = deque(maxlen=window_size)
+        self.positive_count = 0
+        self.state = STATE_NORMAL
+        self.positive_streak = 0
+        self.negative_streak = 0
+        self.event: Optional[Dict[str, Any]] = None
+        self.last_seen = timestamp
+
+    def push_vote(self, vote: bool):
+        """滑动窗口计数，O(1)更新"""
+        if len(self.votes) == self.votes.maxlen and self.votes[0]:
+            self.positive_count -= 1
+        self.votes.append(vote)
+        if vote:
+            self.positive_count += 1
+
+    def reset_votes(self):
+        self.votes.clear()
+        self.positive_count = 0
+
+
+class FallEventEngine:
+    """多目标摔倒事件状态机"""
+
+    def __init__(self, config: FallEventConfig = None):
+        self.config = config or FallEventConfig()
+        self.tracks: Dict[Any, _TrackState] = {}
+        self._next_event_id = 1
+
+    def fuse(self, results: Dict[str, Tuple[bool, float]]) -> float:
+        """
+        按权重融合多个算法的结果
+
+        Args:
+            results: {算法名: (is_fall, confidence)}，未运行的算法不出现在字典中
+
+        Returns:
+            融合后的摔倒置信度 [0, 1]
+        """
+        total_weight = 0.0
+        score = 0.0
+        for algo, (is_fall, confidence) in results.items():
+            weight = self.config.weights.get(algo, 0.0)
+            if weight <= 0:
+                continue
+            # 判为正常时，置信度描述的是摔倒概率之外的含义，统一按0计
+            score += weight * (float(confidence) if is_fall else 0.0)
+            total_weight += weight
+        return score / total_weight if total_weight > 0 else 0.0
+
+    def update(self, track_id: Any, results: Dict[str, Tuple[bool, float]],
+               frame_index: int = None, timestamp: float = None) -> List[Dict[str, Any]]:
+        """
+        输入一个目标在当前帧的检测结果
+
+        Returns:
+            本帧产生的事件列表（通常为空；事件开启/关闭时各产生一次）
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        cfg = self.config
+        track = self.tracks.get(track_id)
+        if track is None:
+            track = self.tracks[track_id] = _TrackState(cfg.window_size, timestamp)
+        track.last_seen = timestamp
+
+        score = self.fuse(results)
+        vote = score >= cfg.score_threshold
+        track.push_vote(vote)
+        if vote:
+            track.positive_streak += 1
+            track.negative_streak = 0
+        else:
+            track.negative_streak += 1
+            track.positive_streak = 0
+
+        events = []
+        if track.state in (STATE_NORMAL, STATE_RECOVERED):
+            if track.positive_count >= cfg.min_positive:
+                track.state = STATE_FALLING
+                track.event = {
+                    'event_id': self._next_event_id,
+                    'track_id': track_id,
+                    'start_time': timestamp,
+                    'start_frame': frame_index,
+                    'peak_confidence': score,
+                    'algorithms': sorted(results.keys()),
+                }
+                self._next_event_id += 1
+                events.append(dict(track.event, type=EVENT_START, state=track.state))
+            elif track.state == STATE_RECOVERED and track.negative_streak >= cfg.recovered_hold_frames:
+                track.state = STATE_NORMAL
+        else:
+            track.event['peak_confidence'] = max(track.event['peak_confidence'], score)
+            if track.state == STATE_FALLING and track.positive_streak >= cfg.lying_frames:
+                track.state = STATE_LYING
+            if track.negative_streak >= cfg.recover_frames:
+                events.append(self._close_event(track, timestamp, frame_index, 'recovered'))
+
+        return events
+
+    def _close_event(self, track: _TrackState, timestamp: float, frame_index: Optional[int],
+                     reason: str) -> Dict[str, Any]:
+        """关闭目标当前的事件并进入恢复状态"""
+        event = dict(track.event, type=EVENT_END, state=track.state, end_time=timestamp,
+                     end_frame=frame_index, duration=timestamp - track.event['start_time'],
+                     reason=reason)
+        track.event = None
+        track.state = STATE_RECOVERED
+        track.negative_streak = 0
+        track.reset_votes()
+        return event
+
+    def expire_tracks(self, timestamp: float = None, frame_index: int = None) -> List[Dict[str, Any]]:
+        """移除超时未出现的目标，返回因此关闭的事件"""
+        timestamp = time.time() if timestamp is None else timestamp
+        events = []
+        for track_id in list(self.tracks):
+            track = self.tracks[track_id]
+            if timestamp - track.last_seen > self.config.track_timeout:
+                if track.event is not None:
+                    events.append(self._close_event(track, timestamp, frame_index, 'lost'))
+                del self.tracks[track_id]
+        return events
+
+    def flush(self, timestamp: float = None, frame_index: int = None) -> List[Dict[str, Any]]:
+        """关闭所有进行中的事件（视频结束或停止检测时调用）"""
+        timestamp = time.time() if timestamp is None else timestamp
+        events = [self._close_event(track, timestamp, frame_index, 'flushed')
+                  for track in self.tracks.values() if track.event is not None]
+        self.tracks.clear()
+        return events
+
+    def state(self, track_id: Any) -> str:
+        track = self.tracks.get(track_id)
+        return track.state if track is not None else STATE_NORMAL
+
+    def any_active(self) -> bool:
+        """是否存在进行中的摔倒事件"""
+        return any(track.event is not None for track in self.tracks.values())
+
+    def active_events(self) -> List[Dict[str, Any]]:
+        return [dict(track.event, state=track.state)
+                for track in self.tracks.values() if track.event is not None]
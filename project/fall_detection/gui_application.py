@@ -14,19 +14,74 @@ import os
 from typing import Optional, Dict, Any
 import json
 
-# 导入自定义模块
-from pose_detection import PoseDetector, resize_pose
-from fall_detection_algorithms import (
-    ThresholdFallDetector, 
-    TraditionalMLFallDetector, 
-    DeepLearningFallDetector
-)
+# 导入自定义模块（检测后端由注册表按需导入）
+from pose_detection import resize_pose, CropPoseDetector, PoseTracker
+from detector_registry import create_default_registry, ALGORITHM_BACKENDS, STATE_READY, STATE_FAILED
 from alert_system import AlertManager, AlertConfig
+from fall_event_engine import FallEventEngine, EVENT_START, STATE_LYING
+from video_index import VideoThumbnailIndex, FramePoseCache
+from log_sink import GUILogSink
+from stage_profiler import (profiler, STAGE_DECODE, STAGE_RESIZE, STAGE_FALL_LOGIC, STAGE_DRAW,
+                            STAGE_COLOR, STAGE_DISPLAY)
+
+def _new_block_image(size):
+    """分配连续内存的RGB图像，PhotoImage.paste 可以直接拷贝而不再转换"""
+    if hasattr(Image.core, 'new_block'):
+        return Image.Image()._new(Image.core.new_block('RGB', size))
+    return Image.new('RGB', size)
+
+
+class DisplaySurface:
+    """单个显示窗格：每种尺寸只分配一次PhotoImage和PIL缓冲区，之后逐帧原地更新"""
+    
+    def __init__(self, label):
+        self.label = label
+        self.size = None
+        self.photo = None
+        self.buffer = None
+        self.scratch = None
+    
+    def _allocate(self, size):
+        width, height = size
+        self.photo = ImageTk.PhotoImage('RGB', size)
+        self.buffer = _new_block_image(size)
+        self.scratch = np.empty((height, width, 3), dtype=np.uint8)
+        self.label.configure(image=self.photo, text="")
+        self.label.image = self.photo
+        self.size = size
+    
+    def show(self, image, size=None):
+        """
+        显示BGR图像
+        
+        Args:
+            image: BGR图像
+            size: 显示尺寸 (宽, 高)，与图像尺寸不同时缩放到复用的缓冲区
+        """
+        height, width = image.shape[:2]
+        size = size or (width, height)
+        if size != self.size:
+            self._allocate(size)
+        if size != (width, height):
+            with profiler.stage(STAGE_RESIZE):
+                image = cv2.resize(image, size, dst=self.scratch, interpolation=cv2.INTER_AREA)
+        # 解码到PIL缓冲区时按BGR读取，颜色通道交换与拷贝合并完成
+        with profiler.stage(STAGE_COLOR):
+            self.buffer.frombytes(np.ascontiguousarray(image), 'raw', 'BGR')
+        with profiler.stage(STAGE_DISPLAY):
+            self.photo.paste(self.buffer)
+    
+    def clear(self, text):
+        self.label.configure(image="", text=text)
+        self.label.image = None
+        self.photo = None
+        self.size = None
+
 
 class FallDetectionGUI:
     """摔倒检测GUI应用程序"""
     
-    def __init__(self, root):
+    def __init__(self, root, pose_server: str = None):
         self.root = root
         self.root.title("摔倒检测系统")
         self.root.geometry("1300x900")
@@ -37,6 +92,7 @@ class FallDetectionGUI:
         self.frame_status = tk.StringVar(value="未检测")
         self.detect_speed = tk.StringVar(value="-")
         self.current_algorithm = tk.StringVar(value="阈值法")
+        self.model_status = tk.StringVar(value="加载中")
         self.frame_index = 0
         self.total_frames = 0
         self.is_paused = False
@@ -47,18 +103,34 @@ class FallDetectionGUI:
         self.last_detection_time = 0
         self.detection_interval = 0.05  # 检测间隔（秒）
         self.last_poses = None  # 缓存上一帧的检测结果
+        self.pose_cache = FramePoseCache()  # 按帧号缓存的姿势结果，回看时跳过推理
+        self.crop_tracking_var = tk.BooleanVar(value=False)  # 跟踪区域裁剪推理
+        self._crop_detector = None
+        self.pose_tracker = PoseTracker()  # 整帧推理时为各人分配跨帧稳定的ID，事件引擎按ID判定
+        self.thumbnail_index = None  # 进度条拖动预览用的缩略图索引
+        self.video_size = None
+        self.pending_seek = None  # 由播放线程执行的定位请求（只保留最新一次）
+        self._seek_lock = threading.Lock()
         
         # 显示质量设置
         self.max_display_width = 640
         self.max_display_height = 480
-        
-        # 初始化组件
-        self.pose_detector = PoseDetector()
-        self.threshold_detector = ThresholdFallDetector()
-        self.ml_detector = TraditionalMLFallDetector('svm')
-        self.dl_detector = DeepLearningFallDetector('lstm')
+        self.show_original_var = tk.BooleanVar(value=True)
+        self._display_scratch = None  # 缩放后显示帧的复用缓冲区
+        
+        # 日志：各线程写入队列，由主循环定时批量刷新到日志面板
+        self.log_sink = GUILogSink()
+        self.log_max_lines = 2000  # 日志面板最多保留的行数，完整日志见轮转文件
+        self.log_flush_interval = 100  # 刷新间隔（毫秒）
+        self._log_dropped_shown = 0
+        
+        # 初始化组件：检测器在首次使用时创建，姿势模型权重在后台加载
+        self.detectors = create_default_registry(pose_server=pose_server)
+        self.detectors.add_listener(self.on_detector_state_changed)
         self.alert_manager = AlertManager()
         self.alert_config = AlertConfig()
+        # 逐帧结果经事件引擎去抖，预警等下游操作每个事件只触发一次
+        self.event_engine = FallEventEngine()
         
         self.video_capture = None
         self.current_frame = None
@@ -71,7 +143,57 @@ class FallDetectionGUI:
         }
         
         self.create_widgets()
+        self._flush_log()
         self.load_config()
+        self.detectors.load_async('pose')
+    
+    @property
+    def pose_detector(self):
+        return self.detectors.get('pose')
+    
+    @property
+    def crop_detector(self):
+        if self._crop_detector is None:
+            self._crop_detector = CropPoseDetector(self.pose_detector)
+        return self._crop_detector
+    
+    @property
+    def threshold_detector(self):
+        return self.detectors.get('threshold')
+    
+    @property
+    def ml_detector(self):
+        return self.detectors.get('ml')
+    
+    @property
+    def dl_detector(self):
+        return self.detectors.get('dl')
+    
+    def on_detector_state_changed(self, name: str, state: str):
+        """检测器状态变化回调（可能来自后台线程，转交给Tk主循环处理）"""
+        def update():
+            if name == 'pose':
+                self.model_status.set(state)
+            load_time = self.detectors.load_time(name)
+            if state == STATE_READY and load_time is not None:
+                self.log_message(f"检测器 {name} 已就绪，耗时 {load_time:.2f} 秒", "SUCCESS")
+            elif state == STATE_FAILED:
+                self.log_message(f"检测器 {name} 加载失败: {self.detectors.error(name)}", "ERROR")
+        self.root.after(0, update)
+    
+    def on_pose_detector_failed(self):
+        """姿势模型加载失败：停止检测并弹出错误信息"""
+        if self.video_capture is not None:
+            self.stop_detection()
+        error = self.detectors.error('pose')
+        self.log_message(f"姿势模型加载失败，无法检测: {error}", "ERROR")
+        messagebox.showerror("错误", f"姿势模型加载失败，无法检测:\n{error}")
+    
+    def on_algorithm_changed(self):
+        """切换算法时在后台预加载对应的检测后端"""
+        for backend in ALGORITHM_BACKENDS.get(self.algorithm_var.get(), []):
+            if not self.detectors.is_ready(backend):
+                self.detectors.load_async(backend)
     
     def create_widgets(self):
         """创建GUI组件"""
@@ -127,6 +249,13 @@ class FallDetectionGUI:
                                         font=('Arial', 9), foreground='#666666', width=10)
         self.frame_info_label.pack(side=tk.LEFT, padx=5)
         
+        # 模型就绪状态
+        model_state_frame = ttk.Frame(status_row)
+        model_state_frame.pack(side=tk.LEFT, padx=10)
+        ttk.Label(model_state_frame, text="🤖 模型:", font=('Arial', 9, 'bold')).pack(side=tk.LEFT)
+        ttk.Label(model_state_frame, textvariable=self.model_status,
+                  font=('Arial', 9), foreground='#006666', width=8).pack(side=tk.LEFT, padx=5)
+        
         # 主框架
         main_frame = ttk.Frame(self.root)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -146,19 +275,22 @@ class FallDetectionGUI:
         video_inner_frame.pack(fill=tk.BOTH, expand=True)
         
         # 原图窗口
-        original_frame = ttk.Frame(video_inner_frame)
-        original_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
-        ttk.Label(original_frame, text="原图/原视频", font=('Arial', 10, 'bold')).pack()
-        self.original_video_label = ttk.Label(original_frame, text="请加载图片或视频")
+        self.original_pane = ttk.Frame(video_inner_frame)
+        self.original_pane.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+        ttk.Label(self.original_pane, text="原图/原视频", font=('Arial', 10, 'bold')).pack()
+        self.original_video_label = ttk.Label(self.original_pane, text="请加载图片或视频")
         self.original_video_label.pack(fill=tk.BOTH, expand=True)
         
         # 检测后窗口
-        processed_frame = ttk.Frame(video_inner_frame)
-        processed_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
-        ttk.Label(processed_frame, text="检测后", font=('Arial', 10, 'bold')).pack()
-        self.processed_video_label = ttk.Label(processed_frame, text="请加载图片或视频")
+        self.processed_pane = ttk.Frame(video_inner_frame)
+        self.processed_pane.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+        ttk.Label(self.processed_pane, text="检测后", font=('Arial', 10, 'bold')).pack()
+        self.processed_video_label = ttk.Label(self.processed_pane, text="请加载图片或视频")
         self.processed_video_label.pack(fill=tk.BOTH, expand=True)
         
+        self.original_surface = DisplaySurface(self.original_video_label)
+        self.processed_surface = DisplaySurface(self.processed_video_label)
+        
         # 进度条和暂停按钮
         progress_frame = ttk.Frame(video_frame)
         progress_frame.pack(fill=tk.X, pady=5)
@@ -211,13 +343,13 @@ class FallDetectionGUI:
         
         self.algorithm_var = tk.StringVar(value="threshold")
         ttk.Radiobutton(algo_frame, text="阈值法", variable=self.algorithm_var, 
-                       value="threshold").pack(anchor=tk.W)
+                       value="threshold", command=self.on_algorithm_changed).pack(anchor=tk.W)
         ttk.Radiobutton(algo_frame, text="机器学习", variable=self.algorithm_var, 
-                       value="ml").pack(anchor=tk.W)
+                       value="ml", command=self.on_algorithm_changed).pack(anchor=tk.W)
         ttk.Radiobutton(algo_frame, text="深度学习", variable=self.algorithm_var, 
-                       value="dl").pack(anchor=tk.W)
+                       value="dl", command=self.on_algorithm_changed).pack(anchor=tk.W)
         ttk.Radiobutton(algo_frame, text="全部算法", variable=self.algorithm_var, 
-                       value="all").pack(anchor=tk.W)
+                       value="all", command=self.on_algorithm_changed).pack(anchor=tk.W)
         
         # 检测控制
         detect_frame = ttk.LabelFrame(control_frame, text="⚙️ 检测控制", padding=5)
@@ -226,6 +358,10 @@ class FallDetectionGUI:
         ttk.Button(detect_frame, text="▶️ 开始检测", command=self.start_detection).pack(fill=tk.X, pady=2)
         ttk.Button(detect_frame, text="⏹️ 停止检测", command=self.stop_detection).pack(fill=tk.X, pady=2)
         ttk.Button(detect_frame, text="🔍 单帧检测", command=self.single_frame_detection).pack(fill=tk.X, pady=2)
+        ttk.Checkbutton(detect_frame, text="显示原图窗口", variable=self.show_original_var,
+                        command=self.toggle_original_pane).pack(anchor=tk.W, pady=2)
+        ttk.Checkbutton(detect_frame, text="跟踪区域裁剪推理", variable=self.crop_tracking_var,
+                        command=self.toggle_crop_tracking).pack(anchor=tk.W, pady=2)
         
         # 预警设置
         alert_frame = ttk.LabelFrame(control_frame, text="🚨 预警设置", padding=5)
@@ -248,6 +384,7 @@ class FallDetectionGUI:
         settings_frame.pack(fill=tk.X, pady=(0, 10))
         
         ttk.Button(settings_frame, text="🔧 参数设置", command=self.open_settings).pack(fill=tk.X, pady=2)
+        ttk.Button(settings_frame, text="📈 性能诊断", command=self.open_diagnostics).pack(fill=tk.X, pady=2)
         ttk.Button(settings_frame, text="💾 保存配置", command=self.save_config).pack(fill=tk.X, pady=2)
         ttk.Button(settings_frame, text="📖 关于", command=self.show_about).pack(fill=tk.X, pady=2)
         
@@ -273,13 +410,42 @@ class FallDetectionGUI:
 
         
     def log_message(self, message: str, level: str = "INFO"):
-        """添加日志消息 - 支持不同级别"""
-        timestamp = time.strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
+        """添加日志消息 - 支持不同级别（任意线程可调用，由 _flush_log 统一显示）"""
+        self.log_sink.put(message, level)
         
-        self.log_text.insert(tk.END, log_entry, level)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+    def _flush_log(self):
+        """把队列中的日志批量追加到日志面板，并裁剪超出上限的旧行"""
+        try:
+            entries = self.log_sink.drain()
+            dropped = self.log_sink.dropped - self._log_dropped_shown
+            if entries or dropped:
+                # 只有停留在底部时才自动滚动，避免打断用户翻看历史日志
+                at_bottom = self.log_text.yview()[1] >= 0.999
+                args = []
+                if dropped:
+                    self._log_dropped_shown += dropped
+                    args += [f"... 界面跳过 {dropped} 条日志（完整内容见日志文件）\n", "WARNING"]
+                # 相邻同级别的行合并成一段，一次insert调用写入整批
+                chunk, chunk_level = [], None
+                for timestamp, level, message in entries:
+                    if level != chunk_level and chunk:
+                        args += ["".join(chunk), chunk_level]
+                        chunk = []
+                    chunk_level = level
+                    chunk.append(f"[{timestamp}] {message}\n")
+                if chunk:
+                    args += ["".join(chunk), chunk_level]
+                self.log_text.insert(tk.END, *args)
+                
+                line_count = int(self.log_text.index('end-1c').split('.')[0])
+                excess = line_count - 1 - self.log_max_lines
+                if excess > 0:
+                    self.log_text.delete('1.0', f'{excess + 1}.0')
+                if at_bottom:
+                    self.log_text.see(tk.END)
+        except tk.TclError:
+            return  # 窗口已关闭
+        self.root.after(self.log_flush_interval, self._flush_log)
         
     def clear_log(self):
         """清空日志"""
@@ -315,44 +481,58 @@ class FallDetectionGUI:
         """显示原始帧和检测后帧 - 支持最大尺寸限制和骨骼点坐标同步缩放"""
         if frame is None:
             return
-        max_width = self.max_display_width
-        max_height = self.max_display_height
         height, width = frame.shape[:2]
-        if width > max_width or height > max_height:
-            scale = min(max_width / width, max_height / height)
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            frame_display = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-            poses_display = resize_pose(poses, scale, scale) if poses is not None else None
-            if poses_display is not None:
-                processed_display = self.pose_detector.draw_pose(frame_display, poses_display, draw_keypoints=True, draw_skeleton=True, draw_bbox=True)
-            elif processed_frame is not None:
-                processed_display = cv2.resize(processed_frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
+        scale = min(self.max_display_width / width, self.max_display_height / height, 1.0)
+        size = (int(width * scale), int(height * scale))
+        
+        # 只有需要显示原图或在原图上绘制骨架时才缩放原始帧
+        frame_display = None
+        if self.show_original_var.get() or poses is not None:
+            if scale < 1.0:
+                if self._display_scratch is None or self._display_scratch.shape[:2] != (size[1], size[0]):
+                    self._display_scratch = np.empty((size[1], size[0], 3), dtype=np.uint8)
+                with profiler.stage(STAGE_RESIZE):
+                    frame_display = cv2.resize(frame, size, dst=self._display_scratch, interpolation=cv2.INTER_AREA)
             else:
-                processed_display = None
-        else:
-            frame_display = frame
-            poses_display = poses
-            if poses_display is not None:
-                processed_display = self.pose_detector.draw_pose(frame_display, poses_display, draw_keypoints=True, draw_skeleton=True, draw_bbox=True)
-            else:
-                processed_display = processed_frame
-        # 原图
-        frame_rgb = cv2.cvtColor(frame_display, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(frame_rgb)
-        photo = ImageTk.PhotoImage(pil_image)
-        self.original_video_label.configure(image=photo, text="")
-        self.original_video_label.image = photo
+                frame_display = frame
+        
+        # 原图（窗口隐藏时跳过）
+        if self.show_original_var.get():
+            self.original_surface.show(frame_display)
+        
         # 检测后图
-        if processed_display is not None:
-            processed_rgb = cv2.cvtColor(processed_display, cv2.COLOR_BGR2RGB)
-            pil_processed = Image.fromarray(processed_rgb)
-            photo2 = ImageTk.PhotoImage(pil_processed)
-            self.processed_video_label.configure(image=photo2, text="")
-            self.processed_video_label.image = photo2
+        if poses is not None:
+            poses_display = resize_pose(poses, scale, scale) if scale < 1.0 else poses
+            with profiler.stage(STAGE_DRAW):
+                processed_display = self.pose_detector.draw_pose(frame_display, poses_display, draw_keypoints=True, draw_skeleton=True, draw_bbox=True)
+            self.processed_surface.show(processed_display)
+        elif processed_frame is frame and frame_display is not None:
+            self.processed_surface.show(frame_display)
+        elif processed_frame is not None:
+            self.processed_surface.show(processed_frame, size)
         else:
-            self.processed_video_label.configure(image="", text="无检测结果")
-            self.processed_video_label.image = None
+            self.processed_surface.clear("无检测结果")
+    
+    def reset_tracking(self):
+        """清空跟踪状态（切换视频、跳转、切换模型或推理模式后，原有跟踪失效）"""
+        self.pose_tracker.reset()
+        if self._crop_detector is not None:
+            self._crop_detector.reset()
+    
+    def toggle_crop_tracking(self):
+        """切换跟踪区域裁剪推理，两种模式的结果不同，需清空按帧缓存"""
+        self.pose_cache.clear()
+        self.reset_tracking()
+        mode = "跟踪区域裁剪推理" if self.crop_tracking_var.get() else "整帧推理"
+        self.log_message(f"姿势推理模式: {mode}")
+    
+    def toggle_original_pane(self):
+        """显示/隐藏原图窗口，隐藏时不再缩放和绘制原图"""
+        if self.show_original_var.get():
+            self.original_pane.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, before=self.processed_pane)
+        else:
+            self.original_pane.pack_forget()
+            self.original_surface.clear("请加载图片或视频")
 
     def play_video(self):
         """播放视频，支持暂停/进度条/检测显示"""
@@ -364,6 +544,8 @@ class FallDetectionGUI:
         self.pause_button.config(text="暂停")
         self.frame_index = 0
         self.total_frames = int(self.video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.video_size = (int(self.video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(self.video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
         self.progress_bar.config(to=max(1, self.total_frames-1))
         self.frame_info_label.config(text=f"0/{self.total_frames}")
         self.source_type.set("视频")
@@ -374,11 +556,21 @@ class FallDetectionGUI:
             last_detection_time = 0
             
             while self.is_video_playing:
-                if self.is_paused:
+                # 拖动进度条后在播放线程中定位，界面线程不会被解码阻塞；暂停时也刷新一帧
+                with self._seek_lock:
+                    seek, self.pending_seek = self.pending_seek, None
+                if seek is not None:
+                    with profiler.stage(STAGE_DECODE):
+                        self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, seek)
+                    last_detection_time = 0
+                    # 跳转后原有跟踪框失效，下一帧重新整帧检测
+                    self.reset_tracking()
+                elif self.is_paused:
                     time.sleep(0.01)
                     continue
                 
-                ret, frame = self.video_capture.read()
+                with profiler.stage(STAGE_DECODE):
+                    ret, frame = self.video_capture.read()
                 if not ret:
                     self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
                     self.frame_index = 0
@@ -398,7 +590,10 @@ class FallDetectionGUI:
                 if current_time - last_detection_time > self.detection_interval:
                     # 完整检测
                     t0 = time.time()
-                    processed, status, poses = self.detect_and_draw(frame, return_poses=True)
+                    # 只有视频文件的帧号稳定，摄像头不按帧缓存
+                    cache_index = self.frame_index if self.thumbnail_index is not None else None
+                    processed, status, poses = self.detect_and_draw(frame, return_poses=True,
+                                                                    frame_index=cache_index)
                     t1 = time.time()
                     last_detection_time = current_time
                     
@@ -427,42 +622,70 @@ class FallDetectionGUI:
         
         threading.Thread(target=video_loop, daemon=True).start()
 
-    def detect_and_draw(self, frame, return_poses=False):
-        """检测并返回检测后图像和状态"""
-        # 降低检测分辨率以提高速度
-        height, width = frame.shape[:2]
-        if width > 640:  # 限制检测分辨率
-            scale = 640.0 / width
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            detect_frame = cv2.resize(frame, (new_width, new_height))
-        else:
-            detect_frame = frame.copy()
-        
-        poses = self.pose_detector.detect_pose(detect_frame)
+    def detect_and_draw(self, frame, return_poses=False, frame_index=None):
+        """检测并返回检测后图像和状态（给定frame_index时使用按帧缓存的姿势结果）"""
+        # 姿势模型仍在后台加载时直接显示原图；加载失败时结束视频循环并提示错误
+        if not self.detectors.is_ready('pose'):
+            status = "模型加载中"
+            if self.detectors.state('pose') == STATE_FAILED:
+                status = "模型加载失败"
+                self.is_video_playing = False
+                self.root.after(0, self.on_pose_detector_failed)
+            if return_poses:
+                return frame, status, None
+            return frame, status
+        
+        poses = self.pose_cache.get(frame_index) if frame_index is not None else None
+        from_cache = poses is not None
+        if not from_cache and self.crop_tracking_var.get():
+            # 裁剪推理直接使用原始分辨率，远处人物的关键点更准确
+            poses = self.crop_detector.detect(frame)
+        elif not from_cache:
+            # 降低检测分辨率以提高速度
+            height, width = frame.shape[:2]
+            if width > 640:  # 限制检测分辨率
+                scale = 640.0 / width
+                new_width = int(width * scale)
+                new_height = int(height * scale)
+                with profiler.stage(STAGE_RESIZE):
+                    detect_frame = cv2.resize(frame, (new_width, new_height))
+                # 坐标换算回原始帧，绘制和显示缩放都以原始帧为准
+                poses = resize_pose(self.pose_detector.detect_pose(detect_frame), 1.0 / scale, 1.0 / scale)
+            else:
+                poses = self.pose_detector.detect_pose(frame)
+            # 整帧检测的 person_id 只是帧内顺序，换成跟踪ID
+            poses = self.pose_tracker.update(poses)
+        if frame_index is not None and not from_cache:
+            self.pose_cache.put(frame_index, poses)
         
         # 缓存检测结果
         self.last_poses = poses
         
         if not poses:
-            return frame, "未识别到骨骼点"
+            # 画面中没有人时也要让事件引擎移除消失的目标，否则离开画面或被遮挡的人的摔倒事件不会结束
+            status = self.process_detection_results({}, frame)
+            if status == "正常":
+                status = "未识别到骨骼点"
+            if return_poses:
+                return frame, status, poses
+            return frame, status
         
         # 选择算法
         algo = self.algorithm_var.get()
         self.current_algorithm.set({"threshold":"阈值法","ml":"机器学习","dl":"深度学习","all":"全部"}.get(algo, algo))
         
-        status = "正常"
-        
-        # 快速检测逻辑
-        if algo in ["threshold", "all"]:
-            for pose in poses:
-                is_fall, confidence, _ = self.threshold_detector.detect_fall(pose)
-                if is_fall:
-                    status = "摔倒"
-                    break  # 找到摔倒就停止
+        # 快速检测逻辑：逐人计算阈值法结果，交给事件引擎判定状态
+        with profiler.stage(STAGE_FALL_LOGIC):
+            track_results = {}
+            if algo in ["threshold", "all"]:
+                for pose in poses:
+                    is_fall, confidence, _ = self.threshold_detector.detect_fall(pose)
+                    track_results.setdefault(pose.get('person_id', 0), {})['threshold'] = (is_fall, confidence)
+            status = self.process_detection_results(track_results, frame)
         
         # 绘制骨架（使用原始分辨率）
-        processed = self.pose_detector.draw_pose(frame, poses, draw_keypoints=True, draw_skeleton=True, draw_bbox=True)
+        with profiler.stage(STAGE_DRAW):
+            processed = self.pose_detector.draw_pose(frame, poses, draw_keypoints=True, draw_skeleton=True, draw_bbox=True)
         
         if return_poses:
             return processed, status, poses
@@ -493,10 +716,42 @@ class FallDetectionGUI:
         self.pause_button.config(text="继续" if self.is_paused else "暂停")
 
     def on_progress_change(self, val):
+        """拖动进度条：立即显示最近的缩略图，由播放线程异步定位到精确帧"""
         if self.video_capture is not None and self.total_frames>0:
             idx = int(float(val))
-            self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            with self._seek_lock:
+                self.pending_seek = idx
             self.frame_index = idx
+            self.frame_info_label.config(text=f"{idx}/{self.total_frames}")
+            self.show_seek_preview(idx)
+    
+    def show_seek_preview(self, frame_index):
+        """用缓存的缩略图预览目标位置"""
+        if self.thumbnail_index is None or self.video_size is None:
+            return
+        nearest = self.thumbnail_index.nearest(frame_index)
+        if nearest is None:
+            return
+        _, thumb = nearest
+        width, height = self.video_size
+        scale = min(self.max_display_width / width, self.max_display_height / height, 1.0)
+        size = (int(width * scale), int(height * scale))
+        if self.show_original_var.get():
+            self.original_surface.show(thumb, size)
+        self.processed_surface.show(thumb, size)
+    
+    def reset_video_index(self, video_path=None):
+        """切换输入源时重建缩略图索引并清空按帧缓存的姿势结果"""
+        if self.thumbnail_index is not None:
+            self.thumbnail_index.stop()
+            self.thumbnail_index = None
+        self.pose_cache.clear()
+        self.reset_tracking()
+        with self._seek_lock:
+            self.pending_seek = None
+        if video_path:
+            self.thumbnail_index = VideoThumbnailIndex(video_path)
+            self.thumbnail_index.start()
 
     def load_image(self):
         file_path = filedialog.askopenfilename(
@@ -526,6 +781,7 @@ class FallDetectionGUI:
                 self.video_capture.release()
             self.video_capture = cv2.VideoCapture(file_path)
             self.source_type.set("视频")
+            self.reset_video_index(file_path)
             self.play_video()
             self.log_message(f"已加载视频: {file_path}", "SUCCESS")
 
@@ -537,6 +793,7 @@ class FallDetectionGUI:
             self.log_message("无法打开摄像头，请检查设备连接", "ERROR")
             return
         self.source_type.set("摄像头")
+        self.reset_video_index()
         self.play_video()
         self.log_message("摄像头已启动", "SUCCESS")
         
@@ -546,12 +803,11 @@ class FallDetectionGUI:
         if self.video_capture is not None:
             self.video_capture.release()
             self.video_capture = None
+        self.reset_video_index()
         
         # 清空视频窗口显示
-        self.original_video_label.configure(image="", text="请加载图片或视频")
-        self.original_video_label.image = None
-        self.processed_video_label.configure(image="", text="请加载图片或视频")
-        self.processed_video_label.image = None
+        self.original_surface.clear("请加载图片或视频")
+        self.processed_surface.clear("请加载图片或视频")
         
         # 重置状态信息
         self.source_type.set("未加载")
@@ -565,6 +821,10 @@ class FallDetectionGUI:
         self.current_processed_frame = None
         self.last_poses = None
         
+        # 关闭进行中的摔倒事件
+        for event in self.event_engine.flush(frame_index=self.frame_index):
+            self.handle_fall_event(event, None)
+        
         self.log_message("已停止检测", "INFO")
         
     def start_detection(self):
@@ -572,17 +832,21 @@ class FallDetectionGUI:
         if self.current_frame is None:
             messagebox.showwarning("警告", "请先加载图片或视频")
             return
+        if self.detectors.state('pose') == STATE_FAILED:
+            self.on_pose_detector_failed()
+            return
         
         self.log_message("开始检测...")
         
         # 在新线程中运行检测
         def detection_thread():
             try:
-                # 姿势检测
-                poses = self.pose_detector.detect_pose(self.current_frame)
+                # 姿势检测（与视频检测共用跟踪器，事件引擎按跟踪ID判定）
+                poses = self.pose_tracker.update(self.pose_detector.detect_pose(self.current_frame))
                 
                 if not poses:
                     self.log_message("未检测到人体姿势")
+                    self.process_detection_results({}, self.current_frame)
                     return
                 
                 # 更新姿势序列（用于深度学习）
@@ -590,42 +854,48 @@ class FallDetectionGUI:
                 if len(self.pose_sequence) > 10:  # 保持最近10帧
                     self.pose_sequence.pop(0)
                 
-                # 根据选择的算法进行检测
-                algorithm = self.algorithm_var.get()
-                
-                if algorithm in ["threshold", "all"]:
-                    # 阈值法检测
-                    for pose in poses:
-                        is_fall, confidence, features = self.threshold_detector.detect_fall(pose)
-                        self.current_detection_results['threshold'] = {
-                            'is_fall': is_fall,
-                            'confidence': confidence
-                        }
-                
-                if algorithm in ["ml", "all"]:
-                    # 机器学习检测
-                    if self.ml_detector.is_trained:
-                        predictions, probabilities = self.ml_detector.predict(poses)
-                        if predictions:
-                            self.current_detection_results['ml'] = {
-                                'is_fall': predictions[0],
-                                'confidence': probabilities[0]
+                with profiler.stage(STAGE_FALL_LOGIC):
+                    # 根据选择的算法进行检测
+                    algorithm = self.algorithm_var.get()
+                    track_results = {}
+                    
+                    if algorithm in ["threshold", "all"]:
+                        # 阈值法检测
+                        for pose in poses:
+                            is_fall, confidence, features = self.threshold_detector.detect_fall(pose)
+                            self.current_detection_results['threshold'] = {
+                                'is_fall': is_fall,
+                                'confidence': confidence
                             }
-                
-                if algorithm in ["dl", "all"]:
-                    # 深度学习检测
-                    if self.dl_detector.is_trained and len(self.pose_sequence) >= 10:
-                        is_fall, confidence = self.dl_detector.predict(self.pose_sequence)
-                        self.current_detection_results['dl'] = {
-                            'is_fall': is_fall,
-                            'confidence': confidence
-                        }
-                
-                # 更新显示
-                # self.update_result_display() # 删除此行
-                
-                # 检查是否需要发送预警
-                self.check_and_send_alert()
+                            track_results.setdefault(pose.get('person_id', 0), {})['threshold'] = (is_fall, confidence)
+                    
+                    if algorithm in ["ml", "all"]:
+                        # 机器学习检测
+                        if self.ml_detector.is_trained:
+                            predictions, probabilities = self.ml_detector.predict(poses)
+                            if predictions:
+                                self.current_detection_results['ml'] = {
+                                    'is_fall': predictions[0],
+                                    'confidence': probabilities[0]
+                                }
+                            for pose, prediction, probability in zip(poses, predictions, probabilities):
+                                track_results.setdefault(pose.get('person_id', 0), {})['ml'] = (bool(prediction), probability)
+                    
+                    if algorithm in ["dl", "all"]:
+                        # 深度学习检测（序列模型只跟踪第一个人）
+                        if self.dl_detector.is_trained and len(self.pose_sequence) >= 10:
+                            is_fall, confidence = self.dl_detector.predict(self.pose_sequence)
+                            self.current_detection_results['dl'] = {
+                                'is_fall': is_fall,
+                                'confidence': confidence
+                            }
+                            track_results.setdefault(poses[0].get('person_id', 0), {})['dl'] = (is_fall, confidence)
+                    
+                    # 更新显示
+                    # self.update_result_display() # 删除此行
+                    
+                    # 事件引擎判定，开启新事件时发送预警
+                    self.process_detection_results(track_results, self.current_frame)
                 
                 self.log_message("检测完成")
                 
@@ -684,24 +954,49 @@ class FallDetectionGUI:
     #         text=f"置信度: {dl_result['confidence']:.2f}" # 删除此行
     #     ) # 删除此行
         
-    def check_and_send_alert(self):
-        """检查并发送预警"""
-        # 检查是否有任何算法检测到摔倒
-        any_fall_detected = any(
-            result['is_fall'] for result in self.current_detection_results.values()
-        )
+    def process_detection_results(self, track_results, frame) -> str:
+        """
+        把当前帧各目标的检测结果送入事件引擎，处理产生的事件
         
-        if any_fall_detected:
-            # 计算平均置信度
-            confidences = [
-                result['confidence'] for result in self.current_detection_results.values()
-                if result['is_fall']
-            ]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        Args:
+            track_results: {目标ID: {算法名: (is_fall, confidence)}}
+            frame: 当前帧（用于预警图像）
             
-            # 发送预警
-            self.alert_manager.send_fall_alert(avg_confidence, self.current_frame)
-            self.log_message(f"检测到摔倒！已发送预警，置信度: {avg_confidence:.2f}")
+        Returns:
+            当前帧的显示状态
+        """
+        now = time.time()
+        events = []
+        for track_id, results in track_results.items():
+            events.extend(self.event_engine.update(track_id, results, self.frame_index, now))
+        events.extend(self.event_engine.expire_tracks(now, self.frame_index))
+        
+        for event in events:
+            self.handle_fall_event(event, frame)
+        
+        active = self.event_engine.active_events()
+        if not active:
+            return "正常"
+        return STATE_LYING if any(e['state'] == STATE_LYING for e in active) else "摔倒"
+    
+    def handle_fall_event(self, event, frame):
+        """摔倒事件的下游处理（每个事件的开始和结束各调用一次）"""
+        if event['type'] == EVENT_START:
+            self.check_and_send_alert(event, frame)
+        else:
+            self.log_message(
+                f"摔倒事件 #{event['event_id']} 结束（目标 {event['track_id']}），"
+                f"持续 {event['duration']:.1f} 秒，峰值置信度: {event['peak_confidence']:.2f}", "INFO")
+    
+    def check_and_send_alert(self, event, frame=None):
+        """为新开启的摔倒事件发送预警"""
+        confidence = event['peak_confidence']
+        image = frame if frame is not None else self.current_frame
+        
+        # 发送预警
+        self.alert_manager.send_fall_alert(confidence, image)
+        self.log_message(f"检测到摔倒！事件 #{event['event_id']}（目标 {event['track_id']}），"
+                         f"已发送预警，置信度: {confidence:.2f}", "WARNING")
             
     def configure_alerts(self):
         """配置预警"""
@@ -804,15 +1099,19 @@ class FallDetectionGUI:
     def load_models(self):
         """加载模型"""
         try:
-            # 加载机器学习模型
-            if os.path.exists("ml_model.pkl"):
+            # 加载机器学习模型（优先使用无需sklearn的编译模型）
+            if os.path.exists("ml_model.npz"):
+                self.ml_detector.load_model("ml_model.npz")
+                self.log_message("机器学习编译模型加载成功")
+            elif os.path.exists("ml_model.pkl"):
                 self.ml_detector.load_model("ml_model.pkl")
                 self.log_message("机器学习模型加载成功")
             
-            # 加载深度学习模型
+            # 加载深度学习模型（存在INT8导出文件时优先使用）
             if os.path.exists("dl_model.pth"):
                 self.dl_detector.load_model("dl_model.pth")
-                self.log_message("深度学习模型加载成功")
+                kind = "INT8量化" if self.dl_detector.quantized else "深度学习"
+                self.log_message(f"{kind}模型加载成功")
                 
         except Exception as e:
             messagebox.showerror("错误", f"加载模型失败: {e}")
@@ -820,13 +1119,16 @@ class FallDetectionGUI:
     def save_models(self):
         """保存模型"""
         try:
-            if self.ml_detector.is_trained:
+            if self.ml_detector.is_trained and self.ml_detector.model is not None:
                 self.ml_detector.save_model("ml_model.pkl")
+                self.ml_detector.export_compiled("ml_model.npz")
                 self.log_message("机器学习模型保存成功")
             
-            if self.dl_detector.is_trained:
+            if self.dl_detector.is_trained and not self.dl_detector.quantized:
+                from deep_learning_detector import quantized_path
                 self.dl_detector.save_model("dl_model.pth")
-                self.log_message("深度学习模型保存成功")
+                self.dl_detector.export_quantized(quantized_path("dl_model.pth"))
+                self.log_message("深度学习模型保存成功（含INT8量化导出）")
                 
         except Exception as e:
             messagebox.showerror("错误", f"保存模型失败: {e}")
@@ -838,6 +1140,8 @@ class FallDetectionGUI:
                 'algorithm': self.algorithm_var.get(),
                 'detection_interval': self.detection_interval,
                 'display_quality': self.display_quality_var.get() if hasattr(self, 'display_quality_var') else '中等',
+                'show_original': self.show_original_var.get(),
+                'log_max_lines': self.log_max_lines,
                 'alert_settings': {
                     'email_enabled': True,
                     'sms_enabled': False
@@ -883,7 +1187,8 @@ class FallDetectionGUI:
         # YOLO骨骼检测模型权重选择
         ttk.Label(detect_settings, text="YOLO骨骼模型权重:").grid(row=1, column=0, sticky=tk.W)
         yolo_weights = ["yolov8n-pose.pt", "yolo11x-pose.pt"]
-        yolo_weight_var = tk.StringVar(value=self.pose_detector.model_path if hasattr(self.pose_detector, 'model_path') else yolo_weights[0])
+        pose_detector = self.detectors.peek('pose')
+        yolo_weight_var = tk.StringVar(value=pose_detector.model_path if pose_detector is not None else yolo_weights[0])
         yolo_combo = ttk.Combobox(detect_settings, textvariable=yolo_weight_var, values=yolo_weights, state="readonly")
         yolo_combo.grid(row=1, column=1, sticky=tk.EW, padx=5)
         ttk.Label(detect_settings, textvariable=yolo_weight_var, width=16).grid(row=1, column=2, sticky=tk.W)
@@ -950,6 +1255,12 @@ class FallDetectionGUI:
                                      state="readonly")
         log_level_combo.pack(fill=tk.X, pady=5)
         
+        # 日志面板行数上限
+        ttk.Label(log_settings, text="日志面板最大行数:").pack(anchor=tk.W)
+        log_lines_var = tk.IntVar(value=self.log_max_lines)
+        ttk.Spinbox(log_settings, textvariable=log_lines_var, from_=200, to=100000,
+                    increment=500).pack(fill=tk.X, pady=5)
+        
         # 自动保存日志
         auto_save_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(log_settings, text="自动保存日志", variable=auto_save_var).pack(anchor=tk.W, pady=5)
@@ -983,9 +1294,13 @@ class FallDetectionGUI:
                 # 更新显示设置
                 self.max_display_width = max_width_var.get()
                 self.max_display_height = max_height_var.get()
+                self.log_max_lines = max(1, int(log_lines_var.get()))
                 # 切换YOLO权重
-                if hasattr(self.pose_detector, 'model_path') and self.pose_detector.model_path != yolo_weight_var.get():
-                    self.pose_detector.load_model(yolo_weight_var.get())
+                pose_detector = self.detectors.peek('pose')
+                if pose_detector is not None and pose_detector.model_path != yolo_weight_var.get():
+                    pose_detector.load_model(yolo_weight_var.get())
+                    self.pose_cache.clear()
+                    self.reset_tracking()
                     self.log_message(f"已切换YOLO骨骼模型权重: {yolo_weight_var.get()}", "SUCCESS")
                 self.log_message("设置已应用", "SUCCESS")
                 settings_window.destroy()
@@ -1001,12 +1316,52 @@ class FallDetectionGUI:
             max_width_var.set(640)
             max_height_var.set(480)
             quality_var.set("原始画质")
+            log_lines_var.set(2000)
             self.log_message("设置已重置", "INFO")
         
         ttk.Button(button_frame, text="✅ 应用", command=apply_settings).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="🔄 重置", command=reset_settings).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="❌ 取消", command=settings_window.destroy).pack(side=tk.RIGHT, padx=5)
         
+    def open_diagnostics(self):
+        """性能诊断面板：显示各阶段耗时统计"""
+        diag_window = tk.Toplevel(self.root)
+        diag_window.title("性能诊断")
+        diag_window.geometry("560x360")
+        diag_window.transient(self.root)
+        
+        toolbar = ttk.Frame(diag_window)
+        toolbar.pack(fill=tk.X, padx=10, pady=5)
+        
+        enabled_var = tk.BooleanVar(value=profiler.enabled)
+        ttk.Checkbutton(toolbar, text="启用分阶段计时", variable=enabled_var,
+                        command=lambda: profiler.enable(enabled_var.get())).pack(side=tk.LEFT)
+        
+        def export_json():
+            filename = filedialog.asksaveasfilename(
+                title="导出性能数据",
+                defaultextension=".json",
+                filetypes=[("JSON文件", "*.json")]
+            )
+            if filename:
+                profiler.dump_json(filename)
+                self.log_message(f"性能数据已导出到: {filename}", "SUCCESS")
+        
+        ttk.Button(toolbar, text="💾 导出JSON", command=export_json).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(toolbar, text="🔄 重置", command=profiler.reset).pack(side=tk.RIGHT, padx=2)
+        
+        stats_text = tk.Text(diag_window, font=('Consolas', 9), bg='#f8f8f8', fg='#333333')
+        stats_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        
+        def refresh():
+            if not diag_window.winfo_exists():
+                return
+            stats_text.delete(1.0, tk.END)
+            stats_text.insert(tk.END, profiler.format_table())
+            diag_window.after(1000, refresh)
+        
+        refresh()
+        
     def show_about(self):
         """显示关于信息"""
         about_text = """
@@ -1058,12 +1413,13 @@ class FallDetectionGUI:
     def on_closing(self):
         """程序关闭时的清理工作"""
         self.stop_detection()
+        self.log_sink.close()
         self.root.destroy()
 
-def main():
+def main(pose_server: str = None):
     """主函数"""
     root = tk.Tk()
-    app = FallDetectionGUI(root)
+    app = FallDetectionGUI(root, pose_server)
     
     # 设置关闭事件
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
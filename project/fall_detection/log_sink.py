@@ -0,0 +1,86 @@
+"""
+GUI日志缓冲模块
+任意线程写入的日志先进入线程安全队列，由Tk主循环定时批量取出显示；
+同时经后台线程写入按大小轮转的日志文件，界面只保留最近若干行
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+LOG_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'SUCCESS': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+}
+
+
+class GUILogSink:
+    """线程安全的日志缓冲：界面显示队列 + 轮转文件"""
+
+    def __init__(self, log_file: Optional[str] = "logs/fall_detection.log",
+                 max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5,
+                 max_pending: int = 10000):
+        """
+        Args:
+            log_file: 日志文件路径，为None时不写文件
+            max_bytes: 单个日志文件的大小上限，超过后轮转
+            backup_count: 保留的历史日志文件数
+            max_pending: 界面来不及显示时最多缓存的条数（文件中仍完整保留）
+        """
+        self.log_file = log_file
+        self._pending: deque = deque(maxlen=max_pending)
+        self.dropped = 0
+        self._listener = None
+        self._logger = None
+
+        if log_file:
+            try:
+                directory = os.path.dirname(os.path.abspath(log_file))
+                os.makedirs(directory, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+                # 写文件在监听线程中完成，调用方（包括Tk主线程）不会被磁盘IO阻塞
+                file_queue: queue.SimpleQueue = queue.SimpleQueue()
+                self._listener = logging.handlers.QueueListener(file_queue, handler)
+                self._logger = logging.getLogger(f"fall_detection.gui.{id(self)}")
+                self._logger.setLevel(logging.DEBUG)
+                self._logger.propagate = False
+                self._logger.addHandler(logging.handlers.QueueHandler(file_queue))
+                self._listener.start()
+            except OSError as e:
+                print(f"无法创建日志文件 {log_file}: {e}")
+                self._listener = None
+                self._logger = None
+
+    def put(self, message: str, level: str = "INFO"):
+        """写入一条日志（任意线程可调用）"""
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append((time.strftime("%H:%M:%S"), level, message))
+        if self._logger is not None:
+            self._logger.log(LOG_LEVELS.get(level, logging.INFO), message)
+
+    def drain(self, max_items: int = 500) -> List[Tuple[str, str, str]]:
+        """取出待显示的日志 (时间, 级别, 内容)，每次最多 max_items 条"""
+        entries = []
+        try:
+            while len(entries) < max_items:
+                entries.append(self._pending.popleft())
+        except IndexError:
+            pass
+        return entries
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
@@ -11,42 +11,67 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from gui_application import main as gui_main
 from pose_detection import PoseDetector
 from fall_detection_algorithms import ThresholdFallDetector
+from fall_event_engine import FallEventEngine, EVENT_START
 from alert_system import AlertManager
+from stage_profiler import profiler, STAGE_FALL_LOGIC
 
-def run_gui():
+def run_gui(pose_server: str = None):
     """运行GUI应用程序"""
     print("启动摔倒检测系统GUI...")
-    gui_main()
+    from gui_application import main as gui_main
+    gui_main(pose_server)
 
-def run_command_line_detection(video_path: str, output_path: str = None):
-    """运行命令行检测"""
+def run_command_line_detection(video_path: str, output_path: str = None, profile_path: str = None,
+                               use_cache: bool = True, pose_server: str = None):
+    """运行命令行检测（指定profile_path时记录各阶段耗时并保存为JSON）"""
     print(f"开始处理视频: {video_path}")
+    profiler.enable(profile_path is not None)
     
-    # 初始化检测器
-    pose_detector = PoseDetector()
+    # 初始化检测器（姿势缓存命中时无需加载YOLO权重；指定服务地址时使用共享模型）
+    if pose_server:
+        from pose_server import connect_pose_detector
+        pose_detector = connect_pose_detector(pose_server)
+    else:
+        pose_detector = PoseDetector(lazy=True)
     fall_detector = ThresholdFallDetector()
+    event_engine = FallEventEngine()
     
     try:
         # 处理视频
-        poses_sequence = pose_detector.process_video(video_path)
+        poses_sequence = pose_detector.process_video(video_path, use_cache=use_cache)
         
         print(f"视频处理完成，共 {len(poses_sequence)} 帧")
         
+        # 事件引擎使用视频时间轴
+        import cv2
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        cap.release()
+        
         # 检测摔倒
         fall_detections = []
+        fall_events = []
         for i, poses in enumerate(poses_sequence):
-            if poses:
-                for pose in poses:
-                    is_fall, confidence, features = fall_detector.detect_fall(pose)
-                    if is_fall:
-                        fall_detections.append({
-                            'frame': i,
-                            'confidence': confidence,
-                            'features': features
-                        })
+            timestamp = i / fps
+            with profiler.stage(STAGE_FALL_LOGIC):
+                if poses:
+                    for pose in poses:
+                        is_fall, confidence, features = fall_detector.detect_fall(pose)
+                        if is_fall:
+                            fall_detections.append({
+                                'frame': i,
+                                'confidence': confidence,
+                                'features': features
+                            })
+                        fall_events.extend(event_engine.update(
+                            pose.get('person_id', 0), {'threshold': (is_fall, confidence)}, i, timestamp))
+                fall_events.extend(event_engine.expire_tracks(timestamp, i))
+        fall_events.extend(event_engine.flush(len(poses_sequence) / fps, len(poses_sequence)))
+        
+        # 合并为完整事件（开始+结束）
+        completed_events = [e for e in fall_events if e['type'] != EVENT_START]
         
         # 输出结果
         if fall_detections:
@@ -56,6 +81,12 @@ def run_command_line_detection(video_path: str, output_path: str = None):
         else:
             print("未检测到摔倒事件")
         
+        if completed_events:
+            print(f"去抖后共 {len(completed_events)} 个摔倒事件:")
+            for event in completed_events:
+                print(f"  事件 #{event['event_id']}: 帧 {event['start_frame']}-{event['end_frame']}, "
+                      f"持续 {event['duration']:.1f} 秒, 峰值置信度 {event['peak_confidence']:.2f}")
+        
         # 保存结果
         if output_path:
             import json
@@ -63,6 +94,7 @@ def run_command_line_detection(video_path: str, output_path: str = None):
                 'video_path': video_path,
                 'total_frames': len(poses_sequence),
                 'fall_detections': fall_detections,
+                'fall_events': completed_events,
                 'processing_time': 'completed'
             }
             
@@ -71,10 +103,16 @@ def run_command_line_detection(video_path: str, output_path: str = None):
             
             print(f"结果已保存到: {output_path}")
         
+        if profile_path:
+            print(profiler.format_table())
+            profiler.dump_json(profile_path)
+            print(f"性能数据已保存到: {profile_path}")
+        
     except Exception as e:
         print(f"处理失败: {e}")
 
-def run_training(data_path: str, output_path: str = "trained_models"):
+def run_training(data_path: str, output_path: str = "trained_models", sweep: bool = False,
+                 augment_copies: int = 0):
     """运行模型训练"""
     print(f"开始训练模型，数据路径: {data_path}")
     
@@ -85,47 +123,93 @@ def run_training(data_path: str, output_path: str = "trained_models"):
         
         # 准备数据
         print("准备训练数据...")
-        X, y = trainer.prepare_training_data(data_path)
+        X, y, groups = trainer.prepare_training_data(data_path)
         print(f"数据准备完成，特征维度: {X.shape}, 标签数量: {len(y)}")
         
-        # 训练传统机器学习模型
-        print("训练传统机器学习模型...")
-        ml_results = trainer.train_traditional_ml_models(X, y, output_path)
+        # 训练传统机器学习模型（按数据文件划分，增强副本只加入训练部分）
+        if sweep:
+            print("并行超参数搜索传统机器学习模型...")
+            ml_results = trainer.sweep_traditional_ml_models(X, y, output_path, groups=groups,
+                                                             augment_copies=augment_copies)
+        else:
+            print("训练传统机器学习模型...")
+            ml_results = trainer.train_traditional_ml_models(X, y, output_path, groups=groups,
+                                                             augment_copies=augment_copies)
         
         # 训练深度学习模型
         print("训练深度学习模型...")
-        dl_model_path = trainer.train_deep_learning_model(data_path, output_path)
+        dl_model_path = trainer.train_deep_learning_model(data_path, output_path, augment=augment_copies > 0)
         
         print("模型训练完成!")
         
     except Exception as e:
         print(f"训练失败: {e}")
 
+def run_evaluation(data_path: str, output_path: str = "evaluation_results",
+                   model_dir: str = "trained_models", workers: int = None):
+    """在处理后的数据集上比较各检测器的准确率和速度"""
+    print(f"开始评估检测器，数据路径: {data_path}")
+    
+    try:
+        from evaluation import DetectorEvaluator
+        
+        ml_model = os.path.join(model_dir, 'svm_model.npz')
+        if not os.path.exists(ml_model):
+            ml_model = os.path.join(model_dir, 'svm_model.pkl')
+        model_paths = {
+            'ml': ml_model,
+            'dl': os.path.join(model_dir, 'lstm_model.pth'),
+        }
+        
+        evaluator = DetectorEvaluator(data_path, model_paths, workers=workers)
+        evaluator.run(output_dir=output_path)
+        
+    except Exception as e:
+        print(f"评估失败: {e}")
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="摔倒检测系统")
-    parser.add_argument('--mode', choices=['gui', 'detect', 'train'], 
+    parser.add_argument('--mode', choices=['gui', 'detect', 'train', 'evaluate'], 
                        default='gui', help='运行模式')
     parser.add_argument('--video', type=str, help='视频文件路径')
     parser.add_argument('--output', type=str, help='输出文件路径')
     parser.add_argument('--data', type=str, help='训练数据路径')
     parser.add_argument('--model-output', type=str, default='trained_models',
                        help='模型输出路径')
+    parser.add_argument('--sweep', action='store_true',
+                       help='训练模式下并行搜索所有模型的超参数')
+    parser.add_argument('--augment', type=int, default=0,
+                       help='训练模式下每个数据文件生成的增强副本数，同时开启LSTM在线增强')
+    parser.add_argument('--workers', type=int, help='评估模式的工作进程数')
+    parser.add_argument('--profile', type=str,
+                       help='检测模式下记录各阶段耗时并保存为JSON的路径')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='不使用姿势结果磁盘缓存，强制重新推理')
+    parser.add_argument('--pose-server', type=str,
+                       help='共享姿势模型服务地址 host:port（先运行 python pose_server.py）')
     
     args = parser.parse_args()
     
     if args.mode == 'gui':
-        run_gui()
+        run_gui(args.pose_server)
     elif args.mode == 'detect':
         if not args.video:
             print("错误: 检测模式需要指定视频文件路径 (--video)")
             return
-        run_command_line_detection(args.video, args.output)
+        run_command_line_detection(args.video, args.output, args.profile, not args.no_cache,
+                                   args.pose_server)
     elif args.mode == 'train':
         if not args.data:
             print("错误: 训练模式需要指定数据路径 (--data)")
             return
-        run_training(args.data, args.model_output)
+        run_training(args.data, args.model_output, args.sweep, args.augment)
+    elif args.mode == 'evaluate':
+        if not args.data:
+            print("错误: 评估模式需要指定数据路径 (--data)")
+            return
+        run_evaluation(args.data, args.output or 'evaluation_results',
+                       args.model_output, args.workers)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
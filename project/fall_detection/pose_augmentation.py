@@ -0,0 +1,141 @@
+"""
+姿势数据增强模块
+对 (B, T, 17, 3) 的关键点数组整批做随机增强：水平翻转（左右关节互换）、缩放/平移抖动、
+旋转、关键点丢弃和时间速度扭曲。全部为NumPy向量化运算，不逐帧逐人循环
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from pose_detection import KEYPOINT_NAMES
+
+
+def _flip_index() -> np.ndarray:
+    """水平翻转后各关键点对应的原索引（left_* 与 right_* 互换）"""
+    index = {name: i for i, name in enumerate(KEYPOINT_NAMES)}
+    order = []
+    for name in KEYPOINT_NAMES:
+        if name.startswith('left_'):
+            name = 'right_' + name[len('left_'):]
+        elif name.startswith('right_'):
+            name = 'left_' + name[len('right_'):]
+        order.append(index[name])
+    return np.array(order, dtype=np.int64)
+
+
+FLIP_INDEX = _flip_index()
+
+
+class PoseAugmenter:
+    """关键点序列随机增强器（置信度为0的关键点视为缺失，增强前后都保持为0）"""
+
+    def __init__(self, flip_prob: float = 0.5, scale_range: Tuple[float, float] = (0.9, 1.1),
+                 translate: float = 0.1, rotation_deg: float = 15.0, dropout_prob: float = 0.05,
+                 speed_range: Tuple[float, float] = (0.8, 1.25), seed: Optional[int] = None):
+        """
+        Args:
+            flip_prob: 每个样本水平翻转的概率
+            scale_range: 缩放系数范围（以人体中心为原点）
+            translate: 平移幅度，占人体外接框尺寸的比例
+            rotation_deg: 最大旋转角度（度）
+            dropout_prob: 每个关键点被丢弃（置为缺失）的概率
+            speed_range: 时间速度系数范围，>1 表示动作变快
+            seed: 随机种子
+        """
+        self.flip_prob = flip_prob
+        self.scale_range = scale_range
+        self.translate = translate
+        self.rotation_deg = rotation_deg
+        self.dropout_prob = dropout_prob
+        self.speed_range = speed_range
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, keypoints: np.ndarray) -> np.ndarray:
+        return self.augment(keypoints)
+
+    def augment(self, keypoints: np.ndarray) -> np.ndarray:
+        """
+        增强一批关键点序列
+
+        Args:
+            keypoints: (T, 17, 3) 或 (B, T, 17, 3) 的 (x, y, confidence) 数组
+
+        Returns:
+            形状相同的新数组（float32），输入不会被修改
+        """
+        single = keypoints.ndim == 3
+        batch = np.array(keypoints[None] if single else keypoints, dtype=np.float32)
+        if batch.size == 0:
+            return batch[0] if single else batch
+
+        batch = self._time_warp(batch)
+        visible = batch[..., 2] > 0
+        batch = self._spatial(batch, visible)
+        batch = self._dropout(batch)
+        return batch[0] if single else batch
+
+    def _time_warp(self, batch: np.ndarray) -> np.ndarray:
+        """按随机速度重采样时间轴，最后一帧对齐（检测器使用序列末尾的窗口）"""
+        low, high = self.speed_range
+        if low == high == 1.0:
+            return batch
+        n, length = batch.shape[:2]
+        speed = self.rng.uniform(low, high, size=(n, 1))
+        t = np.arange(length, dtype=np.float32)[None, :]
+        source = np.clip((length - 1) - (length - 1 - t) * speed, 0, length - 1)
+
+        lo = np.floor(source).astype(np.int64)
+        hi = np.minimum(lo + 1, length - 1)
+        w = (source - lo).astype(np.float32)[..., None, None]
+        rows = np.arange(n)[:, None]
+        a = batch[rows, lo]
+        b = batch[rows, hi]
+
+        # 两端都可见才插值，否则取最近的一帧，避免缺失点(0,0)被插值进坐标
+        both = (a[..., 2:] > 0) & (b[..., 2:] > 0)
+        nearest = np.where(w < 0.5, a, b)
+        return np.where(both, a + (b - a) * w, nearest)
+
+    def _spatial(self, batch: np.ndarray, visible: np.ndarray) -> np.ndarray:
+        """以每个样本的人体中心为原点做翻转、旋转、缩放和平移"""
+        n = batch.shape[0]
+        xy = batch[..., :2]
+        mask = visible[..., None]
+        count = np.maximum(mask.sum(axis=(1, 2)), 1)
+        center = (xy * mask).sum(axis=(1, 2)) / count                     # (B, 2)
+
+        big = np.float32(1e9)
+        lower = np.where(mask, xy, big).min(axis=(1, 2))
+        upper = np.where(mask, xy, -big).max(axis=(1, 2))
+        extent = np.clip(upper - lower, 0, None)                          # 无可见点时为0
+
+        flip = self.rng.random(n) < self.flip_prob
+        scale = self.rng.uniform(*self.scale_range, size=n)
+        angle = np.deg2rad(self.rng.uniform(-self.rotation_deg, self.rotation_deg, size=n))
+        shift = self.rng.uniform(-self.translate, self.translate, size=(n, 2)) * extent
+
+        # 组合变换矩阵 M = scale * R * F，F 为水平翻转
+        cos, sin = np.cos(angle) * scale, np.sin(angle) * scale
+        sign = np.where(flip, -1.0, 1.0)
+        matrix = np.empty((n, 2, 2), dtype=np.float32)
+        matrix[:, 0, 0] = cos * sign
+        matrix[:, 0, 1] = -sin
+        matrix[:, 1, 0] = sin * sign
+        matrix[:, 1, 1] = cos
+
+        centered = xy - center[:, None, None, :]
+        moved = np.einsum('bij,btkj->btki', matrix, centered) + (center + shift)[:, None, None, :]
+
+        out = batch.copy()
+        out[..., :2] = np.where(mask, moved, 0)
+        # 翻转后左右关节互换，保持"left_*"仍表示画面中人物的左侧
+        out[flip] = out[flip][:, :, FLIP_INDEX]
+        return out
+
+    def _dropout(self, batch: np.ndarray) -> np.ndarray:
+        if self.dropout_prob <= 0:
+            return batch
+        drop = self.rng.random(batch.shape[:3]) < self.dropout_prob
+        batch[drop] = 0
+        return batch
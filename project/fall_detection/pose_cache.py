@@ -0,0 +1,203 @@
+"""
+姿势结果磁盘缓存模块
+按 (视频内容哈希, 模型文件哈希, 置信度阈值, 检测分辨率) 缓存整段视频的逐帧姿势结果，
+关键点以紧凑的float32数组保存，缓存目录超过容量上限时按最近使用时间淘汰
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+CACHE_FORMAT_VERSION = 2  # 2: 保存跟踪ID
+
+# 哈希采样块大小：读取文件头、中、尾各一块，大视频也只需几MB的IO
+_SAMPLE_BYTES = 1 << 20
+
+_digest_memo: Dict[tuple, str] = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(filepath: str) -> str:
+    """
+    计算文件内容指纹（文件大小 + 头/中/尾采样块的SHA1）
+
+    文件不存在时（如按名称自动下载的模型）返回名称本身的哈希
+    """
+    if not os.path.exists(filepath):
+        return hashlib.sha1(os.path.basename(filepath).encode('utf-8')).hexdigest()
+
+    stat = os.stat(filepath)
+    memo_key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            return _digest_memo[memo_key]
+
+    sha1 = hashlib.sha1(str(stat.st_size).encode('utf-8'))
+    with open(filepath, 'rb') as f:
+        if stat.st_size <= 3 * _SAMPLE_BYTES:
+            sha1.update(f.read())
+        else:
+            for offset in (0, stat.st_size // 2, stat.st_size - _SAMPLE_BYTES):
+                f.seek(offset)
+                sha1.update(f.read(_SAMPLE_BYTES))
+    digest = sha1.hexdigest()
+
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+class PoseResultCache:
+    """逐帧姿势结果的磁盘缓存"""
+
+    def __init__(self, cache_dir: str = "pose_cache", max_size_mb: float = 2048):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存目录容量上限（MB）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, video_path: str, model_path: str, conf_threshold: float, imgsz: int) -> str:
+        """生成缓存键"""
+        parts = {
+            'version': CACHE_FORMAT_VERSION,
+            'video': file_digest(video_path),
+            'model': file_digest(model_path),
+            'conf': round(float(conf_threshold), 4),
+            'imgsz': int(imgsz),
+        }
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key: str, keypoint_names: List[str]) -> Optional[List[List[Dict[str, Any]]]]:
+        """读取缓存，未命中返回None"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                frame_poses = decode_frame_poses(data['offsets'], data['keypoints'], data['bboxes'],
+                                                 data['scores'], keypoint_names, data['person_ids'])
+        except Exception as e:
+            print(f"姿势缓存读取失败，将重新检测: {e}")
+            self.misses += 1
+            return None
+        # 更新访问时间，供淘汰策略使用
+        os.utime(path, None)
+        self.hits += 1
+        return frame_poses
+
+    def save(self, key: str, frame_poses: List[List[Dict[str, Any]]], keypoint_names: List[str]):
+        """写入缓存并按容量淘汰旧条目"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        arrays = encode_frame_poses(frame_poses, keypoint_names)
+        path = self._path(key)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+
+    def evict(self, keep: str = None):
+        """缓存目录超过上限时删除最久未使用的条目（keep 指定的条目不会被删除）"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.npz') and not entry.name.endswith('.tmp.npz'):
+                stat = entry.stat()
+                total += stat.st_size
+                if entry.path != keep:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.npz'):
+                os.remove(entry.path)
+
+
+def encode_frame_poses(frame_poses: List[List[Dict[str, Any]]], keypoint_names: List[str]) -> Dict[str, np.ndarray]:
+    """
+    把逐帧姿势列表编码为紧凑数组
+
+    Returns:
+        offsets: (帧数+1,) 第i帧的人物为 [offsets[i], offsets[i+1])
+        keypoints: (人数, 17, 3) x, y, confidence
+        bboxes: (人数, 4)，无边框时为NaN
+        scores: (人数,) 检测框置信度
+        person_ids: (人数,) 跟踪ID
+    """
+    counts = [len(poses) for poses in frame_poses]
+    offsets = np.zeros(len(frame_poses) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    total = int(offsets[-1])
+
+    keypoints = np.zeros((total, len(keypoint_names), 3), dtype=np.float32)
+    bboxes = np.full((total, 4), np.nan, dtype=np.float32)
+    scores = np.zeros(total, dtype=np.float32)
+    person_ids = np.zeros(total, dtype=np.int64)
+
+    row = 0
+    for poses in frame_poses:
+        for pose in poses:
+            kps = pose['keypoints']
+            for j, name in enumerate(keypoint_names):
+                kp = kps.get(name)
+                if kp is not None:
+                    keypoints[row, j] = (kp['x'], kp['y'], kp['confidence'])
+            if pose.get('bbox') is not None:
+                bboxes[row] = pose['bbox']
+            scores[row] = pose.get('confidence', 0.0)
+            person_ids[row] = pose.get('person_id', 0)
+            row += 1
+
+    return {'offsets': offsets, 'keypoints': keypoints, 'bboxes': bboxes, 'scores': scores,
+            'person_ids': person_ids}
+
+
+def decode_frame_poses(offsets: np.ndarray, keypoints: np.ndarray, bboxes: np.ndarray,
+                       scores: np.ndarray, keypoint_names: List[str],
+                       person_ids: Optional[np.ndarray] = None) -> List[List[Dict[str, Any]]]:
+    """encode_frame_poses 的逆操作，恢复与 PoseDetector.detect_pose 相同的结构（没有跟踪ID时按帧内顺序编号）"""
+    kps_list = keypoints.tolist()
+    bbox_list = bboxes.tolist()
+    has_bbox = ~np.isnan(bboxes).any(axis=1)
+    score_list = scores.tolist()
+    id_list = person_ids.tolist() if person_ids is not None else None
+
+    frame_poses = []
+    for i in range(len(offsets) - 1):
+        poses = []
+        for index, row in enumerate(range(int(offsets[i]), int(offsets[i + 1]))):
+            poses.append({
+                'person_id': id_list[row] if id_list is not None else index,
+                'keypoints': {
+                    name: {'x': kp[0], 'y': kp[1], 'confidence': kp[2]}
+                    for name, kp in zip(keypoint_names, kps_list[row])
+                },
+                'bbox': bbox_list[row] if has_bbox[row] else None,
+                'confidence': score_list[row],
+            })
+        frame_poses.append(poses)
+    return frame_poses
@@ -5,11 +5,54 @@
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import os
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 import json
 
+from stage_profiler import profiler, STAGE_DECODE, STAGE_INFERENCE, STAGE_POSTPROCESS
+from pose_cache import PoseResultCache
+
+# COCO关键点定义
+KEYPOINT_NAMES = [
+    'nose', 'left_eye', 'right_eye', 'left_ear', 'right_ear',
+    'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist', 'left_hip', 'right_hip',
+    'left_knee', 'right_knee', 'left_ankle', 'right_ankle'
+]
+
+
+def poses_to_array(poses_sequence: List[List[Dict[str, Any]]], person_index: int = 0) -> np.ndarray:
+    """
+    把逐帧姿势列表转换为 (T, 17, 3) 的 float32 数组 (x, y, confidence)
+    
+    Args:
+        poses_sequence: 逐帧姿势列表
+        person_index: 取每帧中的第几个人，该帧没有此人或缺失关键点时填0
+    """
+    array = np.zeros((len(poses_sequence), len(KEYPOINT_NAMES), 3), dtype=np.float32)
+    empty = {'x': 0.0, 'y': 0.0, 'confidence': 0.0}
+    for t, poses in enumerate(poses_sequence):
+        if len(poses) > person_index:
+            keypoints = poses[person_index]['keypoints']
+            array[t] = [(kp['x'], kp['y'], kp['confidence'])
+                        for kp in (keypoints.get(name, empty) for name in KEYPOINT_NAMES)]
+    return array
+
+
+def array_to_poses(array: np.ndarray) -> List[List[Dict[str, Any]]]:
+    """
+    poses_to_array 的逆操作：把 (T, 17, 3) 数组恢复为逐帧单人姿势列表
+
+    置信度为0的关键点视为缺失，不写入keypoints；没有可见关键点的帧为空列表
+    """
+    poses_sequence = []
+    for frame in np.asarray(array).tolist():
+        keypoints = {name: {'x': x, 'y': y, 'confidence': c}
+                     for name, (x, y, c) in zip(KEYPOINT_NAMES, frame) if c > 0}
+        poses_sequence.append([{'person_id': 0, 'keypoints': keypoints}] if keypoints else [])
+    return poses_sequence
+
+
 def resize_pose(poses, scale_x, scale_y):
     """
     对一组pose结果进行坐标缩放，返回新pose列表
@@ -32,7 +75,9 @@ def resize_pose(poses, scale_x, scale_y):
     return new_poses
 
 class PoseDetector:
-    def __init__(self, model_path: str = "yolov8n-pose.pt", conf_threshold: float = 0.7, device: str = 'cuda'):
+    def __init__(self, model_path: str = "yolov8n-pose.pt", conf_threshold: float = 0.7, device: str = 'cuda',
+                 lazy: bool = False, imgsz: int = 640, cache_dir: Optional[str] = "pose_cache",
+                 cache_max_mb: float = 2048):
         """
         初始化姿势检测器
         
@@ -40,23 +85,35 @@ class PoseDetector:
             model_path: YOLO模型路径
             conf_threshold: 置信度阈值
             device: 设备类型 ('cpu' 或 'cuda')
+            lazy: 为True时不在构造函数中加载权重，由调用方稍后调用load_model
+            imgsz: 检测输入分辨率
+            cache_dir: process_video 结果的磁盘缓存目录，None 表示不缓存
+            cache_max_mb: 磁盘缓存容量上限（MB）
         """
         self.model_path = model_path
         self.conf_threshold = conf_threshold
         self.device = device
+        self.imgsz = imgsz
         self.model = None
-        self.load_model()
+        self.cache = PoseResultCache(cache_dir, cache_max_mb) if cache_dir else None
+        if not lazy:
+            self.load_model()
         
         # COCO关键点定义
-        self.keypoint_names = [
-            'nose', 'left_eye', 'right_eye', 'left_ear', 'right_ear',
-            'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
-            'left_wrist', 'right_wrist', 'left_hip', 'right_hip',
-            'left_knee', 'right_knee', 'left_ankle', 'right_ankle'
-        ]
+        self.keypoint_names = list(KEYPOINT_NAMES)
         
-    def load_model(self):
+    @property
+    def is_ready(self) -> bool:
+        """模型权重是否已加载"""
+        return self.model is not None
+    
+    def load_model(self, model_path: str = None):
         """加载YOLO模型"""
+        # ultralytics导入较慢，只在真正加载权重时导入
+        from ultralytics import YOLO
+        
+        if model_path is not None:
+            self.model_path = model_path
         try:
             print(f"正在加载模型: {self.model_path}")
             self.model = YOLO(self.model_path)
@@ -65,7 +122,8 @@ class PoseDetector:
             print(f"模型加载失败: {e}")
             # 如果指定模型不存在，使用默认模型
             print("使用默认模型 yolo11x-pose.pt")
-            self.model = YOLO("yolo11x-pose.pt")
+            self.model_path = "yolo11x-pose.pt"
+            self.model = YOLO(self.model_path)
     
     def detect_pose(self, image) -> List[Dict[str, Any]]:
         """
@@ -81,35 +139,67 @@ class PoseDetector:
             raise ValueError("模型未加载")
         
         # 运行推理
-        results = self.model(image, conf=self.conf_threshold, device=self.device)
+        with profiler.stage(STAGE_INFERENCE):
+            results = self.model(image, conf=self.conf_threshold, device=self.device, imgsz=self.imgsz)
         
         poses = []
-        for result in results:
-            if result.keypoints is not None:
-                keypoints = result.keypoints.data.cpu().numpy()
-                confidences = result.keypoints.conf.cpu().numpy()
+        with profiler.stage(STAGE_POSTPROCESS):
+            for result in results:
+                poses.extend(self._result_to_poses(result))
+        
+        return poses
+    
+    def detect_pose_batch(self, images: List[np.ndarray], imgsz: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        批量检测多张图像（一次模型调用）
+        
+        Args:
+            images: 图像列表
+            imgsz: 本次推理的输入分辨率，默认使用 self.imgsz
+            
+        Returns:
+            与输入一一对应的姿势列表
+        """
+        if self.model is None:
+            raise ValueError("模型未加载")
+        if not images:
+            return []
+        
+        with profiler.stage(STAGE_INFERENCE):
+            results = self.model(images, conf=self.conf_threshold, device=self.device,
+                                 imgsz=imgsz or self.imgsz)
+        
+        with profiler.stage(STAGE_POSTPROCESS):
+            return [self._result_to_poses(result) for result in results]
+    
+    def _result_to_poses(self, result) -> List[Dict[str, Any]]:
+        """把单张图像的YOLO结果转换为姿势字典列表"""
+        poses = []
+        if result.keypoints is not None:
+            keypoints = result.keypoints.data.cpu().numpy()
+            confidences = result.keypoints.conf.cpu().numpy()
+            
+            for i, (kp, conf) in enumerate(zip(keypoints, confidences)):
+                pose_data = {
+                    'person_id': i,
+                    'keypoints': {},
+                    'bbox': result.boxes.xyxy[i].cpu().numpy().tolist() if result.boxes is not None else None,
+                    'confidence': float(result.boxes.conf[i].cpu().numpy()) if result.boxes is not None else 0.0
+                }
                 
-                for i, (kp, conf) in enumerate(zip(keypoints, confidences)):
-                    pose_data = {
-                        'person_id': i,
-                        'keypoints': {},
-                        'bbox': result.boxes.xyxy[i].cpu().numpy().tolist() if result.boxes is not None else None,
-                        'confidence': float(result.boxes.conf[i].cpu().numpy()) if result.boxes is not None else 0.0
+                # 提取关键点坐标和置信度
+                for j, (name, point, conf_val) in enumerate(zip(self.keypoint_names, kp, conf)):
+                    pose_data['keypoints'][name] = {
+                        'x': float(point[0]),
+                        'y': float(point[1]),
+                        'confidence': float(conf_val)
                     }
-                    
-                    # 提取关键点坐标和置信度
-                    for j, (name, point, conf_val) in enumerate(zip(self.keypoint_names, kp, conf)):
-                        pose_data['keypoints'][name] = {
-                            'x': float(point[0]),
-                            'y': float(point[1]),
-                            'confidence': float(conf_val)
-                        }
-                    
-                    poses.append(pose_data)
-        
+                
+                poses.append(pose_data)
         return poses
     
-    def process_video(self, video_path: str, output_path: str = None, save_frames: bool = False) -> List[List[Dict[str, Any]]]:
+    def process_video(self, video_path: str, output_path: str = None, save_frames: bool = False,
+                      use_cache: bool = True) -> List[List[Dict[str, Any]]]:
         """
         处理视频文件
         
@@ -117,24 +207,42 @@ class PoseDetector:
             video_path: 视频文件路径
             output_path: 输出视频路径 (可选)
             save_frames: 是否保存帧数据
+            use_cache: 是否使用磁盘缓存（同一视频、模型和参数只推理一次）
             
         Returns:
             每帧的姿势检测结果
         """
+        if not os.path.exists(video_path):
+            raise ValueError(f"无法打开视频文件: {video_path}")
+        
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = self.cache.make_key(video_path, self.model_path, self.conf_threshold, self.imgsz)
+            cached = self.cache.load(cache_key, self.keypoint_names)
+            if cached is not None:
+                print(f"使用姿势缓存，共 {len(cached)} 帧")
+                return cached
+        
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             raise ValueError(f"无法打开视频文件: {video_path}")
         
+        # 延迟加载时，只有缓存未命中才需要加载模型权重
+        if self.model is None:
+            self.load_model()
+        
         frame_poses = []
         frame_count = 0
+        tracker = PoseTracker()
         
         while True:
-            ret, frame = cap.read()
+            with profiler.stage(STAGE_DECODE):
+                ret, frame = cap.read()
             if not ret:
                 break
             
-            # 检测当前帧的姿势
-            poses = self.detect_pose(frame)
+            # 检测当前帧的姿势，person_id 换成跨帧稳定的跟踪ID
+            poses = tracker.update(self.detect_pose(frame))
             frame_poses.append(poses)
             
             frame_count += 1
@@ -144,6 +252,12 @@ class PoseDetector:
         cap.release()
         print(f"视频处理完成，共处理 {frame_count} 帧")
         
+        if cache_key is not None:
+            try:
+                self.cache.save(cache_key, frame_poses, self.keypoint_names)
+            except Exception as e:
+                print(f"保存姿势缓存失败: {e}")
+        
         return frame_poses
     
     def draw_pose(self, image, poses, draw_keypoints=True, draw_skeleton=True, draw_bbox=True):
@@ -315,6 +429,174 @@ class PoseDetector:
         
         return np.array(features)
 
+def _bbox_iou(a, b) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class PoseTracker:
+    """
+    按检测框IoU贪心匹配的简单多目标跟踪器，为每帧的姿势分配跨帧稳定的 person_id
+    （PoseDetector 输出的 person_id 只是当前帧内的检测顺序）。
+    未匹配的跟踪保留 max_missed 帧，短暂漏检或遮挡后重新出现时沿用原ID
+    """
+    
+    def __init__(self, match_iou: float = 0.3, max_missed: int = 3):
+        """
+        Args:
+            match_iou: 检测框与已有跟踪匹配的IoU阈值
+            max_missed: 跟踪连续多少帧未匹配则放弃
+        """
+        self.match_iou = match_iou
+        self.max_missed = max_missed
+        self.reset()
+    
+    def reset(self):
+        self.tracks: Dict[int, Dict[str, Any]] = {}  # track_id -> {'bbox', 'missed'}
+        self._next_track_id = 0
+    
+    def update(self, poses: List[Dict[str, Any]], keep_unmatched: bool = True) -> List[Dict[str, Any]]:
+        """
+        为一帧的姿势分配跟踪ID（直接修改并返回 poses）
+        
+        Args:
+            poses: 当前帧的姿势列表
+            keep_unmatched: 未匹配的跟踪是否保留到 max_missed 帧，False时立即移除
+        """
+        unmatched = set(self.tracks)
+        tracks = {}
+        # 置信度高的先匹配
+        for pose in sorted(poses, key=lambda p: p.get('confidence', 0.0), reverse=True):
+            bbox = pose.get('bbox')
+            best_id, best_iou = None, self.match_iou
+            if bbox is not None:
+                for track_id in unmatched:
+                    iou = _bbox_iou(bbox, self.tracks[track_id]['bbox'])
+                    if iou >= best_iou:
+                        best_id, best_iou = track_id, iou
+            if best_id is None:
+                best_id = self._next_track_id
+                self._next_track_id += 1
+            else:
+                unmatched.discard(best_id)
+            pose['person_id'] = best_id
+            if bbox is not None:
+                tracks[best_id] = {'bbox': bbox, 'missed': 0}
+        
+        if keep_unmatched:
+            for track_id in unmatched:
+                track = self.tracks[track_id]
+                track['missed'] += 1
+                if track['missed'] <= self.max_missed:
+                    tracks[track_id] = track
+        self.tracks = tracks
+        return poses
+
+
+def track_poses_sequence(poses_sequence: List[List[Dict[str, Any]]], match_iou: float = 0.3,
+                         max_missed: int = 3) -> List[List[Dict[str, Any]]]:
+    """为逐帧姿势序列重新分配跨帧稳定的 person_id（直接修改并返回输入）"""
+    tracker = PoseTracker(match_iou, max_missed)
+    for poses in poses_sequence:
+        tracker.update(poses)
+    return poses_sequence
+
+
+class CropPoseDetector:
+    """
+    两阶段姿势检测：定期在整帧上检测以发现新人物，其余帧只在已跟踪人物的
+    扩展框内裁剪小图并批量推理。远处的小目标在裁剪图中分辨率更高，
+    大场景中人物较少时推理量也更小。返回的 person_id 为跨帧稳定的跟踪ID。
+    """
+    
+    def __init__(self, pose_detector: PoseDetector, full_frame_interval: int = 15,
+                 crop_size: int = 256, padding: float = 0.3, max_missed: int = 3,
+                 match_iou: float = 0.3):
+        """
+        Args:
+            pose_detector: 已加载模型的姿势检测器
+            full_frame_interval: 每隔多少帧做一次整帧检测
+            crop_size: 裁剪图的推理分辨率
+            padding: 跟踪框四周扩展的比例
+            max_missed: 裁剪区域内连续多少次未检测到人则放弃该跟踪
+            match_iou: 整帧检测结果与已有跟踪匹配的IoU阈值
+        """
+        self.pose_detector = pose_detector
+        self.full_frame_interval = max(1, full_frame_interval)
+        self.crop_size = crop_size
+        self.padding = padding
+        self.max_missed = max_missed
+        self.tracker = PoseTracker(match_iou, max_missed)
+        self.reset()
+    
+    @property
+    def tracks(self) -> Dict[int, Dict[str, Any]]:
+        """track_id -> {'bbox', 'missed'}"""
+        return self.tracker.tracks
+    
+    def reset(self):
+        self.tracker.reset()
+        self._frame_count = 0
+    
+    def detect(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+        """检测一帧，坐标为输入帧的像素坐标"""
+        run_full = not self.tracks or self._frame_count % self.full_frame_interval == 0
+        self._frame_count += 1
+        if run_full:
+            return self._detect_full(frame)
+        return self._detect_crops(frame)
+    
+    def _detect_full(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+        poses = [p for p in self.pose_detector.detect_pose(frame) if p.get('bbox') is not None]
+        # 贪心IoU匹配，保持已有人物的跟踪ID；整帧中未出现的人物直接放弃
+        return self.tracker.update(poses, keep_unmatched=False)
+    
+    def _crop_region(self, bbox, width: int, height: int) -> Tuple[int, int, int, int]:
+        x1, y1, x2, y2 = bbox
+        # 扩展为正方形附近的区域，给肢体运动留出余量
+        side = max(x2 - x1, y2 - y1) * (1 + 2 * self.padding)
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        return (max(0, int(cx - side / 2)), max(0, int(cy - side / 2)),
+                min(width, int(cx + side / 2)), min(height, int(cy + side / 2)))
+    
+    def _detect_crops(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+        height, width = frame.shape[:2]
+        track_ids = list(self.tracks)
+        regions = [self._crop_region(self.tracks[t]['bbox'], width, height) for t in track_ids]
+        # 完全移出画面的跟踪框得到空区域，按未检测到处理
+        valid = [i for i, (x1, y1, x2, y2) in enumerate(regions) if x2 - x1 >= 8 and y2 - y1 >= 8]
+        crops = [frame[regions[i][1]:regions[i][3], regions[i][0]:regions[i][2]] for i in valid]
+        batch_results = self.pose_detector.detect_pose_batch(crops, imgsz=self.crop_size)
+        results = [[] for _ in regions]
+        for i, crop_poses in zip(valid, batch_results):
+            results[i] = crop_poses
+        
+        poses = []
+        for track_id, (x1, y1, _, _), crop_poses in zip(track_ids, regions, results):
+            track = self.tracks[track_id]
+            if not crop_poses:
+                track['missed'] += 1
+                if track['missed'] > self.max_missed:
+                    del self.tracks[track_id]
+                continue
+            # 裁剪区域内取置信度最高的人，坐标平移回整帧
+            pose = max(crop_poses, key=lambda p: p['confidence'])
+            for kp in pose['keypoints'].values():
+                kp['x'] += x1
+                kp['y'] += y1
+            if pose.get('bbox') is not None:
+                bx1, by1, bx2, by2 = pose['bbox']
+                pose['bbox'] = [bx1 + x1, by1 + y1, bx2 + x1, by2 + y1]
+                track['bbox'] = pose['bbox']
+            pose['person_id'] = track_id
+            track['missed'] = 0
+            poses.append(pose)
+        return poses
+
+
 if __name__ == "__main__":
     # 测试代码
     detector = PoseDetector()
@@ -0,0 +1,364 @@
+"""
+姿势模型服务进程
+一个进程加载一份姿势模型，GUI、命令行和数据预处理等多个客户端通过本地连接提交帧，
+帧数据经共享内存传递；服务端把同时到达的请求合并成小批次推理，并统计排队和推理耗时
+"""
+
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+from multiprocessing import Process, shared_memory
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pose_detection import PoseDetector
+
+DEFAULT_ADDRESS = ('127.0.0.1', 6010)
+DEFAULT_AUTHKEY = b'fall-detection-pose'
+
+
+def parse_address(text: str) -> Tuple[str, int]:
+    """解析 "host:port" 或 "port" 格式的地址"""
+    if ':' in text:
+        host, port = text.rsplit(':', 1)
+        return host or DEFAULT_ADDRESS[0], int(port)
+    return DEFAULT_ADDRESS[0], int(text)
+
+
+_attach_lock = threading.Lock()
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """附加到客户端创建的共享内存，不由本进程负责回收"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python 3.13 之前附加时也会登记到resource_tracker；服务进程与客户端可能共用同一个
+    # tracker（fork/spawn启动时），登记或注销都会干扰客户端的回收，所以附加期间跳过登记
+    from multiprocessing import resource_tracker
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class _Reply:
+    """一次客户端请求（可包含多帧）的回复：所有帧推理完成后一次发送"""
+    __slots__ = ('conn', 'send_lock', 'request_id', 'poses', 'remaining', 'error', 'lock')
+
+    def __init__(self, conn, send_lock, request_id, n_frames):
+        self.conn = conn
+        self.send_lock = send_lock
+        self.request_id = request_id
+        self.poses = [[] for _ in range(n_frames)]
+        self.remaining = n_frames
+        self.error = None
+        self.lock = threading.Lock()
+
+    def set(self, index, poses, error):
+        with self.lock:
+            self.poses[index] = poses
+            self.error = self.error or error
+            self.remaining -= 1
+            if self.remaining > 0:
+                return
+        try:
+            with self.send_lock:
+                self.conn.send({'op': 'detect', 'request_id': self.request_id,
+                                'poses': self.poses, 'error': self.error})
+        except (EOFError, OSError):
+            pass
+
+
+class _Request:
+    """单帧推理请求，frame 指向客户端共享内存；imgsz 为None时使用服务端默认分辨率"""
+    __slots__ = ('reply', 'index', 'frame', 'imgsz', 'received')
+
+    def __init__(self, reply, index, frame, imgsz, received):
+        self.reply = reply
+        self.index = index
+        self.frame = frame
+        self.imgsz = imgsz
+        self.received = received
+
+
+class PoseModelServer:
+    """姿势模型服务端（在服务进程中运行）"""
+
+    def __init__(self, model_path: str = "yolov8n-pose.pt", conf_threshold: float = 0.7,
+                 device: str = 'cuda', imgsz: int = 640, address: Tuple[str, int] = DEFAULT_ADDRESS,
+                 authkey: bytes = DEFAULT_AUTHKEY, max_batch: int = 8, batch_timeout: float = 0.005):
+        """
+        Args:
+            model_path / conf_threshold / device / imgsz: 传给 PoseDetector 的参数
+            address: 监听地址
+            authkey: 连接认证密钥
+            max_batch: 单次推理的最大帧数
+            batch_timeout: 收到第一个请求后等待凑批的最长时间（秒）
+        """
+        self.detector = PoseDetector(model_path, conf_threshold, device, imgsz=imgsz, cache_dir=None)
+        self.address = address
+        self.authkey = authkey
+        self.max_batch = max_batch
+        self.batch_timeout = batch_timeout
+        self.requests: "queue.Queue[_Request]" = queue.Queue()
+        self.clients = 0
+        self.stats_lock = threading.Lock()
+        self.total_requests = 0
+        self.total_batches = 0
+        self.queue_wait_ms = deque(maxlen=1000)
+        self.batch_infer_ms = deque(maxlen=1000)
+        self.batch_sizes = deque(maxlen=1000)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'model_path': self.detector.model_path,
+            'conf_threshold': self.detector.conf_threshold,
+            'imgsz': self.detector.imgsz,
+            'max_batch': self.max_batch,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """队列深度、批大小和延迟统计"""
+        def percentiles(values):
+            if not values:
+                return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0}
+            arr = np.asarray(values)
+            return {'mean': float(arr.mean()), 'p50': float(np.percentile(arr, 50)),
+                    'p95': float(np.percentile(arr, 95))}
+
+        with self.stats_lock:
+            return {
+                'clients': self.clients,
+                'queue_depth': self.requests.qsize(),
+                'total_requests': self.total_requests,
+                'total_batches': self.total_batches,
+                'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+                'queue_wait_ms': percentiles(list(self.queue_wait_ms)),
+                'batch_infer_ms': percentiles(list(self.batch_infer_ms)),
+            }
+
+    def serve_forever(self):
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"姿势模型服务已启动: {self.address[0]}:{self.address[1]}")
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+
+    def _handle_client(self, conn):
+        """接收一个客户端的请求；推理由批处理线程统一完成"""
+        send_lock = threading.Lock()
+        attached: Dict[str, shared_memory.SharedMemory] = {}
+        with self.stats_lock:
+            self.clients += 1
+        try:
+            while True:
+                message = conn.recv()
+                op = message.get('op')
+                if op == 'detect':
+                    name = message['shm']
+                    if name not in attached:
+                        # 客户端扩容时会换新的共享内存，旧的随之失效
+                        for old in attached.values():
+                            old.close()
+                        attached = {name: _attach_shared_memory(name)}
+                    # 一次请求的多帧依次存放在共享内存中，逐帧加入批处理队列
+                    shapes = message['shapes']
+                    reply = _Reply(conn, send_lock, message['request_id'], len(shapes))
+                    received = time.perf_counter()
+                    for index, (shape, offset) in enumerate(zip(shapes, message['offsets'])):
+                        frame = np.ndarray(tuple(shape), dtype=np.uint8, buffer=attached[name].buf,
+                                           offset=offset)
+                        self.requests.put(_Request(reply, index, frame, message.get('imgsz'), received))
+                else:
+                    handler = {'info': self.info, 'stats': self.stats}.get(op)
+                    with send_lock:
+                        conn.send({'op': op, 'result': handler() if handler else None})
+        except (EOFError, OSError):
+            pass
+        finally:
+            for shm in attached.values():
+                shm.close()
+            with self.stats_lock:
+                self.clients -= 1
+
+    def _collect_batch(self) -> List[_Request]:
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.batch_timeout
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._collect_batch()
+            start = time.perf_counter()
+            # 输入分辨率不同的帧不能合并推理，按 imgsz 分组
+            groups: Dict[Optional[int], List[_Request]] = {}
+            for request in batch:
+                groups.setdefault(request.imgsz, []).append(request)
+            outputs = []
+            for imgsz, requests in groups.items():
+                try:
+                    results = self.detector.detect_pose_batch([r.frame for r in requests], imgsz)
+                    error = None
+                except Exception as e:
+                    results = [[] for _ in requests]
+                    error = str(e)
+                outputs.extend((request, poses, error) for request, poses in zip(requests, results))
+            infer_ms = (time.perf_counter() - start) * 1000
+
+            with self.stats_lock:
+                self.total_requests += len(batch)
+                self.total_batches += 1
+                self.batch_sizes.append(len(batch))
+                self.batch_infer_ms.append(infer_ms)
+                for request in batch:
+                    self.queue_wait_ms.append((start - request.received) * 1000)
+
+            for request, poses, error in outputs:
+                request.frame = None  # 回复后客户端可能覆盖共享内存
+                request.reply.set(request.index, poses, error)
+
+
+def run_server(**kwargs):
+    PoseModelServer(**kwargs).serve_forever()
+
+
+def start_server_process(**kwargs) -> Process:
+    """在后台进程中启动服务，参数同 PoseModelServer"""
+    process = Process(target=run_server, kwargs=kwargs, daemon=True)
+    process.start()
+    return process
+
+
+class PoseServerClient(PoseDetector):
+    """
+    姿势模型服务的客户端，接口与 PoseDetector 相同（process_video、draw_pose 等照常使用），
+    推理请求发往服务进程，本进程不加载模型权重
+    """
+
+    def __init__(self, address: Tuple[str, int] = DEFAULT_ADDRESS, authkey: bytes = DEFAULT_AUTHKEY,
+                 connect_timeout: float = 10.0, **kwargs):
+        self.address = address
+        self.conn = self._connect(address, authkey, connect_timeout)
+        self._lock = threading.Lock()
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._request_id = 0
+
+        info = self._call('info')
+        super().__init__(info['model_path'], info['conf_threshold'], lazy=True,
+                         imgsz=info['imgsz'], **kwargs)
+        self.model = address  # 标记为就绪，process_video 不会再尝试本地加载
+
+    @staticmethod
+    def _connect(address, authkey, timeout):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                return Client(address, authkey=authkey)
+            except (ConnectionRefusedError, FileNotFoundError):
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    def _call(self, op: str):
+        with self._lock:
+            self.conn.send({'op': op})
+            return self.conn.recv()['result']
+
+    def load_model(self, model_path: str = None):
+        """模型由服务进程加载，客户端不能切换权重"""
+        if model_path is not None and model_path != self.model_path:
+            print(f"姿势模型服务使用 {self.model_path}，忽略本地切换请求: {model_path}")
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call('stats')
+
+    def _ensure_buffer(self, nbytes: int) -> shared_memory.SharedMemory:
+        if self._shm is None or self._shm.size < nbytes:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        return self._shm
+
+    def detect_pose(self, image) -> List[Dict[str, Any]]:
+        return self.detect_pose_batch([image])[0]
+
+    def detect_pose_batch(self, images: List[np.ndarray], imgsz: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        整批帧一次请求发送（依次写入共享内存），服务端把它们与其他客户端的帧合并成批推理
+
+        Args:
+            imgsz: 本次推理的输入分辨率，随请求转发，默认使用服务端的分辨率
+        """
+        if not images:
+            return []
+        frames = [np.ascontiguousarray(image, dtype=np.uint8) for image in images]
+        offsets = np.cumsum([0] + [frame.nbytes for frame in frames]).tolist()
+        with self._lock:
+            shm = self._ensure_buffer(offsets[-1])
+            for frame, offset in zip(frames, offsets):
+                np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)[...] = frame
+            self._request_id += 1
+            self.conn.send({'op': 'detect', 'request_id': self._request_id, 'shm': shm.name,
+                            'shapes': [frame.shape for frame in frames], 'offsets': offsets[:-1],
+                            'imgsz': imgsz})
+            reply = self.conn.recv()
+        if reply.get('error'):
+            raise RuntimeError(f"姿势模型服务推理失败: {reply['error']}")
+        return reply['poses']
+
+    def close(self):
+        try:
+            self.conn.close()
+        finally:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+
+def connect_pose_detector(server: Optional[str] = None, **kwargs) -> PoseDetector:
+    """
+    获取姿势检测器：指定服务地址时连接共享的模型服务，否则在本进程加载模型
+
+    Args:
+        server: "host:port" 格式的服务地址
+    """
+    if server:
+        return PoseServerClient(parse_address(server))
+    return PoseDetector(**kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="姿势模型服务")
+    parser.add_argument('--model', default='yolov8n-pose.pt', help='YOLO姿势模型路径')
+    parser.add_argument('--conf', type=float, default=0.7, help='置信度阈值')
+    parser.add_argument('--device', default='cuda', help='推理设备')
+    parser.add_argument('--imgsz', type=int, default=640, help='检测输入分辨率')
+    parser.add_argument('--address', default=f"{DEFAULT_ADDRESS[0]}:{DEFAULT_ADDRESS[1]}",
+                        help='监听地址 host:port')
+    parser.add_argument('--max-batch', type=int, default=8, help='单次推理的最大帧数')
+    parser.add_argument('--batch-timeout', type=float, default=5.0, help='凑批等待时间（毫秒）')
+    args = parser.parse_args()
+
+    run_server(model_path=args.model, conf_threshold=args.conf, device=args.device, imgsz=args.imgsz,
+               address=parse_address(args.address), max_batch=args.max_batch,
+               batch_timeout=args.batch_timeout / 1000)
@@ -0,0 +1,189 @@
+"""
+分阶段性能分析模块
+为检测流水线各阶段（解码、缩放、推理、后处理、摔倒判定、绘制、颜色转换、界面显示）计时，
+每个阶段保留最近N次耗时用于统计分位数和直方图；关闭时计时器为空操作，开销可以忽略
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+# 流水线阶段
+STAGE_DECODE = "decode"
+STAGE_RESIZE = "resize"
+STAGE_INFERENCE = "inference"
+STAGE_POSTPROCESS = "postprocess"
+STAGE_FALL_LOGIC = "fall_logic"
+STAGE_DRAW = "draw"
+STAGE_COLOR = "color"
+STAGE_DISPLAY = "display"
+
+STAGES = [STAGE_DECODE, STAGE_RESIZE, STAGE_INFERENCE, STAGE_POSTPROCESS,
+          STAGE_FALL_LOGIC, STAGE_DRAW, STAGE_COLOR, STAGE_DISPLAY]
+
+STAGE_NAMES = {
+    STAGE_DECODE: "解码",
+    STAGE_RESIZE: "缩放",
+    STAGE_INFERENCE: "推理",
+    STAGE_POSTPROCESS: "后处理",
+    STAGE_FALL_LOGIC: "摔倒判定",
+    STAGE_DRAW: "绘制",
+    STAGE_COLOR: "颜色转换",
+    STAGE_DISPLAY: "界面显示",
+}
+
+# 直方图桶上界（毫秒），最后一个桶收集超出部分
+HISTOGRAM_EDGES_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500]
+
+
+class _NullTimer:
+    """分析关闭时使用的空计时器"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ('profiler', 'stage', 'start')
+
+    def __init__(self, profiler: 'StageProfiler', stage: str):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.stage, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class StageProfiler:
+    """各阶段滚动耗时统计（线程安全）"""
+
+    def __init__(self, window: int = 300, enabled: bool = False):
+        """
+        Args:
+            window: 每个阶段保留的最近样本数
+            enabled: 是否启用计时
+        """
+        self.window = window
+        self.enabled = enabled
+        self._samples: Dict[str, deque] = {}
+        self._totals: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def stage(self, name: str):
+        """
+        阶段计时上下文：
+
+            with profiler.stage(STAGE_INFERENCE):
+                results = model(frame)
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def record(self, name: str, elapsed_ms: float):
+        """记录一次阶段耗时（毫秒）"""
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = 0
+            samples.append(elapsed_ms)
+            self._totals[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    @staticmethod
+    def _histogram(values: List[float]) -> List[int]:
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for value in values:
+            for i, edge in enumerate(HISTOGRAM_EDGES_MS):
+                if value <= edge:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """返回各阶段最近窗口内的统计信息"""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+            totals = dict(self._totals)
+
+        ordered = [s for s in STAGES if s in snapshot] + sorted(s for s in snapshot if s not in STAGES)
+        result = {}
+        for name in ordered:
+            values = snapshot[name]
+            if not values:
+                continue
+            n = len(values)
+            mean = sum(values) / n
+            result[name] = {
+                'total_count': totals[name],
+                'window_count': n,
+                'mean_ms': mean,
+                'p50_ms': values[int(0.50 * (n - 1))],
+                'p90_ms': values[int(0.90 * (n - 1))],
+                'p99_ms': values[int(0.99 * (n - 1))],
+                'max_ms': values[-1],
+                'histogram': self._histogram(values),
+            }
+        return result
+
+    def format_table(self) -> str:
+        """格式化为文本表格，供诊断面板和命令行显示"""
+        stats = self.stats()
+        if not stats:
+            return "暂无数据（请先启用性能分析并运行检测）"
+
+        lines = [f"{'阶段':<10}{'次数':>8}{'平均':>9}{'P50':>9}{'P90':>9}{'P99':>9}{'最大':>9}  (ms)"]
+        frame_total = 0.0
+        for name, s in stats.items():
+            frame_total += s['mean_ms']
+            lines.append(
+                f"{STAGE_NAMES.get(name, name):<10}{s['total_count']:>8}{s['mean_ms']:>9.2f}"
+                f"{s['p50_ms']:>9.2f}{s['p90_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}"
+            )
+        lines.append(f"各阶段平均耗时合计: {frame_total:.2f} ms")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'window': self.window,
+            'histogram_edges_ms': HISTOGRAM_EDGES_MS,
+            'stages': self.stats(),
+        }
+
+    def dump_json(self, filepath: str):
+        """保存统计结果为JSON"""
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+# 全局分析器，各模块共享
+profiler = StageProfiler()
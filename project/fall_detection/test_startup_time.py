@@ -0,0 +1,104 @@
+"""
+启动时间测试脚本
+使用 python -X importtime 统计各模块导入耗时，跟踪GUI启动性能
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent
+
+# 需要跟踪的入口模块
+TARGET_MODULES = [
+    'gui_application',
+    'fall_detection_algorithms',
+    'pose_detection',
+    'detector_registry',
+    'deep_learning_detector',
+]
+
+
+def measure_import(module: str) -> dict:
+    """在新进程中导入模块，解析 -X importtime 输出"""
+    start_time = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=str(project_root), capture_output=True, text=True
+    )
+    wall_time = time.perf_counter() - start_time
+
+    # 格式: "import time: self [us] | cumulative | imported package"
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        name = parts[2].rstrip()
+        entries.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip())) // 2,
+            'self_ms': int(parts[0]) / 1000,
+            'cumulative_ms': int(parts[1]) / 1000,
+        })
+
+    total_ms = max((e['cumulative_ms'] for e in entries if e['module'] == module), default=0.0)
+    top_level = sorted((e for e in entries if e['depth'] <= 1),
+                       key=lambda e: e['cumulative_ms'], reverse=True)
+    return {
+        'module': module,
+        'success': proc.returncode == 0,
+        'error': proc.stderr.strip().splitlines()[-1] if proc.returncode != 0 and proc.stderr else '',
+        'import_ms': total_ms,
+        'wall_ms': wall_time * 1000,
+        'top_imports': top_level[:10],
+    }
+
+
+def test_startup_time(output_path: str = None, top: int = 10):
+    """测试各入口模块的导入时间"""
+    print("启动时间测试 (python -X importtime)")
+    print("-" * 60)
+
+    results = []
+    for module in TARGET_MODULES:
+        result = measure_import(module)
+        results.append(result)
+
+        if not result['success']:
+            print(f"{module}: 导入失败 - {result['error']}")
+            continue
+
+        print(f"{module}: 导入 {result['import_ms']:.1f} ms (进程总计 {result['wall_ms']:.1f} ms)")
+        for entry in result['top_imports'][:top]:
+            print(f"    {entry['module']:<40} {entry['cumulative_ms']:>9.1f} ms")
+
+    print("-" * 60)
+
+    if output_path:
+        report = {
+            'python': sys.version.split()[0],
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'results': results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {output_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="摔倒检测系统启动时间测试")
+    parser.add_argument('--output', type=str, help='保存JSON结果的路径')
+    parser.add_argument('--top', type=int, default=10, help='每个模块显示的最慢导入数量')
+    args = parser.parse_args()
+
+    test_startup_time(args.output, args.top)
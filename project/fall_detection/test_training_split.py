@@ -0,0 +1,69 @@
+"""
+训练数据划分测试
+验证按数据文件划分训练/测试集（及CV折）后，增强样本只来自训练部分的文件，
+同一视频的帧或其增强副本不会同时出现在训练和测试两侧
+"""
+
+import os
+import json
+import tempfile
+import numpy as np
+from pose_detection import KEYPOINT_NAMES
+from training_utils import ModelTrainer
+
+
+def _write_dataset(data_path, n_files=10, n_frames=12):
+    """生成带随机关键点的合成数据文件，一半摔倒一半正常"""
+    rng = np.random.default_rng(0)
+    for i in range(n_files):
+        label = i % 2
+        poses_sequence = []
+        for _ in range(n_frames):
+            keypoints = {name: {'x': float(rng.uniform(50, 300)), 'y': float(rng.uniform(50, 400)),
+                                'confidence': 0.9}
+                         for name in KEYPOINT_NAMES}
+            poses_sequence.append([{'person_id': 0, 'keypoints': keypoints,
+                                    'bbox': [50, 50, 300, 400], 'confidence': 0.9}])
+        with open(os.path.join(data_path, f"video_{i:02d}.json"), 'w', encoding='utf-8') as f:
+            json.dump({'label': label, 'frames': n_frames, 'poses_sequence': poses_sequence}, f)
+
+
+def test_augmented_samples_stay_in_training_sources():
+    """增强样本的来源文件与测试（验证）部分的来源文件不相交"""
+    print("开始训练数据划分测试...")
+    trainer = ModelTrainer()
+    copies = 2
+    
+    with tempfile.TemporaryDirectory() as data_path:
+        _write_dataset(data_path)
+        X, y, groups = trainer.prepare_training_data(data_path)
+    
+    assert len(X) == len(y) == len(groups)
+    assert len(trainer.source_sequences) == 10
+    
+    # 训练/测试划分（train_traditional_ml_models 使用第一折）及每个CV折
+    for fold, (train_idx, test_idx) in enumerate(trainer.source_folds(y, groups, 5)):
+        train_sources = set(groups[train_idx].tolist())
+        test_sources = set(groups[test_idx].tolist())
+        assert not train_sources & test_sources, f"第{fold}折训练和测试共享数据文件"
+        
+        X_aug, y_aug, aug_sources = trainer.augment_sources(groups[train_idx], copies)
+        assert len(X_aug) > 0
+        assert not set(aug_sources.tolist()) & test_sources, f"第{fold}折增强样本来自测试文件"
+        assert set(aug_sources.tolist()) <= train_sources
+        
+        X_train, y_train = trainer.build_training_set(X, y, groups, train_idx, copies)
+        assert len(X_train) == len(train_idx) + len(X_aug)
+        assert len(y_train) == len(X_train)
+        print(f"  第{fold}折: 训练文件 {sorted(train_sources)}, 测试文件 {sorted(test_sources)}, "
+              f"训练样本 {len(X_train)}（含增强 {len(X_aug)}）")
+    
+    # 缓存的标准化CV折：训练部分包含增强样本，验证部分只有原始样本
+    folds = trainer._get_cv_folds(X, y, 5, groups, copies)
+    assert sum(len(fold[3]) for fold in folds) == len(y)
+    
+    print("训练数据划分测试通过")
+
+
+if __name__ == "__main__":
+    test_augmented_samples_stay_in_training_sources()
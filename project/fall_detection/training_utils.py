@@ -5,17 +5,24 @@
 
 import os
 import json
+import time
+import hashlib
 import numpy as np
 import cv2
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, StratifiedKFold, StratifiedGroupKFold, ParameterGrid
 from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.preprocessing import StandardScaler
+from joblib import Parallel, delayed
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
 from datetime import datetime
 
-from pose_detection import PoseDetector
+from pose_detection import PoseDetector, KEYPOINT_NAMES, poses_to_array, array_to_poses
+from pose_augmentation import PoseAugmenter
 from fall_detection_algorithms import TraditionalMLFallDetector, DeepLearningFallDetector
 
 class DataPreprocessor:
@@ -25,13 +32,16 @@ class DataPreprocessor:
         self.pose_detector = pose_detector
         self.processed_data = []
         
-    def process_video_dataset(self, dataset_path: str, output_path: str = "processed_data"):
+    def process_video_dataset(self, dataset_path: str, output_path: str = "processed_data",
+                              fall_onsets: Dict[str, int] = None):
         """
         处理视频数据集
         
         Args:
             dataset_path: 数据集路径，包含fall和normal子文件夹
             output_path: 输出路径
+            fall_onsets: 摔倒起始帧标注 {摔倒视频文件名: 帧号}，写入数据文件的 fall_start_frame，
+                评估时据此计算检测延迟；未标注的视频不参与延迟统计
         """
         if not os.path.exists(output_path):
             os.makedirs(output_path)
@@ -39,7 +49,7 @@ class DataPreprocessor:
         # 处理摔倒视频
         fall_path = os.path.join(dataset_path, "fall")
         if os.path.exists(fall_path):
-            self._process_videos_in_folder(fall_path, output_path, label=1)
+            self._process_videos_in_folder(fall_path, output_path, label=1, fall_onsets=fall_onsets)
         
         # 处理正常视频
         normal_path = os.path.join(dataset_path, "normal")
@@ -49,7 +59,8 @@ class DataPreprocessor:
         # 保存处理后的数据
         self.save_processed_data(output_path)
         
-    def _process_videos_in_folder(self, folder_path: str, output_path: str, label: int):
+    def _process_videos_in_folder(self, folder_path: str, output_path: str, label: int,
+                                  fall_onsets: Dict[str, int] = None):
         """处理文件夹中的视频"""
         video_files = [f for f in os.listdir(folder_path) 
                       if f.lower().endswith(('.mp4', '.avi', '.mov', '.mkv'))]
@@ -62,22 +73,31 @@ class DataPreprocessor:
                 # 处理视频
                 poses_sequence = self.pose_detector.process_video(video_path)
                 
+                cap = cv2.VideoCapture(video_path)
+                fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+                cap.release()
+                
                 # 保存处理结果
                 output_file = os.path.join(output_path, f"{video_file[:-4]}_{label}.json")
-                self._save_poses_sequence(poses_sequence, output_file, label)
+                self._save_poses_sequence(poses_sequence, output_file, label, fps,
+                                          (fall_onsets or {}).get(video_file))
                 
             except Exception as e:
                 print(f"处理视频 {video_file} 失败: {e}")
     
     def _save_poses_sequence(self, poses_sequence: List[List[Dict[str, Any]]], 
-                           output_file: str, label: int):
-        """保存姿势序列"""
+                           output_file: str, label: int, fps: float = 25.0,
+                           fall_start_frame: Optional[int] = None):
+        """保存姿势序列（fall_start_frame 为标注的摔倒起始帧，没有标注时不写入）"""
         data = {
             'label': label,
             'frames': len(poses_sequence),
+            'fps': fps,
             'poses_sequence': poses_sequence,
             'processed_time': datetime.now().isoformat()
         }
+        if fall_start_frame is not None:
+            data['fall_start_frame'] = int(fall_start_frame)
         
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
@@ -203,20 +223,66 @@ class FeatureExtractor:
         angle = np.arctan2(dx, dy) * 180 / np.pi
         return abs(angle)
 
+# 超参数搜索的默认网格
+DEFAULT_PARAM_GRIDS = {
+    'knn': {'n_neighbors': [3, 5, 7, 9], 'weights': ['uniform', 'distance']},
+    'svm': {'C': [0.1, 1.0, 10.0], 'gamma': ['scale', 0.01, 0.1]},
+    'rf': {'n_estimators': [50, 100, 200], 'max_depth': [None, 10, 20]},
+}
+
+def _evaluate_candidate(algo: str, params: Dict[str, Any], fold_id: int,
+                        X_train: np.ndarray, y_train: np.ndarray,
+                        X_test: np.ndarray, y_test: np.ndarray) -> Dict[str, Any]:
+    """
+    在一个已标准化的CV折上训练并评估一组超参数（在joblib工作进程中执行）
+    
+    只评估predict的准确率，因此SVM关闭probability以省去内部校准。
+    """
+    model = TraditionalMLFallDetector(algo, params).create_model(probability=False)
+    
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - t0
+    
+    t0 = time.perf_counter()
+    predictions = model.predict(X_test)
+    predict_time = time.perf_counter() - t0
+    
+    return {
+        'algorithm': algo,
+        'params': params,
+        'fold': fold_id,
+        'accuracy': float(np.mean(predictions == y_test)),
+        'fit_time': fit_time,
+        'predict_time_ms': predict_time * 1000 / max(len(X_test), 1)
+    }
+
 class ModelTrainer:
     """模型训练器"""
     
     def __init__(self):
         self.feature_extractor = FeatureExtractor()
         self.training_history = []
+        self._cv_cache = {}
+        self.source_sequences = []  # [(关键点数组 (T, 17, 3), 标签)]，下标即 prepare_training_data 返回的 groups
+        
+    def prepare_training_data(self, data_path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        准备训练数据
         
-    def prepare_training_data(self, data_path: str) -> Tuple[np.ndarray, np.ndarray]:
-        """准备训练数据"""
+        Returns:
+            (X, y, groups)：groups 为每个样本所属数据文件的编号。
+            增强副本不在这里生成：先按数据文件划分训练/测试集（或CV折），
+            再由 build_training_set 只用训练部分的文件生成，同一视频的增强样本不会进入测试集
+        """
         features_list = []
         labels_list = []
+        groups_list = []
+        self.source_sequences = []
+        self._cv_cache = {}
         
         # 加载所有数据文件
-        for file in os.listdir(data_path):
+        for file in sorted(os.listdir(data_path)):
             if file.endswith('.json') and file != 'metadata.json':
                 file_path = os.path.join(data_path, file)
                 
@@ -226,6 +292,7 @@ class ModelTrainer:
                     
                     poses_sequence = data['poses_sequence']
                     label = data['label']
+                    group = len(self.source_sequences)
                     
                     # 提取特征
                     for poses in poses_sequence:
@@ -235,22 +302,86 @@ class ModelTrainer:
                                 # 取第一个人的特征
                                 features_list.append(features[0])
                                 labels_list.append(label)
+                                groups_list.append(group)
+                    
+                    self.source_sequences.append((poses_to_array(poses_sequence), label))
                 
                 except Exception as e:
                     print(f"加载数据文件 {file} 失败: {e}")
         
-        return np.array(features_list), np.array(labels_list)
+        return np.array(features_list), np.array(labels_list), np.array(groups_list, dtype=np.int64)
+    
+    def augment_sources(self, source_ids, augment_copies: int,
+                        augmenter=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        为指定数据文件生成增强样本：整批增强第一个人的关键点序列，再按原流程逐帧提取特征
+        
+        Returns:
+            (X, y, groups)，groups 为增强样本的来源文件编号
+        """
+        augmenter = augmenter or PoseAugmenter()
+        features_list, labels_list, groups_list = [], [], []
+        for group in np.unique(source_ids):
+            sequence, label = self.source_sequences[group]
+            if len(sequence) == 0:
+                continue
+            augmented = augmenter(np.repeat(sequence[None], augment_copies, axis=0))
+            for copy in augmented:
+                for poses in array_to_poses(copy):
+                    if poses:
+                        features_list.append(self.feature_extractor.extract_features_from_poses(poses)[0])
+                        labels_list.append(label)
+                        groups_list.append(group)
+        return np.array(features_list), np.array(labels_list), np.array(groups_list, dtype=np.int64)
+    
+    def build_training_set(self, X: np.ndarray, y: np.ndarray, groups: Optional[np.ndarray],
+                           train_idx: np.ndarray, augment_copies: int = 0,
+                           augmenter=None) -> Tuple[np.ndarray, np.ndarray]:
+        """训练部分的样本，加上只由训练部分的数据文件生成的增强样本"""
+        X_train, y_train = X[train_idx], y[train_idx]
+        if augment_copies > 0 and groups is not None:
+            X_aug, y_aug, _ = self.augment_sources(groups[train_idx], augment_copies, augmenter)
+            if len(X_aug):
+                X_train = np.concatenate([X_train, X_aug])
+                y_train = np.concatenate([y_train, y_aug])
+        return X_train, y_train
+    
+    def source_folds(self, y: np.ndarray, groups: Optional[np.ndarray],
+                     n_splits: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (训练索引, 测试索引) 列表；给定 groups 时按数据文件划分（同一视频的帧只出现在一侧）并尽量保持类别比例
+        """
+        if groups is None:
+            skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+            return list(skf.split(np.zeros(len(y)), y))
+        n_sources = len(np.unique(groups))
+        if n_sources < 2:
+            raise ValueError("按数据文件划分至少需要2个数据文件")
+        sgkf = StratifiedGroupKFold(n_splits=min(n_splits, n_sources), shuffle=True, random_state=42)
+        return list(sgkf.split(np.zeros(len(y)), y, groups))
     
     def train_traditional_ml_models(self, X: np.ndarray, y: np.ndarray, 
-                                  output_dir: str = "trained_models"):
-        """训练传统机器学习模型"""
+                                  output_dir: str = "trained_models", groups: np.ndarray = None,
+                                  augment_copies: int = 0, augmenter=None):
+        """
+        训练传统机器学习模型
+        
+        Args:
+            groups: 样本所属数据文件编号（prepare_training_data 返回），给定时按文件划分训练/测试集
+            augment_copies: 训练集中每个数据文件额外生成的增强副本数（测试集不增强）
+        """
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        # 划分训练集和测试集
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
+        # 划分训练集和测试集（约20%测试），增强只作用于训练部分
+        if groups is not None:
+            train_idx, test_idx = self.source_folds(y, groups, 5)[0]
+        else:
+            train_idx, test_idx = train_test_split(
+                np.arange(len(y)), test_size=0.2, random_state=42, stratify=y
+            )
+        X_train, y_train = self.build_training_set(X, y, groups, train_idx, augment_copies, augmenter)
+        X_test, y_test = X[test_idx], y[test_idx]
         
         # 训练不同算法
         algorithms = ['knn', 'svm', 'rf']
@@ -260,21 +391,28 @@ class ModelTrainer:
             print(f"训练 {algo.upper()} 模型...")
             
             model = TraditionalMLFallDetector(algo)
+            t0 = time.perf_counter()
             model.train(X_train, y_train)
+            fit_time = time.perf_counter() - t0
             
             # 评估模型
-            predictions, probabilities = model.predict(X_test)
-            accuracy = np.mean(predictions == y_test)
+            t0 = time.perf_counter()
+            predictions, probabilities = model.predict_features(X_test)
+            predict_time = time.perf_counter() - t0
+            accuracy = np.mean(np.array(predictions) == y_test)
             
-            # 保存模型
+            # 保存模型，同时导出纯NumPy编译模型供推理使用
             model_path = os.path.join(output_dir, f"{algo}_model.pkl")
             model.save_model(model_path)
+            model.export_compiled(os.path.join(output_dir, f"{algo}_model.npz"))
             
             results[algo] = {
                 'accuracy': accuracy,
                 'predictions': predictions,
                 'probabilities': probabilities,
-                'model_path': model_path
+                'model_path': model_path,
+                'fit_time': fit_time,
+                'predict_time_ms': predict_time * 1000 / max(len(X_test), 1)
             }
             
             print(f"{algo.upper()} 模型准确率: {accuracy:.4f}")
@@ -284,8 +422,142 @@ class ModelTrainer:
         
         return results
     
-    def train_deep_learning_model(self, data_path: str, output_dir: str = "trained_models"):
-        """训练深度学习模型"""
+    def _get_cv_folds(self, X: np.ndarray, y: np.ndarray, n_splits: int, groups: np.ndarray = None,
+                      augment_copies: int = 0, augmenter=None) -> List[Tuple[np.ndarray, ...]]:
+        """
+        获取缓存的标准化CV折
+        
+        每折的StandardScaler只在训练部分上拟合一次，所有模型和超参数组合共享同一份
+        标准化后的矩阵，避免在每个候选上重复划分和缩放。
+        给定 groups 时按数据文件划分，增强样本只由每折训练部分的文件生成。
+        """
+        key = (hashlib.sha1(np.ascontiguousarray(X).tobytes()).hexdigest(),
+               hashlib.sha1(np.ascontiguousarray(y).tobytes()).hexdigest(),
+               None if groups is None else hashlib.sha1(np.ascontiguousarray(groups).tobytes()).hexdigest(),
+               n_splits, augment_copies)
+        if key in self._cv_cache:
+            return self._cv_cache[key]
+        
+        folds = []
+        for train_idx, test_idx in self.source_folds(y, groups, n_splits):
+            X_train, y_train = self.build_training_set(X, y, groups, train_idx, augment_copies, augmenter)
+            scaler = StandardScaler().fit(X_train)
+            folds.append((
+                scaler.transform(X_train), y_train,
+                scaler.transform(X[test_idx]), y[test_idx]
+            ))
+        
+        self._cv_cache[key] = folds
+        return folds
+    
+    def sweep_traditional_ml_models(self, X: np.ndarray, y: np.ndarray,
+                                    output_dir: str = "trained_models",
+                                    param_grids: Dict[str, Dict[str, List[Any]]] = None,
+                                    cv: int = 5, n_jobs: int = -1, groups: np.ndarray = None,
+                                    augment_copies: int = 0, augmenter=None) -> Dict[str, Any]:
+        """
+        并行超参数搜索：所有模型类型和超参数组合在缓存的CV折上并行训练
+        
+        Args:
+            X: 特征矩阵
+            y: 标签
+            output_dir: 输出路径
+            param_grids: 每种算法的超参数网格，默认使用DEFAULT_PARAM_GRIDS
+            cv: 交叉验证折数
+            n_jobs: joblib并行进程数（-1表示使用全部CPU）
+            groups: 样本所属数据文件编号，给定时CV折按文件划分
+            augment_copies: 每折训练部分的每个数据文件额外生成的增强副本数（验证部分不增强）
+            augmenter: 使用的 PoseAugmenter，默认使用默认参数
+            
+        Returns:
+            每种算法最优配置的汇总结果
+        """
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        
+        param_grids = param_grids or DEFAULT_PARAM_GRIDS
+        folds = self._get_cv_folds(X, y, cv, groups, augment_copies, augmenter)
+        
+        candidates = [(algo, params) for algo, grid in param_grids.items()
+                      for params in ParameterGrid(grid)]
+        print(f"超参数搜索: {len(candidates)} 个候选 x {len(folds)} 折")
+        
+        # 大数组由joblib自动内存映射，各工作进程共享同一份缓存矩阵
+        fold_results = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluate_candidate)(algo, params, fold_id, *fold)
+            for algo, params in candidates
+            for fold_id, fold in enumerate(folds)
+        )
+        
+        # 按候选汇总各折结果
+        sweep_results = []
+        for algo, params in candidates:
+            runs = [r for r in fold_results if r['algorithm'] == algo and r['params'] == params]
+            accuracies = [r['accuracy'] for r in runs]
+            sweep_results.append({
+                'algorithm': algo,
+                'params': params,
+                'accuracy': float(np.mean(accuracies)),
+                'accuracy_std': float(np.std(accuracies)),
+                'fit_time': float(np.mean([r['fit_time'] for r in runs])),
+                'predict_time_ms': float(np.mean([r['predict_time_ms'] for r in runs]))
+            })
+        
+        # 每种算法选出最优配置，在全部数据上重新训练并保存
+        best_results = {}
+        for algo in param_grids:
+            algo_results = [r for r in sweep_results if r['algorithm'] == algo]
+            if not algo_results:
+                continue
+            best = max(algo_results, key=lambda r: (r['accuracy'], -r['predict_time_ms']))
+            
+            model = TraditionalMLFallDetector(algo, best['params'])
+            model.train(*self.build_training_set(X, y, groups, np.arange(len(y)), augment_copies, augmenter))
+            model_path = os.path.join(output_dir, f"{algo}_model.pkl")
+            model.save_model(model_path)
+            model.export_compiled(os.path.join(output_dir, f"{algo}_model.npz"))
+            
+            best_results[algo] = dict(best, model_path=model_path)
+            print(f"{algo.upper()} 最优参数: {best['params']}, 准确率: {best['accuracy']:.4f}, "
+                  f"预测耗时: {best['predict_time_ms']:.4f} ms/样本")
+        
+        self._generate_sweep_report(sweep_results, best_results, output_dir)
+        
+        return best_results
+    
+    def _generate_sweep_report(self, sweep_results: List[Dict[str, Any]],
+                               best_results: Dict[str, Any], output_dir: str):
+        """生成超参数搜索报告（准确率与训练/推理耗时并列）"""
+        json_path = os.path.join(output_dir, 'sweep_results.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'candidates': sweep_results, 'best': best_results},
+                      f, ensure_ascii=False, indent=2, default=str)
+        
+        report_path = os.path.join(output_dir, 'sweep_report.txt')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write("超参数搜索报告\n")
+            f.write("=" * 50 + "\n\n")
+            f.write(f"{'算法':<6}{'准确率':>10}{'标准差':>10}{'训练(s)':>10}{'预测(ms/样本)':>16}  参数\n")
+            
+            for r in sorted(sweep_results, key=lambda r: (r['algorithm'], -r['accuracy'])):
+                f.write(f"{r['algorithm']:<6}{r['accuracy']:>10.4f}{r['accuracy_std']:>10.4f}"
+                        f"{r['fit_time']:>10.3f}{r['predict_time_ms']:>16.4f}  {r['params']}\n")
+            
+            f.write("\n最优配置:\n")
+            for algo, r in best_results.items():
+                f.write(f"{algo.upper()}: {r['params']} 准确率 {r['accuracy']:.4f}, "
+                        f"预测 {r['predict_time_ms']:.4f} ms/样本\n")
+        
+        print(f"超参数搜索报告已保存到: {report_path}")
+    
+    def train_deep_learning_model(self, data_path: str, output_dir: str = "trained_models",
+                                  augment: bool = False):
+        """
+        训练深度学习模型
+        
+        Args:
+            augment: 是否在每个训练批次上在线增强关键点序列
+        """
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
@@ -320,12 +592,21 @@ class ModelTrainer:
         dl_model = DeepLearningFallDetector('lstm')
         
         try:
-            dl_model.train(pose_sequences, labels, epochs=50, batch_size=32)
+            dl_model.train(pose_sequences, labels, epochs=50, batch_size=32,
+                           augmenter=PoseAugmenter() if augment else None)
             
             # 保存模型
             model_path = os.path.join(output_dir, "lstm_model.pth")
             dl_model.save_model(model_path)
             
+            # 导出CPU推理用的INT8模型，并在训练数据上检查与浮点模型的一致性和速度
+            try:
+                from deep_learning_detector import quantized_path
+                features, _ = dl_model.prepare_sequence_data(pose_sequences, labels)
+                dl_model.export_quantized(quantized_path(model_path), features)
+            except Exception as e:
+                print(f"INT8量化导出失败，将使用浮点模型: {e}")
+            
             print("深度学习模型训练完成")
             return model_path
             
@@ -378,6 +659,9 @@ class ModelTrainer:
             for algo in algorithms:
                 f.write(f"{algo.upper()} 模型:\n")
                 f.write(f"准确率: {results[algo]['accuracy']:.4f}\n")
+                if 'fit_time' in results[algo]:
+                    f.write(f"训练耗时: {results[algo]['fit_time']:.3f} s\n")
+                    f.write(f"预测耗时: {results[algo]['predict_time_ms']:.4f} ms/样本\n")
                 
                 # 详细分类报告
                 report = classification_report(y_test, results[algo]['predictions'])
@@ -386,11 +670,51 @@ class ModelTrainer:
         
         print(f"评估报告已保存到: {output_dir}")
 
+def minmax_decimate(values: np.ndarray, n_bins: int) -> np.ndarray:
+    """
+    按时间分桶抽稀，每个桶保留各列的最小值和最大值所在的样本，峰值不会被抹掉
+
+    Args:
+        values: (T,) 或 (T, D) 的时间序列
+        n_bins: 桶数（通常取绘图区域的像素宽度）
+
+    Returns:
+        按时间排序的保留样本下标
+    """
+    length = len(values)
+    if length <= 2 * n_bins:
+        return np.arange(length)
+
+    series = values.reshape(length, -1)
+    bin_size = int(np.ceil(length / n_bins))
+    n_full = length // bin_size
+    body = series[:n_full * bin_size].reshape(n_full, bin_size, -1)
+    offsets = np.arange(n_full)[:, None] * bin_size
+    keep = [np.array([0, length - 1])]
+    keep.append((body.argmin(axis=1) + offsets).ravel())
+    keep.append((body.argmax(axis=1) + offsets).ravel())
+    if n_full * bin_size < length:
+        tail = series[n_full * bin_size:]
+        keep.append(tail.argmin(axis=0) + n_full * bin_size)
+        keep.append(tail.argmax(axis=0) + n_full * bin_size)
+    return np.unique(np.concatenate(keep))
+
+
 class DataVisualizer:
     """数据可视化器"""
+
+    # 轨迹图和特征变化图使用的关键点
+    TRAJECTORY_KEYPOINTS = ['nose', 'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip']
+    FEATURE_KEYPOINTS = ['nose', 'left_shoulder', 'right_shoulder']
     
-    def __init__(self):
-        pass
+    def __init__(self, direct_png: bool = True, dpi: int = 300):
+        """
+        Args:
+            direct_png: 为True时直接用Agg画布渲染PNG，不经过pyplot全局状态（可在后台线程使用）
+            dpi: 输出分辨率，同时决定抽稀的目标点数
+        """
+        self.direct_png = direct_png
+        self.dpi = dpi
     
     def visualize_pose_data(self, poses_sequence: List[List[Dict[str, Any]]], 
                            output_path: str = "visualization"):
@@ -398,108 +722,87 @@ class DataVisualizer:
         if not os.path.exists(output_path):
             os.makedirs(output_path)
         
+        # 一次性转换为关键点数组，后续绘图都在数组上完成
+        keypoints = poses_to_array(poses_sequence)
+        
         # 提取关键点轨迹
-        keypoint_trajectories = self._extract_keypoint_trajectories(poses_sequence)
+        keypoint_trajectories = self._extract_keypoint_trajectories(keypoints)
         
         # 绘制轨迹图
         self._plot_trajectories(keypoint_trajectories, output_path)
         
         # 绘制特征变化图
-        self._plot_feature_changes(poses_sequence, output_path)
+        self._plot_feature_changes(keypoints, output_path)
     
-    def _extract_keypoint_trajectories(self, poses_sequence: List[List[Dict[str, Any]]]) -> Dict[str, List[Tuple[float, float]]]:
-        """提取关键点轨迹"""
-        trajectories = {}
-        keypoint_names = ['nose', 'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip']
-        
-        for name in keypoint_names:
-            trajectories[name] = []
-        
-        for poses in poses_sequence:
-            if poses:
-                pose = poses[0]  # 取第一个人的姿势
-                keypoints = pose['keypoints']
-                
-                for name in keypoint_names:
-                    if name in keypoints:
-                        kp = keypoints[name]
-                        trajectories[name].append((kp['x'], kp['y']))
-                    else:
-                        trajectories[name].append((0, 0))
-            else:
-                for name in keypoint_names:
-                    trajectories[name].append((0, 0))
-        
-        return trajectories
+    def _new_figure(self, figsize: Tuple[float, float], nrows: int = 1, ncols: int = 1):
+        if self.direct_png:
+            fig = Figure(figsize=figsize, dpi=self.dpi)
+            FigureCanvasAgg(fig)
+            axes = fig.subplots(nrows, ncols)
+        else:
+            fig, axes = plt.subplots(nrows, ncols, figsize=figsize, dpi=self.dpi)
+        return fig, axes
+    
+    def _save_figure(self, fig, filepath: str):
+        fig.savefig(filepath, dpi=self.dpi, bbox_inches='tight')
+        if not self.direct_png:
+            plt.close(fig)
+    
+    def _axes_pixel_width(self, fig, ax) -> int:
+        return max(1, int(ax.get_position().width * fig.get_figwidth() * self.dpi))
+    
+    def _extract_keypoint_trajectories(self, keypoints: np.ndarray) -> Dict[str, np.ndarray]:
+        """提取关键点轨迹，返回 {关键点名: (T, 2) 坐标数组}"""
+        return {name: keypoints[:, KEYPOINT_NAMES.index(name), :2]
+                for name in self.TRAJECTORY_KEYPOINTS}
     
-    def _plot_trajectories(self, trajectories: Dict[str, List[Tuple[float, float]]], 
-                          output_path: str):
+    def _plot_trajectories(self, trajectories: Dict[str, np.ndarray], output_path: str):
         """绘制关键点轨迹"""
-        plt.figure(figsize=(12, 8))
+        fig, ax = self._new_figure((12, 8))
+        n_bins = self._axes_pixel_width(fig, ax)
         
         colors = ['red', 'blue', 'green', 'orange', 'purple']
-        keypoint_names = list(trajectories.keys())
-        
-        for i, name in enumerate(keypoint_names):
-            trajectory = trajectories[name]
-            x_coords = [point[0] for point in trajectory]
-            y_coords = [point[1] for point in trajectory]
-            
-            plt.plot(x_coords, y_coords, color=colors[i], label=name, alpha=0.7)
-            plt.scatter(x_coords[0], y_coords[0], color=colors[i], s=50, marker='o')
-            plt.scatter(x_coords[-1], y_coords[-1], color=colors[i], s=50, marker='s')
-        
-        plt.title('关键点轨迹图')
-        plt.xlabel('X坐标')
-        plt.ylabel('Y坐标')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
+        for i, (name, trajectory) in enumerate(trajectories.items()):
+            if len(trajectory) == 0:
+                continue
+            # 同时保留x和y两个方向的极值点
+            kept = trajectory[minmax_decimate(trajectory, n_bins)]
+            ax.plot(kept[:, 0], kept[:, 1], color=colors[i], label=name, alpha=0.7)
+            ax.scatter(trajectory[0, 0], trajectory[0, 1], color=colors[i], s=50, marker='o')
+            ax.scatter(trajectory[-1, 0], trajectory[-1, 1], color=colors[i], s=50, marker='s')
+        
+        ax.set_title('关键点轨迹图')
+        ax.set_xlabel('X坐标')
+        ax.set_ylabel('Y坐标')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
         
         # 保存图片
         trajectory_path = os.path.join(output_path, 'keypoint_trajectories.png')
-        plt.savefig(trajectory_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        self._save_figure(fig, trajectory_path)
     
-    def _plot_feature_changes(self, poses_sequence: List[List[Dict[str, Any]]], 
-                             output_path: str):
-        """绘制特征变化图"""
-        feature_extractor = FeatureExtractor()
-        features_list = []
-        
-        for poses in poses_sequence:
-            if poses:
-                features = feature_extractor.extract_features_from_poses(poses)
-                if len(features) > 0:
-                    features_list.append(features[0])
-                else:
-                    features_list.append(np.zeros(51))  # 假设特征维度为51
-            else:
-                features_list.append(np.zeros(51))
-        
-        features_array = np.array(features_list)
-        
-        # 绘制关键特征的变化
-        key_features = [0, 1, 2, 3, 4, 5, 6, 7, 8]  # 选择一些关键特征
-        feature_names = ['nose_x', 'nose_y', 'nose_conf', 'left_shoulder_x', 
-                        'left_shoulder_y', 'left_shoulder_conf', 'right_shoulder_x',
-                        'right_shoulder_y', 'right_shoulder_conf']
-        
-        fig, axes = plt.subplots(3, 3, figsize=(15, 10))
+    def _plot_feature_changes(self, keypoints: np.ndarray, output_path: str):
+        """绘制特征变化图（头部和双肩的坐标与置信度）"""
+        fig, axes = self._new_figure((15, 10), 3, 3)
         axes = axes.flatten()
+        frames = np.arange(len(keypoints))
         
-        for i, (feature_idx, feature_name) in enumerate(zip(key_features, feature_names)):
-            axes[i].plot(features_array[:, feature_idx])
-            axes[i].set_title(feature_name)
-            axes[i].set_xlabel('帧数')
-            axes[i].set_ylabel('值')
-            axes[i].grid(True, alpha=0.3)
+        for row, name in enumerate(self.FEATURE_KEYPOINTS):
+            series = keypoints[:, KEYPOINT_NAMES.index(name)]
+            for col, suffix in enumerate(['x', 'y', 'conf']):
+                ax = axes[row * 3 + col]
+                kept = minmax_decimate(series[:, col], self._axes_pixel_width(fig, ax))
+                ax.plot(frames[kept], series[kept, col])
+                ax.set_title(f"{name}_{suffix}")
+                ax.set_xlabel('帧数')
+                ax.set_ylabel('值')
+                ax.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # 保存图片
         feature_path = os.path.join(output_path, 'feature_changes.png')
-        plt.savefig(feature_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        self._save_figure(fig, feature_path)
 
 def main():
     """主函数 - 用于测试和演示"""
@@ -518,8 +821,8 @@ def main():
     # preprocessor.process_video_dataset("path/to/dataset", "processed_data")
     
     # 2. 训练模型
-    # X, y = trainer.prepare_training_data("processed_data")
-    # results = trainer.train_traditional_ml_models(X, y)
+    # X, y, groups = trainer.prepare_training_data("processed_data")
+    # results = trainer.train_traditional_ml_models(X, y, groups=groups, augment_copies=3)
     # trainer.train_deep_learning_model("processed_data")
     
     # 3. 可视化数据
@@ -0,0 +1,168 @@
+"""
+视频索引模块
+后台线程顺序扫描视频，按固定间隔缓存低分辨率缩略图（JPEG编码，总大小有上限），
+拖动进度条时可立即显示最近的缩略图；
+同时提供按帧号缓存姿势检测结果的LRU缓存，回看已检测过的位置时跳过推理
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class VideoThumbnailIndex:
+    """
+    视频缩略图索引（后台构建，线程安全）
+
+    缩略图位置是固定帧间隔，不是关键帧：OpenCV 的 VideoCapture 不提供数据包的关键帧标记。
+    缩略图以JPEG字节保存，总大小超过 max_bytes 时间隔加倍并丢弃一半缩略图，
+    长视频仍能均匀覆盖整个进度条，内存不随时长增长
+    """
+
+    def __init__(self, video_path: str, interval: int = 15, thumb_width: int = 160,
+                 jpeg_quality: int = 80, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            video_path: 视频文件路径
+            interval: 每隔多少帧缓存一张缩略图（超出内存上限时自动加倍）
+            thumb_width: 缩略图宽度（高度按比例）
+            jpeg_quality: 缩略图JPEG质量
+            max_bytes: 缩略图总字节数上限
+        """
+        self.video_path = video_path
+        self.interval = max(1, interval)
+        self.thumb_width = thumb_width
+        self.jpeg_quality = jpeg_quality
+        self.max_bytes = max_bytes
+        self.total_frames = 0
+        self._positions: List[int] = []
+        self._thumbnails: Dict[int, bytes] = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台索引线程"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._build, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def is_complete(self) -> bool:
+        return self._thread is not None and not self._thread.is_alive() and not self._stop_event.is_set()
+
+    @property
+    def progress(self) -> float:
+        """索引进度 [0, 1]"""
+        if self.total_frames <= 0:
+            return 0.0
+        with self._lock:
+            last = self._positions[-1] if self._positions else 0
+        return min(1.0, (last + self.interval) / self.total_frames)
+
+    @property
+    def nbytes(self) -> int:
+        """已缓存缩略图的总字节数"""
+        with self._lock:
+            return self._nbytes
+
+    def _build(self):
+        # 使用独立的VideoCapture，不影响播放线程的读取位置
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            return
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        index = 0
+        try:
+            while not self._stop_event.is_set():
+                # 非采样帧只grab不解码像素，顺序扫描比逐个seek快得多
+                if index % self.interval == 0:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    height, width = frame.shape[:2]
+                    scale = self.thumb_width / width
+                    thumb = cv2.resize(frame, (self.thumb_width, max(1, int(height * scale))),
+                                       interpolation=cv2.INTER_AREA)
+                    ok, data = cv2.imencode('.jpg', thumb, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                    if ok:
+                        with self._lock:
+                            self._thumbnails[index] = data.tobytes()
+                            self._nbytes += len(self._thumbnails[index])
+                            self._positions.append(index)
+                            while self._nbytes > self.max_bytes and len(self._positions) > 1:
+                                self._thin_out()
+                elif not cap.grab():
+                    break
+                index += 1
+        finally:
+            cap.release()
+
+    def _thin_out(self):
+        """间隔加倍，只保留新间隔上的缩略图（调用方持有锁）"""
+        self.interval *= 2
+        kept = []
+        for position in self._positions:
+            if position % self.interval == 0:
+                kept.append(position)
+            else:
+                self._nbytes -= len(self._thumbnails.pop(position))
+        self._positions = kept
+
+    def nearest(self, frame_index: int) -> Optional[Tuple[int, np.ndarray]]:
+        """返回距离指定帧最近的已缓存缩略图 (帧号, BGR图像)，尚无缩略图时返回None"""
+        with self._lock:
+            if not self._positions:
+                return None
+            i = bisect.bisect_left(self._positions, frame_index)
+            candidates = self._positions[max(0, i - 1):i + 1]
+            position = min(candidates, key=lambda p: abs(p - frame_index))
+            data = self._thumbnails[position]
+        return position, cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+class FramePoseCache:
+    """按帧号缓存姿势检测结果（LRU）"""
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, frame_index: int) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            poses = self._entries.get(frame_index)
+            if poses is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(frame_index)
+            self.hits += 1
+            return poses
+
+    def put(self, frame_index: int, poses: List[Dict[str, Any]]):
+        with self._lock:
+            self._entries[frame_index] = poses
+            self._entries.move_to_end(frame_index)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -13,6 +13,8 @@ from PySide6.QtCore import Qt, QTimer, Signal, QThread
 from PySide6.QtGui import QPixmap, QImage, QFont, QIcon, QPainter, QColor
 import numpy as np
 
+from image_scanner import DEFAULT_IMAGE_FORMATS, FolderScanner
+
 try:
     from ultralytics import YOLO
 except ImportError:
@@ -21,7 +23,7 @@ except ImportError:
 
 
 class BatchDetectionThread(QThread):
-    """批量检测线程（文件夹遍历）"""
+    """批量检测线程（边扫描文件夹边检测）"""
     result_ready = Signal(str, object, object, float, list, list, list)  # 文件路径, 原图, 结果图, 耗时, 置信度, xyxy, xyxyn
     progress_updated = Signal(int)
     current_file_changed = Signal(str)  # 当前处理的文件
@@ -32,24 +34,17 @@ class BatchDetectionThread(QThread):
         self.model = model
         self.folder_path = folder_path
         self.confidence_threshold = confidence_threshold
-        self.supported_formats = supported_formats or ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp']
+        self.supported_formats = supported_formats or list(DEFAULT_IMAGE_FORMATS)
         self.is_running = False
+        self.scanner = None
 
     def run(self):
         self.is_running = True
 
-        # 收集所有支持的图片文件
-        image_files = []
-        for fmt in self.supported_formats:
-            image_files.extend(Path(self.folder_path).rglob(f'*{fmt}'))
-            image_files.extend(Path(self.folder_path).rglob(f'*{fmt.upper()}'))
-
-        total_files = len(image_files)
-        if total_files == 0:
-            self.finished.emit()
-            return
+        # 后台扫描文件夹（扩展名不区分大小写），找到第一张图片即开始检测
+        self.scanner = FolderScanner(self.folder_path, self.supported_formats).start()
 
-        for i, img_path in enumerate(image_files):
+        for i, img_path in enumerate(self.scanner):
             if not self.is_running:
                 break
 
@@ -87,15 +82,19 @@ class BatchDetectionThread(QThread):
             except Exception as e:
                 print(f"处理文件 {img_path} 时发生错误: {e}")
 
-            # 更新进度
+            # 更新进度（扫描未结束时总数为估计值）
+            total_files = max(self.scanner.estimated_total(), i + 1)
             progress = int(((i + 1) / total_files) * 100)
             self.progress_updated.emit(progress)
 
+        self.scanner.stop()
         self.is_running = False
         self.finished.emit()
 
     def stop(self):
         self.is_running = False
+        if self.scanner is not None:
+            self.scanner.stop()
 
 
 class DetectionThread(QThread):
@@ -276,6 +275,9 @@ class UniversalObjectDetectionUI(QMainWindow):
         self.detection_completed = False
         self.confidence_threshold = 0.25
         self.batch_results = []  # 存储批量检测结果
+        self.folder_scanner = None  # 选择文件夹后的后台图片统计
+        self.folder_scan_timer = QTimer(self)
+        self.folder_scan_timer.timeout.connect(self.update_folder_scan_info)
 
         self.init_ui()
         self.load_default_model()
@@ -893,25 +895,36 @@ class UniversalObjectDetectionUI(QMainWindow):
             self.log_message(f"预览文件失败: {str(e)}")
 
     def scan_folder_info(self, folder_path):
-        """扫描文件夹信息"""
-        try:
-            supported_formats = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp']
-            image_files = []
+        """扫描文件夹信息（后台统计图片数量，不阻塞界面）"""
+        if self.folder_scanner is not None:
+            self.folder_scanner.stop()
+        self.folder_scanner = FolderScanner(folder_path, stream=False).start()
+        self.statusBar().showMessage("正在扫描文件夹...")
+        self.folder_scan_timer.start(200)
+
+    def update_folder_scan_info(self):
+        """定时刷新文件夹扫描进度"""
+        scanner = self.folder_scanner
+        if scanner is None:
+            self.folder_scan_timer.stop()
+            return
 
-            for fmt in supported_formats:
-                image_files.extend(Path(folder_path).rglob(f'*{fmt}'))
-                image_files.extend(Path(folder_path).rglob(f'*{fmt.upper()}'))
+        if not scanner.finished:
+            self.statusBar().showMessage(f"正在扫描文件夹... 已找到 {scanner.found} 张图片")
+            return
 
-            count = len(image_files)
-            self.log_message(f"文件夹扫描完成: 找到 {count} 张图片")
+        self.folder_scan_timer.stop()
+        self.folder_scanner = None
+        for directory, error in scanner.errors:
+            self.log_message(f"扫描文件夹失败: {directory} - {error}")
 
-            if count > 0:
-                self.statusBar().showMessage(f"已选择文件夹 - 包含 {count} 张图片")
-            else:
-                self.statusBar().showMessage("选择的文件夹中没有找到支持的图片格式")
+        count = scanner.found
+        self.log_message(f"文件夹扫描完成: 找到 {count} 张图片")
 
-        except Exception as e:
-            self.log_message(f"扫描文件夹失败: {str(e)}")
+        if count > 0:
+            self.statusBar().showMessage(f"已选择文件夹 - 包含 {count} 张图片")
+        else:
+            self.statusBar().showMessage("选择的文件夹中没有找到支持的图片格式")
 
     def start_detection(self):
         """开始检测"""
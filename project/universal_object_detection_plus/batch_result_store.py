@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Result Store - 批量检测结果存储
+内存中只保存紧凑的检测数组（Detections）和检测线程生成的小缩略图；不保存原图和结果图，
+浏览时在后台线程从源文件读取原图并按显示尺寸绘制检测框（界面线程不做磁盘读取和解码），
+导出时按原分辨率绘制，最近查看的几张原图用LRU缓存
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+
+from detection_renderer import DetectionRenderer
+from enhanced_components import decode_image
+
+
+class BatchResultStore(QObject):
+    """批量检测结果存储"""
+    images_loaded = Signal(int, object, object)  # 索引, 原图(RGB), 结果图(RGB)；读取失败时为None
+
+    def __init__(self, max_cached_images=16, jpeg_quality=92, renderer=None):
+        """
+        Args:
+            max_cached_images: 内存中保留的已解码原图数
+            jpeg_quality: 导出结果图的JPEG质量
+            renderer: DetectionRenderer，默认新建
+        """
+        super().__init__()
+        self.max_cached_images = max_cached_images
+        self.jpeg_quality = jpeg_quality
+        self.renderer = renderer or DetectionRenderer()
+
+        self.entries = []
+        self.class_names = []
+        self._images = OrderedDict()    # {索引: BGR原图}
+        self._lock = threading.Lock()
+        self._generation = 0            # clear() 时递增，丢弃清空前发起的读取
+        self._latest_request = None     # 最新的 request_images 索引
+        # 单线程读取：快速翻页时只处理最新的请求，不会同时解码多张大图
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="BatchImageLoader")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def add(self, file_path, detections, inference_time, class_names, thumbnail=None):
+        """
+        添加一条结果，返回索引（在界面线程中调用，不做任何耗时操作）
+
+        Args:
+            thumbnail: 检测线程生成的结果缩略图（JPEG字节），见 DetectionRenderer.thumbnail
+        """
+        self.entries.append({
+            'file_path': file_path,
+            'detections': detections,
+            'inference_time': inference_time,
+            'object_count': len(detections),
+            'thumbnail': thumbnail,
+        })
+        self.class_names = class_names
+        return len(self.entries) - 1
+
+    # ----------------- 读取 -----------------
+    def _source(self, index):
+        """BGR原图：优先用LRU缓存，否则从源文件读取并放入缓存"""
+        with self._lock:
+            image = self._images.get(index)
+            if image is not None:
+                self._images.move_to_end(index)
+            generation = self._generation
+            file_path = self.entries[index]['file_path']
+        if image is not None:
+            return image
+
+        image = decode_image(file_path)
+        if image is not None:
+            with self._lock:
+                if generation != self._generation:
+                    return image  # 读取期间结果已清空，不放入新一批结果的缓存
+                self._images[index] = image
+                while len(self._images) > self.max_cached_images:
+                    self._images.popitem(last=False)
+        return image
+
+    def is_cached(self, index):
+        with self._lock:
+            return index in self._images
+
+    def load_original(self, index, target_size=None):
+        """原图（RGB），按 target_size (宽, 高) 缩放；原图直接从源文件读取，不另存副本"""
+        image = self._source(index)
+        if image is None:
+            return None
+        return self.renderer.render(image, None, target_size=target_size)
+
+    def load_result(self, index, target_size=None):
+        """结果图（RGB），在显示分辨率上按需绘制检测框"""
+        image = self._source(index)
+        if image is None:
+            return None
+        return self.renderer.render(image, self.entries[index]['detections'], self.class_names, target_size)
+
+    def request_images(self, index, original_size=None, result_size=None):
+        """
+        在后台线程读取并绘制原图和结果图，完成后发出 images_loaded（在界面线程中调用，不阻塞）；
+        尚未开始的旧请求在新请求到来后直接跳过
+        """
+        with self._lock:
+            self._latest_request = index
+            generation = self._generation
+        self._executor.submit(self._load_images, index, generation, original_size, result_size)
+
+    def _load_images(self, index, generation, original_size, result_size):
+        with self._lock:
+            if index != self._latest_request or generation != self._generation:
+                return
+        try:
+            original = self.load_original(index, original_size)
+            result = self.load_result(index, result_size)
+        except (IndexError, cv2.error) as e:
+            original = result = None
+            error = e
+        else:
+            error = None
+        with self._lock:
+            if generation != self._generation:
+                return  # 读取期间结果已清空
+        if error is not None:
+            print(f"读取批量结果图片失败: {error}")
+        self.images_loaded.emit(index, original, result)
+
+    def thumbnail(self, index):
+        """结果图缩略图（RGB），尚未生成时返回None"""
+        data = self.entries[index]['thumbnail']
+        if data is None:
+            return None
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    def export_result(self, index, dest_path):
+        """按原分辨率绘制结果图并写入 dest_path"""
+        image = self._source(index)
+        if image is None:
+            return False
+        result = self.renderer.render(image, self.entries[index]['detections'], self.class_names, to_rgb=False)
+        suffix = Path(dest_path).suffix.lower() or '.jpg'
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality] if suffix in ('.jpg', '.jpeg') else []
+        ok, data = cv2.imencode(suffix, result, params)
+        if ok:
+            data.tofile(str(dest_path))
+        return bool(ok)
+
+    # ----------------- 统计 -----------------
+    def class_counts(self, index):
+        return self.entries[index]['detections'].class_counts(self.class_names)
+
+    def total_objects(self):
+        return sum(entry['object_count'] for entry in self.entries)
+
+    # ----------------- 清理 -----------------
+    def clear(self):
+        """清空结果"""
+        with self._lock:
+            self.entries = []
+            self._images.clear()
+            self._generation += 1
+            self._latest_request = None
+
+    def close(self):
+        """清空结果，释放缓存的原图，停止后台读取线程"""
+        self.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
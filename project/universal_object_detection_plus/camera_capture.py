@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Camera Capture - 摄像头采集与监管
+每个摄像头一个采集线程，持续读帧但只保留最新一帧；推理线程随时取各摄像头的最新帧
+组成一批统一推理。CaptureSupervisor 负责各采集线程的健康状态：打开/读帧超时的摄像头
+被判定为无响应并在新线程中重连，失败后按指数退避重试，一个摄像头故障不会拖慢其他摄像头
+"""
+import random
+import sys
+import threading
+import time
+
+import cv2
+
+# 所有摄像头使用同一套打开参数（首次打开和重连一致）
+CAMERA_BACKEND = cv2.CAP_DSHOW if sys.platform == 'win32' else cv2.CAP_ANY
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+CAMERA_FPS = 30
+
+# 健康状态
+STATE_CONNECTING = 'connecting'
+STATE_ONLINE = 'online'
+STATE_STALLED = 'stalled'
+STATE_RECONNECTING = 'reconnecting'
+STATE_OFFLINE = 'offline'
+STATE_STOPPED = 'stopped'
+
+STATE_TEXT = {
+    STATE_CONNECTING: "连接中…",
+    STATE_ONLINE: "在线",
+    STATE_STALLED: "无响应",
+    STATE_RECONNECTING: "重连中…",
+    STATE_OFFLINE: "离线",
+    STATE_STOPPED: "已停止",
+}
+
+
+def open_camera(camera_id, width=CAMERA_WIDTH, height=CAMERA_HEIGHT, fps=CAMERA_FPS, backend=CAMERA_BACKEND):
+    """按统一参数打开摄像头，失败返回None"""
+    cap = cv2.VideoCapture(camera_id, backend)
+    if not cap.isOpened():
+        cap.release()
+        return None
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    return cap
+
+
+class CameraCapture:
+    """单个摄像头的采集线程（由 CaptureSupervisor 创建和监管）"""
+
+    def __init__(self, camera_id, frame_event=None, on_state=None, width=CAMERA_WIDTH, height=CAMERA_HEIGHT,
+                 fps=CAMERA_FPS, read_timeout=3.0, open_timeout=10.0, backoff_initial=1.0, backoff_max=30.0):
+        """
+        Args:
+            camera_id: 摄像头索引
+            frame_event: threading.Event，有新帧时置位，用于唤醒推理线程
+            on_state: 状态回调 (camera_id, 状态, 说明)
+            width, height, fps: 打开参数
+            read_timeout: 单次读帧超过该时间判定为无响应
+            open_timeout: 打开摄像头超过该时间判定为无响应
+            backoff_initial, backoff_max: 重连等待时间的初值和上限（秒），每次失败翻倍
+        """
+        self.camera_id = camera_id
+        self.frame_event = frame_event
+        self.on_state = on_state
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.read_timeout = read_timeout
+        self.open_timeout = open_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.state = STATE_CONNECTING
+        self.failures = 0             # 连续失败次数，决定退避时间
+
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0                 # 帧序号，推理线程据此判断是否有新帧
+        self._frame_time = 0.0
+        self._busy = None             # (阻塞操作, 开始时间)，供看门狗判断超时
+        self._generation = 0          # 看门狗放弃卡住的线程时加一，旧线程返回后自行退出
+        self._stop_event = threading.Event()
+        self._thread = None           # 当前采集线程（被放弃的线程不再跟踪）
+
+    # ----------------- 生命周期 -----------------
+    def start(self, delay=0.0):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        thread = threading.Thread(target=self._loop, args=(generation, delay),
+                                  name=f"Camera-{self.camera_id}-{generation}", daemon=True)
+        self._thread = thread
+        thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """停止采集；卡在驱动调用中的线程最多等待 timeout（daemon，返回后自行释放）"""
+        self._stop_event.set()
+        with self._lock:
+            self._generation += 1
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._set_state(STATE_STOPPED)
+
+    def latest(self, after_seq=0):
+        """最新一帧 (序号, BGR帧, 采集时间)；没有比 after_seq 更新的帧时返回None"""
+        with self._lock:
+            if self._frame is None or self._seq <= after_seq:
+                return None
+            return self._seq, self._frame, self._frame_time
+
+    # ----------------- 看门狗 -----------------
+    def check_stalled(self, now=None):
+        """打开或读帧超时则放弃当前线程，退避后在新线程中重连；返回是否判定为无响应"""
+        if self._stop_event.is_set():
+            return False
+        now = now or time.time()
+        busy = self._busy
+        if busy is None:
+            return False
+        operation, since = busy
+        limit = self.open_timeout if operation == 'open' else self.read_timeout
+        if now - since <= limit:
+            return False
+
+        self._busy = None
+        self.failures += 1
+        action = "打开" if operation == 'open' else "读帧"
+        self._set_state(STATE_STALLED, f"{action}超时 ({now - since:.1f}s)")
+        self.start(delay=self._backoff())
+        return True
+
+    # ----------------- 采集线程 -----------------
+    def _backoff(self):
+        """指数退避时间（带±20%抖动，避免多个摄像头同时重连）"""
+        delay = min(self.backoff_initial * (2 ** max(self.failures - 1, 0)), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _set_state(self, state, detail=""):
+        self.state = state
+        if self.on_state is not None:
+            self.on_state(self.camera_id, state, detail)
+
+    def _current(self, generation):
+        return generation == self._generation and not self._stop_event.is_set()
+
+    def _blocking(self, generation, operation, func):
+        """执行可能阻塞的驱动调用，并登记开始时间供看门狗检查"""
+        self._busy = (operation, time.time())
+        try:
+            return func()
+        finally:
+            if generation == self._generation:
+                self._busy = None
+
+    def _loop(self, generation, delay):
+        if delay and self._stop_event.wait(delay):
+            return
+        cap = None
+        try:
+            while self._current(generation):
+                if cap is None:
+                    self._set_state(STATE_CONNECTING if self._seq == 0 else STATE_RECONNECTING)
+                    cap = self._blocking(generation, 'open', lambda: open_camera(
+                        self.camera_id, self.width, self.height, self.fps))
+                    if not self._current(generation):
+                        break
+                    if cap is None:
+                        self.failures += 1
+                        wait = self._backoff()
+                        self._set_state(STATE_OFFLINE, f"无法打开，{wait:.1f}s 后重试")
+                        if self._stop_event.wait(wait):
+                            break
+                        continue
+                    self._set_state(STATE_ONLINE)
+
+                ret, frame = self._blocking(generation, 'read', cap.read)
+                if not self._current(generation):
+                    break
+                if not ret:
+                    cap.release()
+                    cap = None
+                    self.failures += 1
+                    wait = self._backoff()
+                    self._set_state(STATE_RECONNECTING, f"读帧失败，{wait:.1f}s 后重试")
+                    if self._stop_event.wait(wait):
+                        break
+                    continue
+
+                self.failures = 0
+                with self._lock:
+                    self._frame = frame
+                    self._seq += 1
+                    self._frame_time = time.time()
+                if self.frame_event is not None:
+                    self.frame_event.set()
+        finally:
+            if cap is not None:
+                cap.release()
+
+
+class CaptureSupervisor:
+    """持有全部摄像头采集线程，并用看门狗线程检查打开/读帧超时"""
+
+    def __init__(self, camera_ids, frame_event=None, on_state=None, check_interval=0.5, **capture_options):
+        """
+        Args:
+            camera_ids: 摄像头索引列表
+            frame_event: 任一摄像头有新帧时置位的 threading.Event
+            on_state: 状态回调 (camera_id, 状态, 说明)
+            check_interval: 看门狗检查间隔（秒）
+            capture_options: 传给 CameraCapture 的其他参数（超时、退避等）
+        """
+        self.frame_event = frame_event or threading.Event()
+        self.check_interval = check_interval
+        self.captures = {cid: CameraCapture(cid, self.frame_event, on_state, **capture_options)
+                         for cid in camera_ids}
+        self._stop_event = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        for capture in self.captures.values():
+            capture.start()
+        self._watchdog = threading.Thread(target=self._watch, name="CaptureSupervisor", daemon=True)
+        self._watchdog.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+        for capture in self.captures.values():
+            capture.stop()
+
+    def latest(self, camera_id, after_seq=0):
+        return self.captures[camera_id].latest(after_seq)
+
+    def states(self):
+        return {cid: capture.state for cid, capture in self.captures.items()}
+
+    def _watch(self):
+        while not self._stop_event.wait(self.check_interval):
+            now = time.time()
+            for capture in self.captures.values():
+                capture.check_stalled(now)
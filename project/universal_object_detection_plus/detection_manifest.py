@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detection Manifest - 批量检测结果清单
+以 SQLite 文件保存在输出目录中，按图片路径记录文件大小、修改时间、模型哈希、置信度阈值
+和检测数组。再次批量检测同一文件夹时，未变化的图片直接复用清单中的结果，
+中途停止或崩溃后重新运行会从上次完成的位置继续
+"""
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+from detection_renderer import Detections
+
+MANIFEST_FILENAME = "detection_manifest.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    model_hash TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    inference_time REAL NOT NULL,
+    boxes BLOB NOT NULL,
+    classes BLOB NOT NULL,
+    scores BLOB NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_fingerprint(model):
+    """
+    模型哈希：优先使用权重文件内容的SHA-256，
+    找不到权重文件时退化为类别名称的哈希（此时更换同类别的权重不会使清单失效）
+    """
+    weights = getattr(model, 'ckpt_path', None) or getattr(model, 'model_name', None)
+    if weights and os.path.isfile(str(weights)):
+        return file_sha256(str(weights))
+    names = getattr(model, 'names', {})
+    return "names:" + hashlib.sha256(repr(sorted(dict(names).items())).encode('utf-8')).hexdigest()
+
+
+class DetectionManifest:
+    """批量检测结果清单（只在创建它的线程中使用）"""
+
+    def __init__(self, output_dir, model_hash, confidence_threshold):
+        """
+        Args:
+            output_dir: 输出目录，清单文件保存为 output_dir/detection_manifest.sqlite
+            model_hash: 模型哈希，见 model_fingerprint
+            confidence_threshold: 置信度阈值，阈值不同的记录视为失效
+        """
+        self.path = Path(output_dir) / MANIFEST_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.model_hash = model_hash
+        self.confidence_threshold = float(confidence_threshold)
+        self._signatures = {}   # {路径: (size, mtime_ns)}，lookup 未命中时记下，record 时使用
+
+        self._conn = sqlite3.connect(str(self.path))
+        # WAL 模式下每批提交的开销小，崩溃时已提交的批次不会丢失
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(str(path))
+
+    def lookup(self, path, stat=None):
+        """
+        查询图片的已有结果
+
+        Args:
+            path: 图片路径
+            stat: 已有的 os.stat 结果（可选，避免重复stat）
+
+        Returns:
+            (Detections, 推理耗时)；图片为新增/已修改、或模型/阈值不同时返回None
+        """
+        key = self._key(path)
+        if stat is None:
+            stat = os.stat(key)
+        signature = (stat.st_size, stat.st_mtime_ns)
+
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, model_hash, confidence, inference_time, boxes, classes, scores "
+            "FROM results WHERE path = ?", (key,)).fetchone()
+        if (row is not None and (row[0], row[1]) == signature and row[2] == self.model_hash
+                and abs(row[3] - self.confidence_threshold) < 1e-6):
+            detections = Detections(np.frombuffer(row[5], dtype=np.float32).reshape(-1, 4),
+                                    np.frombuffer(row[6], dtype=np.int32),
+                                    np.frombuffer(row[7], dtype=np.float32))
+            return detections, row[4]
+
+        self._signatures[key] = signature
+        return None
+
+    def record(self, path, detections, inference_time):
+        """记录一张图片的检测结果（调用 commit 后落盘）"""
+        key = self._key(path)
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            stat = os.stat(key)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, signature[0], signature[1], self.model_hash, self.confidence_threshold, float(inference_time),
+             np.ascontiguousarray(detections.boxes, dtype=np.float32).tobytes(),
+             np.ascontiguousarray(detections.classes, dtype=np.int32).tobytes(),
+             np.ascontiguousarray(detections.scores, dtype=np.float32).tobytes(),
+             time.time()))
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
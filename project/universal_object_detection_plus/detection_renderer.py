@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detection Renderer - 检测结果渲染
+检测线程只输出紧凑的检测数组 (Detections)，检测框在图片真正显示或导出时才绘制，
+并且先缩放到显示尺寸再绘制，不再为每一帧生成全分辨率的结果图
+"""
+import cv2
+import numpy as np
+
+# 与ultralytics默认调色板一致的类别颜色（RGB十六进制）
+_PALETTE_HEX = ('FF3838', 'FF9D97', 'FF701F', 'FFB21D', 'CFD231', '48F90A', '92CC17', '3DDB86',
+                '1A9334', '00D4BB', '2C99A8', '00C2FF', '344593', '6473FF', '0018EC', '8438FF',
+                '520085', 'CB38FF', 'FF95C8', 'FF37C7')
+_PALETTE_BGR = [tuple(int(h[i:i + 2], 16) for i in (4, 2, 0)) for h in _PALETTE_HEX]
+
+
+def class_color(cls):
+    """类别对应的BGR颜色"""
+    return _PALETTE_BGR[int(cls) % len(_PALETTE_BGR)]
+
+
+class Detections:
+    """单帧检测结果：boxes[N,4] (xyxy, 原图坐标)、classes[N]、scores[N]"""
+
+    __slots__ = ('boxes', 'classes', 'scores')
+
+    def __init__(self, boxes, classes, scores):
+        self.boxes = boxes
+        self.classes = classes
+        self.scores = scores
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int32),
+                   np.zeros(0, dtype=np.float32))
+
+    @classmethod
+    def from_result(cls, result):
+        """从单个ultralytics Results对象提取检测数组"""
+        boxes = getattr(result, 'boxes', None)
+        if boxes is None or len(boxes) == 0:
+            return cls.empty()
+        return cls(boxes.xyxy.cpu().numpy().astype(np.float32),
+                   boxes.cls.cpu().numpy().astype(np.int32),
+                   boxes.conf.cpu().numpy().astype(np.float32))
+
+    def __len__(self):
+        return len(self.scores)
+
+    def class_name(self, cls, class_names):
+        return class_names[cls] if cls < len(class_names) else f"类别{cls}"
+
+    def class_counts(self, class_names):
+        """{类别名称: 数量}"""
+        counts = {}
+        for cls in self.classes:
+            name = self.class_name(cls, class_names)
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+
+class DetectionRenderer:
+    """把检测框绘制到（缩放后的）图片上"""
+
+    def __init__(self, line_width=None, show_conf=True):
+        """
+        Args:
+            line_width: 线宽，默认按输出图片尺寸自动选择
+            show_conf: 标签中是否显示置信度
+        """
+        self.line_width = line_width
+        self.show_conf = show_conf
+
+    @staticmethod
+    def fit_scale(width, height, target_size):
+        """保持宽高比缩放到 target_size (宽, 高) 以内的比例，不放大"""
+        if not target_size:
+            return 1.0
+        target_w, target_h = target_size
+        if target_w <= 0 or target_h <= 0:
+            return 1.0
+        return min(target_w / width, target_h / height, 1.0)
+
+    def render(self, image, detections=None, class_names=(), target_size=None, to_rgb=True):
+        """
+        缩放并绘制检测框
+
+        Args:
+            image: BGR原图
+            detections: Detections，为None时只缩放
+            target_size: 输出尺寸上限 (宽, 高)，None表示原分辨率（导出时使用）
+            to_rgb: 是否转换为RGB（界面显示用）
+
+        Returns:
+            新图片，不修改输入
+        """
+        height, width = image.shape[:2]
+        scale = self.fit_scale(width, height, target_size)
+        if scale < 1.0:
+            canvas = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                                interpolation=cv2.INTER_AREA)
+        else:
+            canvas = image.copy()
+
+        if detections is not None and len(detections) > 0:
+            self._draw(canvas, detections, class_names, scale)
+
+        if to_rgb:
+            cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB, dst=canvas)
+        return canvas
+
+    def thumbnail(self, image, detections=None, class_names=(), width=160, quality=80):
+        """宽度为 width 的结果缩略图（JPEG字节），先缩小再画框；编码失败返回None"""
+        height, src_width = image.shape[:2]
+        thumb_size = (width, max(1, int(height * width / src_width)))
+        thumb = self.render(image, detections, class_names, thumb_size, to_rgb=False)
+        ok, data = cv2.imencode('.jpg', thumb, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return data.tobytes() if ok else None
+
+    def _draw(self, canvas, detections, class_names, scale):
+        height, width = canvas.shape[:2]
+        line_width = self.line_width or max(round((height + width) / 2 * 0.003), 2)
+        font_scale = line_width / 3
+        font_thickness = max(line_width - 1, 1)
+
+        boxes = np.round(detections.boxes * scale).astype(np.int32)
+        for box, cls, score in zip(boxes, detections.classes, detections.scores):
+            color = class_color(cls)
+            x1, y1, x2, y2 = box.tolist()
+            cv2.rectangle(canvas, (x1, y1), (x2, y2), color, line_width, cv2.LINE_AA)
+
+            label = detections.class_name(cls, class_names)
+            if self.show_conf:
+                label = f"{label} {score:.2f}"
+            (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)
+            outside = y1 - text_h - 3 >= 0
+            top = y1 - text_h - 3 if outside else y1
+            bottom = y1 if outside else y1 + text_h + 3
+            cv2.rectangle(canvas, (x1, top), (x1 + text_w, bottom), color, -1, cv2.LINE_AA)
+            cv2.putText(canvas, label, (x1, bottom - 2), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                        (255, 255, 255), font_thickness, cv2.LINE_AA)
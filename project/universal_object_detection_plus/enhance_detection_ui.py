@@ -1,4 +1,3 @@
-import sys
 import os
 import cv2
 import time
@@ -19,11 +18,7 @@ from PySide6.QtGui import (QPixmap, QImage, QFont, QIcon, QPainter, QColor,
                            QLinearGradient, QBrush, QPen, QPolygonF, QRadialGradient)
 import numpy as np
 
-try:
-    from ultralytics import YOLO
-except ImportError:
-    print("错误: 请安装ultralytics库: pip install ultralytics")
-    sys.exit(1)
+from model_registry import get_model_registry
 
 # 检测摄像头（通常前4个索引）
 MAX_PROBE = 10  # 最多探测到 /dev/video9
@@ -120,9 +115,9 @@ class ModelManager:
         return models
 
     def load_model(self, model_path):
-        """加载模型"""
+        """加载模型（阻塞；已加载过的模型直接从共享注册表取出）"""
         try:
-            self.current_model = YOLO(model_path)
+            self.current_model = get_model_registry().load(model_path)
             self.class_names = list(self.current_model.names.values())
             return True
         except Exception as e:
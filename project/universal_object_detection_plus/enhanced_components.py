@@ -4,112 +4,239 @@
 Enhanced Components - 增强组件模块
 包含批量检测、结果显示、监控等组件
 """
+import os
 import threading
 
 import cv2
 import time
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 
+from camera_capture import (STATE_CONNECTING, STATE_OFFLINE, STATE_ONLINE, STATE_RECONNECTING, STATE_STALLED,
+                            STATE_STOPPED, STATE_TEXT, CaptureSupervisor)
+from detection_manifest import DetectionManifest, model_fingerprint
+from detection_renderer import Detections, DetectionRenderer
+from image_scanner import DEFAULT_IMAGE_FORMATS, FolderScanner
+from model_registry import get_model_registry
+
+
+def decode_image(path):
+    """读取图片为BGR数组（np.fromfile + imdecode 支持中文路径），失败返回None"""
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except OSError:
+        return None
+    if data.size == 0:
+        return None
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
 
 class BatchDetectionThread(QThread):
-    """批量检测线程"""
-    result_ready = Signal(str, object, object, float, object, list)  # 文件路径, 原图, 结果图, 耗时, 检测结果, 类别名称
+    """
+    批量检测线程
+
+    文件夹边扫描边检测（FolderScanner），线程池提前解码后续批次的图片，模型每次接收 batch_size 张已解码的数组；
+    只输出检测数组和小缩略图，结果图由界面在显示时按需绘制；缩略图在本线程生成，
+    整帧图片不经过信号队列，界面处理不过来时也不会在队列中堆积。
+    指定 output_dir 时结果同时写入输出目录中的清单，未变化的图片直接复用清单结果
+    （此时缩略图参数为None），停止后重新运行会从中断处继续
+    """
+    result_ready = Signal(str, object, object, float, list)  # 文件路径, 缩略图JPEG（复用清单时为None）, Detections, 耗时, 类别名称
     progress_updated = Signal(int)
     current_file_changed = Signal(str)
     status_changed = Signal(str)
     error_occurred = Signal(str)
     finished = Signal()
 
-    def __init__(self, model, folder_path, confidence_threshold=0.25, supported_formats=None):
+    def __init__(self, model, folder_path, confidence_threshold=0.25, supported_formats=None,
+                 batch_size=8, decode_workers=None, prefetch_batches=2, output_dir=None, model_hash=None,
+                 renderer=None, thumb_width=160):
+        """
+        Args:
+            batch_size: 每次送入模型的图片数
+            decode_workers: 解码线程数，默认 min(8, CPU核数)
+            prefetch_batches: 推理当前批次时提前解码的批次数
+            output_dir: 输出目录，保存结果清单；为None时不使用清单
+            model_hash: 模型哈希，默认由权重文件计算
+            renderer: 生成缩略图的 DetectionRenderer，默认新建
+            thumb_width: 缩略图宽度
+        """
         super().__init__()
         self.model = model
         self.folder_path = folder_path
         self.confidence_threshold = confidence_threshold
-        self.supported_formats = supported_formats or ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp', '.tif']
+        self.supported_formats = supported_formats or list(DEFAULT_IMAGE_FORMATS)
+        self.batch_size = max(1, batch_size)
+        self.decode_workers = decode_workers or min(8, os.cpu_count() or 1)
+        self.prefetch_batches = max(0, prefetch_batches)
+        self.output_dir = output_dir
+        self.model_hash = model_hash
+        self.renderer = renderer or DetectionRenderer()
+        self.thumb_width = thumb_width
         self.is_running = False
         self.processed_count = 0
         self.error_count = 0
+        self.skipped_count = 0
+        self.scanner = None
+        self._reported = 0
 
     def run(self):
         self.is_running = True
+        manifest = None
 
         try:
-            # 收集所有支持的图片文件
-            image_files = []
-            for fmt in self.supported_formats:
-                image_files.extend(Path(self.folder_path).rglob(f'*{fmt}'))
-                # image_files.extend(Path(self.folder_path).rglob(f'*{fmt.upper()}'))
-
-            total_files = len(image_files)
-            if total_files == 0:
-                self.status_changed.emit("文件夹中没有找到支持的图片格式")
-                self.finished.emit()
-                return
-
-            self.status_changed.emit(f"开始批量处理 {total_files} 个文件...")
+            # 后台扫描文件夹，找到的图片立即进入检测流程
+            self.scanner = FolderScanner(self.folder_path, self.supported_formats).start()
+            image_files = iter(self.scanner)
+            self.status_changed.emit("开始批量处理（边扫描边检测）...")
 
             # 获取类别名称
             class_names = list(self.model.names.values())
 
-            for i, img_path in enumerate(image_files):
-                if not self.is_running:
-                    break
-
-                self.current_file_changed.emit(str(img_path))
-
-                try:
-                    # 处理单个图片
-                    start_time = time.time()
-                    results = self.model(str(img_path), conf=self.confidence_threshold, verbose=False)
-                    end_time = time.time()
-
-                    # 获取原图
-                    original_img = cv2.imread(str(img_path))
-                    if original_img is not None:
-                        original_img = cv2.cvtColor(original_img, cv2.COLOR_BGR2RGB)
-
-                        # 获取结果图
-                        result_img = results[0].plot()
-                        result_img = cv2.cvtColor(result_img, cv2.COLOR_BGR2RGB)
-
-                        self.result_ready.emit(str(img_path), original_img, result_img,
-                                               end_time - start_time, results, class_names)
-                        self.processed_count += 1
-
-                except Exception as e:
-                    self.error_occurred.emit(f"处理文件 {img_path.name} 时发生错误: {str(e)}")
-                    self.error_count += 1
-
-                # 更新进度
-                progress = int(((i + 1) / total_files) * 100)
-                self.progress_updated.emit(progress)
+            if self.output_dir:
+                manifest = DetectionManifest(self.output_dir, self.model_hash or model_fingerprint(self.model),
+                                             self.confidence_threshold)
+                image_files = self._changed_files(image_files, manifest, class_names)
+
+            for batch in self._decoded_batches(image_files):
+                paths = [path for path, img in batch if img is not None]
+                frames = [img for path, img in batch if img is not None]
+                for path, img in batch:
+                    if img is None:
+                        self.error_occurred.emit(f"处理文件 {Path(path).name} 时发生错误: 无法读取图片")
+                        self.error_count += 1
+
+                if frames:
+                    self.current_file_changed.emit(str(paths[-1]))
+                    self._infer_batch(paths, frames, class_names, manifest)
+                    if manifest is not None:
+                        manifest.commit()
+
+                self._report_progress()
+
+            for directory, error in self.scanner.errors:
+                self.error_occurred.emit(f"无法读取文件夹 {directory}: {error}")
+            if self.scanner.found == 0:
+                self.status_changed.emit("文件夹中没有找到支持的图片格式")
+                self.finished.emit()
+                return
 
-                # 状态更新
-                if (i + 1) % 10 == 0 or i == total_files - 1:
-                    self.status_changed.emit(
-                        f"处理进度: {i + 1}/{total_files} (成功: {self.processed_count}, 错误: {self.error_count})")
+            self._report_progress()
+            if self.skipped_count:
+                self.status_changed.emit(
+                    f"处理完成: 新增/修改 {self.processed_count} 张, 复用清单结果 {self.skipped_count} 张, "
+                    f"错误 {self.error_count} 张")
 
         except Exception as e:
             self.error_occurred.emit(f"批量处理发生错误: {str(e)}")
         finally:
+            if self.scanner is not None:
+                self.scanner.stop()
+            if manifest is not None:
+                manifest.close()
             self.is_running = False
             # self.finished.emit()
 
+    def _changed_files(self, image_files, manifest, class_names):
+        """产出需要检测的文件；清单中已有且未变化的文件直接发出已有结果"""
+        for path in image_files:
+            if not self.is_running:
+                return
+            try:
+                cached = manifest.lookup(path)
+            except OSError:
+                cached = None   # 文件已被删除等情况，交给解码阶段报错
+            if cached is None:
+                yield path
+                continue
+            detections, inference_time = cached
+            self.result_ready.emit(str(path), None, detections, inference_time, class_names)
+            self.skipped_count += 1
+            if self.skipped_count % 100 == 0:
+                self._report_progress()
+
+    def _report_progress(self):
+        done = self.processed_count + self.error_count + self.skipped_count
+        previous, self._reported = self._reported, done
+        # 扫描未结束时总数为估计值
+        total = max(self.scanner.estimated_total(), done, 1)
+        self.progress_updated.emit(int(done / total * 100))
+
+        # 状态更新
+        if done // 10 != previous // 10 or (self.scanner.finished and done == total):
+            status = f"处理进度: {self.scanner.progress_text(done)} (成功: {self.processed_count}, 错误: {self.error_count}"
+            if self.skipped_count:
+                status += f", 未变化: {self.skipped_count}"
+            self.status_changed.emit(status + ")")
+
+    def _decoded_batches(self, image_files):
+        """按顺序产出 [(路径, BGR数组或None), ...] 批次，后续批次在线程池中提前解码"""
+        window = self.batch_size * (self.prefetch_batches + 1)
+        files = iter(image_files)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.decode_workers) as pool:
+            try:
+                while self.is_running:
+                    while len(pending) < window:
+                        path = next(files, None)
+                        if path is None:
+                            break
+                        pending.append((path, pool.submit(decode_image, str(path))))
+                    if not pending:
+                        break
+                    batch = [pending.popleft() for _ in range(min(self.batch_size, len(pending)))]
+                    yield [(path, future.result()) for path, future in batch]
+            finally:
+                # 停止时丢弃尚未开始的解码任务
+                for _, future in pending:
+                    future.cancel()
+
+    def _infer_batch(self, paths, frames, class_names, manifest=None):
+        try:
+            start_time = time.time()
+            results = self.model(frames, conf=self.confidence_threshold, verbose=False)
+            per_image = (time.time() - start_time) / len(frames)
+        except Exception as e:
+            self.error_occurred.emit(f"批次推理失败 ({len(frames)} 张): {str(e)}")
+            self.error_count += len(frames)
+            return
+
+        for path, frame, result in zip(paths, frames, results):
+            try:
+                detections = Detections.from_result(result)
+                if manifest is not None:
+                    manifest.record(path, detections, per_image)
+                thumbnail = self.renderer.thumbnail(frame, detections, class_names, self.thumb_width)
+                self.result_ready.emit(str(path), thumbnail, detections, per_image, class_names)
+                self.processed_count += 1
+            except Exception as e:
+                self.error_occurred.emit(f"处理文件 {Path(path).name} 时发生错误: {str(e)}")
+                self.error_count += 1
+
     def stop(self):
         """停止批量检测"""
         self.is_running = False
+        if self.scanner is not None:
+            self.scanner.stop()
 
 
 
 class MultiCameraMonitorThread(QThread):
-    camera_result_ready = Signal(int, object, object, float, object, list)
+    """
+    多摄像头监控线程
+
+    每个摄像头由独立的采集线程读帧并只保留最新帧，CaptureSupervisor 负责超时检测和退避重连；
+    本线程收集各摄像头已就绪的新帧，合成一批调用一次模型，再把结果分发回各摄像头
+    """
+    camera_result_ready = Signal(int, object, object, float, list)  # 摄像头ID, BGR帧, Detections, 耗时, 类别名称
     camera_error        = Signal(int, str)
-    camera_status       = Signal(int, str)
+    camera_health       = Signal(int, str, str)  # 摄像头ID, 状态（camera_capture.STATE_*）, 说明
     finished            = Signal()
 
     def __init__(self, model, camera_ids, conf=0.25, fps=10):
@@ -117,10 +244,11 @@ class MultiCameraMonitorThread(QThread):
         self.model   = model
         self.cam_ids = camera_ids
         self.conf    = conf
-        self.period  = 1.0 / fps                # 帧间隔
-        self.caps    = {}                       # {id: cv2.VideoCapture}
-        self.active  = {}                       # {id: bool} 是否在线
+        self.period  = 1.0 / fps                # 每个摄像头的推理间隔
+        self.supervisor = None                  # CaptureSupervisor
+        self.last_seq = {}                      # {id: 已推理的帧序号}
         self.last_t  = {}                       # {id: float}
+        self._frame_event = threading.Event()   # 任一摄像头有新帧时置位
 
         # 线程同步
         self._run_flag   = True
@@ -131,10 +259,6 @@ class MultiCameraMonitorThread(QThread):
     # ----------------- 生命周期 -----------------
     def run(self):
         self._open_all()
-        if not self.caps:
-            self.finished.emit()
-            return
-
         cls_names = list(self.model.names.values())
 
         while self._run_flag:
@@ -143,18 +267,22 @@ class MultiCameraMonitorThread(QThread):
                 self._pause_cond.wait(self._pause_mutex)
             self._pause_mutex.unlock()
 
-            for cid in list(self.caps.keys()):
-                if not self._run_flag:
-                    break
-                if not self._grab_and_infer(cid, cls_names):
-                    self._reconnect_later(cid)      # 断线后异步重连
-            self.msleep(10)
+            # 等待新帧（超时保证按推理间隔轮询）
+            self._frame_event.wait(min(self.period, 0.1))
+            self._frame_event.clear()
+            if not self._run_flag:
+                break
+
+            batch = self._collect_frames()
+            if batch:
+                self._infer_batch(batch, cls_names)
 
         self._close_all()
         self.finished.emit()
 
     def stop(self):
         self._run_flag = False
+        self._frame_event.set()
         self.resume()               # 确保等待线程被唤醒
         self.wait()
 
@@ -172,75 +300,46 @@ class MultiCameraMonitorThread(QThread):
     # ----------------- 私有工具 -----------------
     def _open_all(self):
         for cid in self.cam_ids:
-            cap = cv2.VideoCapture(cid, cv2.CAP_DSHOW)
-            if cap.isOpened():
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                cap.set(cv2.CAP_PROP_FPS, 30)
-                self.caps[cid] = cap
-                self.active[cid] = True
-                self.last_t[cid] = 0.0
-                self.camera_status.emit(cid, "已连接")
-            else:
-                self.camera_error.emit(cid, "无法打开")
-                cap.release()
+            self.last_seq[cid] = 0
+            self.last_t[cid] = 0.0
+        # 摄像头在各自线程中打开，不阻塞本线程
+        self.supervisor = CaptureSupervisor(self.cam_ids, self._frame_event, self.camera_health.emit).start()
 
     def _close_all(self):
-        for cap in self.caps.values():
-            cap.release()
-        self.caps.clear()
-
-    def _grab_and_infer(self, cid, cls_names):
-        cap = self.caps.get(cid)
-        if not cap or not cap.isOpened():
-            return False
-
-        # 读帧非阻塞：先 grab 再 retrieve
-        if not cap.grab():
-            return False
+        if self.supervisor is not None:
+            self.supervisor.stop()
+            self.supervisor = None
 
+    def _collect_frames(self):
+        """各摄像头到了推理间隔且有新帧的，取其最新帧 [(id, 帧)]"""
         now = time.time()
-        if now - self.last_t[cid] < self.period:
-            return True   # 未超时，但帧已 grab，避免堆积
-        self.last_t[cid] = now
-
-        ret, frame = cap.retrieve()
-        if not ret:
-            return False
-
+        batch = []
+        for cid in self.cam_ids:
+            if now - self.last_t[cid] < self.period:
+                continue
+            latest = self.supervisor.latest(cid, self.last_seq[cid])
+            if latest is None:
+                continue
+            self.last_seq[cid], frame, _ = latest
+            self.last_t[cid] = now
+            batch.append((cid, frame))
+        return batch
+
+    def _infer_batch(self, batch, cls_names):
+        frames = [frame for _, frame in batch]
         try:
             t0 = time.time()
-            results = self.model(frame, conf=self.conf, verbose=False)
-            infer_ms = (time.time() - t0) * 1000
-            out_img = results[0].plot()
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgb_out   = cv2.cvtColor(out_img, cv2.COLOR_BGR2RGB)
-            self.camera_result_ready.emit(cid, rgb_frame, rgb_out,
-                                          infer_ms/1000.0, results, cls_names)
-            return True
+            results = self.model(frames, conf=self.conf, verbose=False)
+            per_frame = (time.time() - t0) / len(frames)
         except Exception as e:
-            self.camera_error.emit(cid, f"推理异常: {e}")
-            return False
-
-    def _reconnect_later(self, cid):
-        # 简单策略：5 秒后重试
-        if self.active.get(cid) is False:
+            for cid, _ in batch:
+                self.camera_error.emit(cid, f"推理异常: {e}")
             return
-        self.active[cid] = False
-        self.camera_status.emit(cid, "重连中…")
-        threading.Timer(5.0, lambda: self._try_reopen(cid)).start()
-
-    def _try_reopen(self, cid):
-        if cid in self.caps:
-            self.caps[cid].release()
-        cap = cv2.VideoCapture(cid)
-        if cap.isOpened():
-            self.caps[cid] = cap
-            self.active[cid] = True
-            self.camera_status.emit(cid, "已重连")
-        else:
-            cap.release()
-            self._reconnect_later(cid)
+
+        for (cid, frame), result in zip(batch, results):
+            self.camera_result_ready.emit(cid, frame, Detections.from_result(result), per_frame, cls_names)
+
+
 class ModelSelectionDialog(QDialog):
     """模型选择对话框"""
 
@@ -380,17 +479,16 @@ class DetectionResultWidget(QWidget):
         """)
         layout.addWidget(self.stats_label)
 
-    def update_results(self, results, class_names, inference_time):
-        """更新检测结果"""
-        if not results or not results[0].boxes or len(results[0].boxes) == 0:
+    def update_results(self, detections, class_names, inference_time):
+        """更新检测结果（detections 为 Detections）"""
+        if detections is None or len(detections) == 0:
             self.result_table.setRowCount(0)
             self.stats_label.setText("❌ 未检测到目标")
             return
 
-        boxes = results[0].boxes
-        confidences = boxes.conf.cpu().numpy()
-        classes = boxes.cls.cpu().numpy().astype(int)
-        xyxy = boxes.xyxy.cpu().numpy()
+        confidences = detections.scores
+        classes = detections.classes
+        xyxy = detections.boxes
 
         # 更新表格
         self.result_table.setRowCount(len(confidences))
@@ -433,6 +531,16 @@ class DetectionResultWidget(QWidget):
 class MonitoringWidget(QWidget):
     """监控页面组件"""
 
+    # 摄像头健康状态对应的状态栏颜色
+    HEALTH_COLORS = {
+        STATE_CONNECTING: "#f39c12",
+        STATE_ONLINE: "#27ae60",
+        STATE_STALLED: "#e74c3c",
+        STATE_RECONNECTING: "#f39c12",
+        STATE_OFFLINE: "#e74c3c",
+        STATE_STOPPED: "#7f8c8d",
+    }
+
     def __init__(self, model_manager, camera_manager):
         super().__init__()
         self.model_manager = model_manager
@@ -440,6 +548,12 @@ class MonitoringWidget(QWidget):
         self.monitoring_thread = None
         self.camera_labels = {}
         self.current_model = None
+        self.renderer = DetectionRenderer()
+        # 与主窗口共享已加载的模型，加载在后台进行
+        self.model_registry = get_model_registry()
+        self.model_registry.model_loaded.connect(self.on_model_loaded)
+        self.model_registry.load_failed.connect(self.on_model_load_failed)
+        self.pending_model_path = None
         self.start_monitor_btn = QPushButton("🚀 开始监控")
         self.init_ui()
 
@@ -475,7 +589,8 @@ class MonitoringWidget(QWidget):
         # self.camera_list.setMaximumHeight(20)
         self.camera_list.setMaximumWidth(300)
         self.camera_list.setSelectionMode(QListWidget.MultiSelection)
-        self.refresh_cameras()
+        self.camera_manager.cameras_updated.connect(self.update_camera_list)
+        self.update_camera_list(self.camera_manager.get_available_cameras())
         camera_layout.addWidget(self.camera_list)
 
         refresh_camera_btn = QPushButton("🔄 刷新")
@@ -559,41 +674,56 @@ class MonitoringWidget(QWidget):
         if model_text != "无可用模型":
             self.load_model_by_name(model_text)
     def load_model(self, model_path):
-        from enhanced_detection_main import YOLO
-        """加载模型"""
-        try:
-            self.current_model = YOLO(model_path)
-            self.start_monitor_btn.setEnabled(True)
-            return True
-        except Exception as e:
-            pass
+        """加载模型：已加载过的模型立即切换，否则在后台加载，完成后由 on_model_loaded 切换"""
+        self.pending_model_path = os.path.abspath(str(model_path))
+        model = self.model_registry.request(model_path)
+        if model is not None:
+            self.on_model_loaded(self.pending_model_path, model)
+        else:
+            self.current_model = None
+            self.start_monitor_btn.setEnabled(False)
+
+    def on_model_loaded(self, model_path, model):
+        """模型加载完成（只处理最后一次选择的模型）"""
+        if model_path != self.pending_model_path:
+            return
+        self.pending_model_path = None
+        self.current_model = model
+        self.start_monitor_btn.setEnabled(True)
+
+    def on_model_load_failed(self, model_path, error):
+        """模型加载失败"""
+        if model_path != self.pending_model_path:
+            return
+        self.pending_model_path = None
+        self.current_model = None
+        QMessageBox.critical(self, "错误", f"模型加载失败: {error}")
 
-            return False
     def select_model(self):
         """选择模型"""
-        from enhanced_detection_main import YOLO
-
         dialog = ModelSelectionDialog(self.model_manager, self)
         if dialog.exec() == QDialog.Accepted and dialog.selected_model:
-            try:
-                self.current_model = YOLO(dialog.selected_model)
-                model_name = Path(dialog.selected_model).name
-                self.model_combo.clear()
-                self.model_combo.addItem(model_name)
-                self.start_monitor_btn.setEnabled(True)
-                QMessageBox.information(self, "成功", f"模型加载成功: {model_name}")
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"模型加载失败: {str(e)}")
+            model_name = Path(dialog.selected_model).name
+            self.model_combo.blockSignals(True)
+            self.model_combo.clear()
+            self.model_combo.addItem(model_name)
+            self.model_combo.blockSignals(False)
+            self.load_model(dialog.selected_model)
 
     def refresh_cameras(self):
-        """刷新摄像头列表"""
-        self.camera_manager.scan_cameras()
+        """刷新摄像头列表（后台探测，完成后由 update_camera_list 更新）"""
+        self.camera_manager.refresh_async()
+
+    def update_camera_list(self, cameras):
+        """用探测结果更新摄像头列表，保持已选中的摄像头"""
+        selected = {item.data(Qt.UserRole) for item in self.camera_list.selectedItems()}
         self.camera_list.clear()
 
-        for camera in self.camera_manager.get_available_cameras():
+        for camera in cameras:
             item = QListWidgetItem(f"📹 {camera['name']} ({camera['resolution']})")
             item.setData(Qt.UserRole, camera['id'])
             self.camera_list.addItem(item)
+            item.setSelected(camera['id'] in selected)
 
     def start_monitoring(self):
         """开始监控"""
@@ -620,6 +750,7 @@ class MonitoringWidget(QWidget):
         self.monitoring_thread = MultiCameraMonitorThread(self.current_model, camera_ids)
         self.monitoring_thread.camera_result_ready.connect(self.update_camera_display)
         self.monitoring_thread.camera_error.connect(self.handle_camera_error)
+        self.monitoring_thread.camera_health.connect(self.handle_camera_health)
         self.monitoring_thread.finished.connect(self.on_monitoring_finished)
 
         self.monitoring_thread.start()
@@ -694,7 +825,8 @@ class MonitoringWidget(QWidget):
             self.camera_labels[camera_id] = {
                 'image': image_label,
                 'status': status_label,
-                'group': camera_group
+                'group': camera_group,
+                'health': STATE_CONNECTING
             }
 
             self.monitor_layout.addWidget(camera_group, row, col)
@@ -711,25 +843,40 @@ class MonitoringWidget(QWidget):
             self.camera_labels[camera_id]['group'].deleteLater()
         self.camera_labels.clear()
 
-    def update_camera_display(self, camera_id, original_img, result_img, inference_time, results, class_names):
+    def update_camera_display(self, camera_id, frame, detections, inference_time, class_names):
         """更新摄像头显示"""
         if camera_id not in self.camera_labels:
             return
 
-        # 显示结果图
-        self.display_image(result_img, self.camera_labels[camera_id]['image'])
+        # 按画面控件尺寸绘制结果图
+        label = self.camera_labels[camera_id]['image']
+        result_img = self.renderer.render(frame, detections, class_names, (label.width(), label.height()))
+        self.display_image(result_img, label)
 
         # 更新状态
-        if results and results[0].boxes and len(results[0].boxes) > 0:
-            object_count = len(results[0].boxes)
+        health = STATE_TEXT[self.camera_labels[camera_id]['health']]
+        if len(detections) > 0:
+            object_count = len(detections)
             self.camera_labels[camera_id]['status'].setText(
-                f"状态: 检测到 {object_count} 个目标 | 耗时: {inference_time:.3f}s"
+                f"状态: {health} | 检测到 {object_count} 个目标 | 耗时: {inference_time:.3f}s"
             )
         else:
             self.camera_labels[camera_id]['status'].setText(
-                f"状态: 无目标 | 耗时: {inference_time:.3f}s"
+                f"状态: {health} | 无目标 | 耗时: {inference_time:.3f}s"
             )
 
+    def handle_camera_health(self, camera_id, state, detail):
+        """摄像头健康状态变化"""
+        if camera_id not in self.camera_labels:
+            return
+        self.camera_labels[camera_id]['health'] = state
+        text = f"状态: {STATE_TEXT.get(state, state)}"
+        if detail:
+            text += f" | {detail}"
+        status_label = self.camera_labels[camera_id]['status']
+        status_label.setText(text)
+        status_label.setStyleSheet(f"color: {self.HEALTH_COLORS.get(state, '#7f8c8d')}; font-size: 10px;")
+
     def handle_camera_error(self, camera_id, error_msg):
         """处理摄像头错误"""
         if camera_id in self.camera_labels:
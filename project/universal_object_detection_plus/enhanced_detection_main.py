@@ -15,11 +15,11 @@ Enhanced Universal Object Detection System v2.0
 ⚡ 性能优化和错误处理
 """
 
-import sys
 import os
 import cv2
 import time
 import json
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
@@ -29,11 +29,10 @@ from PySide6.QtCore import *
 from PySide6.QtGui import *
 import numpy as np
 
-try:
-    from ultralytics import YOLO
-except ImportError:
-    print("错误: 请安装ultralytics库: pip install ultralytics")
-    sys.exit(1)
+from camera_capture import CAMERA_BACKEND
+from detection_renderer import Detections
+from model_registry import get_model_registry
+from video_pacing import PACING_REALTIME, VideoPacer
 
 
 class StyleManager:
@@ -284,51 +283,178 @@ class StyleManager:
         """
 
 
-class CameraManager:
-    """摄像头管理器 - 处理多摄像头检测和管理"""
+class CameraManager(QObject):
+    """
+    摄像头管理器 - 处理多摄像头检测和管理
 
-    def __init__(self):
-        self.cameras = []
-        self.scan_cameras()
+    各索引在后台线程中并行探测；超时仍未完成的索引沿用上次的结果，探测完成后再更新。
+    探测结果按设备索引缓存到文件，启动时先使用上次的结果，列表变化时通过 cameras_updated 通知界面
+    """
+    cameras_updated = Signal(list)  # 可用摄像头列表
 
-    def scan_cameras(self):
-        """扫描可用摄像头"""
+    def __init__(self, max_index=4, probe_timeout=3.0, cache_file="camera_cache.json"):
+        """
+        Args:
+            max_index: 探测的索引范围 [0, max_index)
+            probe_timeout: 整次探测的最长等待时间（秒）
+            cache_file: 探测结果缓存文件
+        """
+        super().__init__()
+        self.max_index = max_index
+        self.probe_timeout = probe_timeout
+        self.cache_file = Path(cache_file)
         self.cameras = []
-
-        # 检测摄像头（检测前8个索引）
-        for i in range(4):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                ret, frame = cap.read()
-                if ret and frame is not None:
-                    # 获取摄像头信息
-                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    fps = cap.get(cv2.CAP_PROP_FPS)
-
-                    camera_info = {
-                        'id': i,
-                        'name': f"摄像头 {i}",
-                        'resolution': f"{width}x{height}",
-                        'fps': fps if fps > 0 else 30,
-                        'available': True
-                    }
-                    self.cameras.append(camera_info)
-                cap.release()
-
+        self.scanning = False
+        self._lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._probing = set()  # 探测仍在进行的索引（可能跨越多次刷新）
+
+        self._load_cache()
+        self.refresh_async()
+
+    def _load_cache(self):
+        """读取上次探测到的摄像头（按设备索引），用于立即显示"""
+        cameras = []
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                devices = json.load(f).get('devices', {})
+            cameras = [devices[key] for key in sorted(devices, key=int)]
+        except (OSError, ValueError, AttributeError):
+            pass
+        self._set_cameras(cameras)
+
+    def _save_cache(self):
+        """把当前可用的摄像头写入缓存（探测线程可能同时完成，按写入时的最新列表保存）"""
+        with self._cache_lock:
+            try:
+                devices = {str(cam['id']): cam for cam in self.get_available_cameras()}
+                with open(self.cache_file, 'w', encoding='utf-8') as f:
+                    json.dump({'updated': time.time(), 'devices': devices}, f, ensure_ascii=False, indent=2)
+            except OSError as e:
+                print(f"保存摄像头缓存失败: {e}")
+
+    def _set_cameras(self, cameras):
         # 如果没有摄像头，添加虚拟摄像头用于测试
-        if not self.cameras:
-            self.cameras.append({
+        if not cameras:
+            cameras = [{
                 'id': -1,
                 'name': "未检测到摄像头",
                 'resolution': "N/A",
                 'fps': 0,
                 'available': False
-            })
+            }]
+        with self._lock:
+            self.cameras = cameras
+
+    @staticmethod
+    def _probe(index):
+        """打开索引并读一帧，成功返回摄像头信息"""
+        cap = cv2.VideoCapture(index, CAMERA_BACKEND)
+        try:
+            if not cap.isOpened():
+                return None
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                return None
+            # 获取摄像头信息
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            return {
+                'id': index,
+                'name': f"摄像头 {index}",
+                'resolution': f"{width}x{height}",
+                'fps': fps if fps > 0 else 30,
+                'available': True
+            }
+        finally:
+            cap.release()
+
+    def scan_cameras(self):
+        """
+        并行探测摄像头（阻塞，最多 probe_timeout 秒），返回可用摄像头列表
+
+        超时仍未完成的索引沿用上次的结果（不从列表和缓存中删除），探测线程在后台继续运行，
+        完成后更新列表和缓存并再次发出 cameras_updated；只有探测确实失败的索引才会被移除
+        """
+        results = {}
+        scan = {'finished': False}
+
+        def probe(index):
+            try:
+                info = self._probe(index)
+            except cv2.error:
+                info = None
+            with self._merge_lock:
+                late = scan['finished']
+                if not late:
+                    results[index] = info
+            with self._lock:
+                self._probing.discard(index)
+            if late:
+                self._update_camera(index, info)
+
+        # 上次刷新中仍未完成的索引不重复打开，等它自己完成
+        with self._lock:
+            indices = [i for i in range(self.max_index) if i not in self._probing]
+            self._probing.update(indices)
+
+        # 每个索引一个守护线程，卡住的驱动调用不会阻止程序退出
+        threads = [threading.Thread(target=probe, args=(i,), name=f"CameraProbe-{i}", daemon=True)
+                   for i in indices]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + self.probe_timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.time()))
+
+        # 合并与超时探测的更新都在 _merge_lock 内进行，之后完成的探测一定在此之后更新
+        with self._merge_lock:
+            scan['finished'] = True
+            previous = {cam['id']: cam for cam in self.get_available_cameras()}
+            cameras = []
+            for i in range(self.max_index):
+                info = results[i] if i in results else previous.get(i)
+                if info:
+                    cameras.append(info)
+            self._set_cameras(cameras)
+        self._save_cache()
+        return self.get_available_cameras()
+
+    def _update_camera(self, index, info):
+        """超时后才完成的探测：更新该索引的结果，保存缓存并通知界面"""
+        with self._merge_lock:
+            cameras = {cam['id']: cam for cam in self.get_available_cameras()}
+            if info:
+                cameras[index] = info
+            elif cameras.pop(index, None) is None:
+                return  # 原本就不在列表中
+            self._set_cameras([cameras[i] for i in sorted(cameras)])
+        self._save_cache()
+        self.cameras_updated.emit(self.get_available_cameras())
+
+    def refresh_async(self):
+        """后台刷新摄像头列表，完成后发出 cameras_updated；正在刷新时返回False"""
+        with self._lock:
+            if self.scanning:
+                return False
+            self.scanning = True
+        threading.Thread(target=self._refresh_worker, name="CameraScan", daemon=True).start()
+        return True
+
+    def _refresh_worker(self):
+        try:
+            self.scan_cameras()
+        finally:
+            self.scanning = False
+        # 发出当前列表（其间可能已有超时探测完成并更新）
+        self.cameras_updated.emit(self.get_available_cameras())
 
     def get_available_cameras(self):
         """获取可用摄像头列表"""
-        return [cam for cam in self.cameras if cam['available']]
+        with self._lock:
+            return [cam for cam in self.cameras if cam['available']]
 
     def get_camera_info(self, camera_id):
         """获取摄像头信息"""
@@ -375,9 +501,9 @@ class ModelManager:
         return models
 
     def load_model(self, model_path):
-        """加载模型"""
+        """加载模型（阻塞；已加载过的模型直接从共享注册表取出）"""
         try:
-            self.current_model = YOLO(model_path)
+            self.current_model = get_model_registry().load(model_path)
             self.class_names = list(self.current_model.names.values())
             return True
         except Exception as e:
@@ -411,20 +537,23 @@ class ModelManager:
 
 class DetectionThread(QThread):
     """增强的检测线程"""
-    result_ready = Signal(object, object, float, object, list)  # 原图, 结果图, 耗时, 检测结果, 类别名称
+    result_ready = Signal(object, object, float, list)  # BGR原图, Detections, 耗时, 类别名称（结果图由界面按需绘制）
     progress_updated = Signal(int)
     status_changed = Signal(str)
     error_occurred = Signal(str)
     fps_updated = Signal(float)
+    video_stats = Signal(int, int, float)  # 视频模式: 已处理帧数, 丢弃帧数, 有效FPS
     finished = Signal()
 
-    def __init__(self, model, source_type, source_path=None, camera_id=0, confidence_threshold=0.25):
+    def __init__(self, model, source_type, source_path=None, camera_id=0, confidence_threshold=0.25,
+                 pacing_mode=PACING_REALTIME):
         super().__init__()
         self.model = model
         self.source_type = source_type
         self.source_path = source_path
         self.camera_id = camera_id
         self.confidence_threshold = confidence_threshold
+        self.pacing_mode = pacing_mode  # 视频节奏: 实时（按时间戳丢帧）或最大吞吐，见 video_pacing
         self.is_running = False
         self.is_paused = False
         self.frame_count = 0
@@ -454,21 +583,17 @@ class DetectionThread(QThread):
 
         self.status_changed.emit("正在处理图片...")
 
-        start_time = time.time()
-        results = self.model(self.source_path, conf=self.confidence_threshold, verbose=False)
-        end_time = time.time()
-
         original_img = cv2.imread(self.source_path)
         if original_img is None:
             self.error_occurred.emit("无法读取图片文件")
             return
 
-        original_img = cv2.cvtColor(original_img, cv2.COLOR_BGR2RGB)
-        result_img = results[0].plot()
-        result_img = cv2.cvtColor(result_img, cv2.COLOR_BGR2RGB)
+        start_time = time.time()
+        results = self.model(original_img, conf=self.confidence_threshold, verbose=False)
+        end_time = time.time()
         class_names = list(self.model.names.values())
 
-        self.result_ready.emit(original_img, result_img, end_time - start_time, results, class_names)
+        self.result_ready.emit(original_img, Detections.from_result(results[0]), end_time - start_time, class_names)
         self.progress_updated.emit(100)
 
     def _process_video(self):
@@ -483,17 +608,32 @@ class DetectionThread(QThread):
             return
 
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        frame_count = 0
+        frame_index = 0
         class_names = list(self.model.names.values())
+        pacer = VideoPacer(self.pacing_mode, cap.get(cv2.CAP_PROP_FPS))
+        last_stats_time = 0.0
 
         self.status_changed.emit(f"开始处理视频 (共{total_frames}帧)...")
 
         while cap.isOpened() and self.is_running:
             if self.is_paused:
+                pacer.pause()
                 time.sleep(0.1)
                 continue
+            pacer.resume()
 
-            ret, frame = cap.read()
+            # 先 grab 再按需 retrieve：要丢弃的帧不做颜色转换和推理
+            if not cap.grab():
+                break
+            timestamp = pacer.frame_timestamp(cap, frame_index)
+            frame_index += 1
+            if total_frames > 0:
+                self.progress_updated.emit(min(int(frame_index / total_frames * 100), 100))
+            if pacer.should_drop(timestamp):
+                continue
+            pacer.wait(timestamp, stop=lambda: not self.is_running or self.is_paused)
+
+            ret, frame = cap.retrieve()
             if not ret:
                 break
 
@@ -501,27 +641,20 @@ class DetectionThread(QThread):
             results = self.model(frame, conf=self.confidence_threshold, verbose=False)
             end_time = time.time()
 
-            original_img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result_img = results[0].plot()
-            result_img = cv2.cvtColor(result_img, cv2.COLOR_BGR2RGB)
-
-            self.result_ready.emit(original_img, result_img, end_time - start_time, results, class_names)
-
-            frame_count += 1
-            if total_frames > 0:
-                progress = int((frame_count / total_frames) * 100)
-                self.progress_updated.emit(progress)
+            self.result_ready.emit(frame, Detections.from_result(results[0]), end_time - start_time, class_names)
+            pacer.frame_done()
 
             # 更新FPS
             self._update_fps()
 
-            # 状态更新（每30帧更新一次）
-            if frame_count % 30 == 0:
-                current_fps = self._get_current_fps()
-                self.status_changed.emit(f"处理中... {frame_count}/{total_frames} 帧 (FPS: {current_fps:.1f})")
-
-            time.sleep(0.033)  # 约30fps
+            # 统计更新（每秒一次）
+            if end_time - last_stats_time >= 1.0:
+                last_stats_time = end_time
+                self.video_stats.emit(pacer.processed, pacer.dropped, pacer.effective_fps())
+                self.status_changed.emit(f"处理中... {frame_index}/{total_frames} 帧 ({pacer.summary()})")
 
+        self.video_stats.emit(pacer.processed, pacer.dropped, pacer.effective_fps())
+        self.status_changed.emit(f"视频处理结束: {pacer.summary()}")
         cap.release()
 
     def _process_camera(self):
@@ -552,11 +685,7 @@ class DetectionThread(QThread):
             results = self.model(frame, conf=self.confidence_threshold, verbose=False)
             end_time = time.time()
 
-            original_img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result_img = results[0].plot()
-            result_img = cv2.cvtColor(result_img, cv2.COLOR_BGR2RGB)
-
-            self.result_ready.emit(original_img, result_img, end_time - start_time, results, class_names)
+            self.result_ready.emit(frame, Detections.from_result(results[0]), end_time - start_time, class_names)
 
             # 更新FPS
             self._update_fps()
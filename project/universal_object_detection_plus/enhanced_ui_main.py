@@ -10,6 +10,7 @@ import os
 import cv2
 import time
 import json
+import hashlib
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
@@ -20,9 +21,13 @@ from PySide6.QtGui import *
 import numpy as np
 
 # 导入自定义模块
-from enhanced_detection_main import StyleManager, CameraManager, ModelManager, DetectionThread, YOLO
+from enhanced_detection_main import StyleManager, CameraManager, ModelManager, DetectionThread
 from enhanced_components import (BatchDetectionThread, DetectionResultWidget,
                                  ModelSelectionDialog, MonitoringWidget)
+from batch_result_store import BatchResultStore
+from detection_renderer import DetectionRenderer
+from model_registry import get_model_registry
+from video_pacing import PACING_REALTIME, PACING_TEXT, PACING_THROUGHPUT
 
 
 class EnhancedDetectionUI(QMainWindow):
@@ -36,14 +41,25 @@ class EnhancedDetectionUI(QMainWindow):
         self.current_source_type = 'image'
         self.current_source_path = None
         self.confidence_threshold = 0.25
-        self.batch_results = []
+        self.renderer = DetectionRenderer()  # 结果图只在显示/导出时绘制
+        self.batch_results = BatchResultStore(renderer=self.renderer)  # 只保存检测数组，结果图按需绘制
+        self.batch_results.images_loaded.connect(self.on_batch_images_loaded)
         self.current_batch_index = 0
 
         # 管理器
         self.camera_manager = CameraManager()
         self.model_manager = ModelManager()
+        # 模型在后台加载并预热，与监控页共享同一份已加载的模型
+        self.model_registry = get_model_registry()
+        self.model_registry.model_loaded.connect(self.on_model_loaded)
+        self.model_registry.load_failed.connect(self.on_model_load_failed)
+        self.pending_model_path = None
         self.log_text = QTextEdit()
         self.init_ui()
+
+        # 先显示上次探测到的摄像头，后台探测完成后自动更新
+        self.camera_manager.cameras_updated.connect(self.update_camera_combo)
+        self.update_camera_combo(self.camera_manager.get_available_cameras())
         self.setWindowIcon(self.create_enhanced_icon())
 
         # 应用样式
@@ -149,7 +165,6 @@ class EnhancedDetectionUI(QMainWindow):
         self.camera_select_layout.addWidget(QLabel("摄像头:"))
 
         self.camera_combo = QComboBox()
-        self.refresh_camera_list()
         self.camera_select_layout.addWidget(self.camera_combo)
 
         refresh_camera_btn = QPushButton("🔄")
@@ -159,6 +174,20 @@ class EnhancedDetectionUI(QMainWindow):
 
         source_layout.addLayout(self.camera_select_layout)
 
+        # 视频节奏（仅视频模式显示）
+        self.pacing_layout = QHBoxLayout()
+        pacing_label = QLabel("视频节奏:")
+        pacing_label.setVisible(False)
+        self.pacing_layout.addWidget(pacing_label)
+
+        self.pacing_combo = QComboBox()
+        for mode in (PACING_REALTIME, PACING_THROUGHPUT):
+            self.pacing_combo.addItem(PACING_TEXT[mode], mode)
+        self.pacing_combo.setVisible(False)
+        self.pacing_layout.addWidget(self.pacing_combo)
+
+        source_layout.addLayout(self.pacing_layout)
+
         # 文件选择
         file_layout = QHBoxLayout()
         self.select_file_btn = QPushButton("📁 选择文件/文件夹")
@@ -209,6 +238,12 @@ class EnhancedDetectionUI(QMainWindow):
 
         control_layout.addLayout(progress_layout)
 
+        # 视频处理统计（已处理/丢弃帧数、有效FPS）
+        self.video_stats_label = QLabel("")
+        self.video_stats_label.setStyleSheet("color: #7f8c8d; font-size: 11px;")
+        self.video_stats_label.setVisible(False)
+        control_layout.addWidget(self.video_stats_label)
+
         layout.addWidget(control_group)
 
         # 检测结果详情
@@ -401,16 +436,37 @@ class EnhancedDetectionUI(QMainWindow):
                 break
 
     def load_model(self, model_path):
-        """加载模型"""
-        try:
-            self.model = YOLO(model_path)
-            self.log_message(f"✅ 模型加载成功: {Path(model_path).name}")
-            self.update_button_states()
+        """
+        加载模型：已加载过的模型立即切换；否则在后台加载，完成后由 on_model_loaded 切换，
+        加载期间不能开始检测
+        """
+        self.pending_model_path = os.path.abspath(str(model_path))
+        model = self.model_registry.request(model_path)
+        if model is not None:
+            self.on_model_loaded(self.pending_model_path, model)
             return True
-        except Exception as e:
-            self.log_message(f"❌ 模型加载失败: {str(e)}")
-            self.model = None
-            return False
+        self.model = None
+        self.update_button_states()
+        self.log_message(f"⏳ 正在加载模型: {Path(model_path).name}")
+        return True
+
+    def on_model_loaded(self, model_path, model):
+        """模型加载完成（只处理最后一次选择的模型）"""
+        if model_path != self.pending_model_path:
+            return
+        self.pending_model_path = None
+        self.model = model
+        self.log_message(f"✅ 模型加载成功: {Path(model_path).name}")
+        self.update_button_states()
+
+    def on_model_load_failed(self, model_path, error):
+        """模型加载失败"""
+        if model_path != self.pending_model_path:
+            return
+        self.pending_model_path = None
+        self.model = None
+        self.log_message(f"❌ 模型加载失败: {error}")
+        self.update_button_states()
 
     def show_model_selection_dialog(self):
         """显示模型选择对话框"""
@@ -427,16 +483,23 @@ class EnhancedDetectionUI(QMainWindow):
                     self.model_combo.setCurrentText(model_name)
 
     def refresh_camera_list(self):
-        """刷新摄像头列表"""
-        self.camera_manager.scan_cameras()
-        self.camera_combo.clear()
+        """刷新摄像头列表（后台探测，完成后由 update_camera_combo 更新）"""
+        if self.camera_manager.refresh_async():
+            self.log_message("🔄 正在扫描摄像头...")
 
-        cameras = self.camera_manager.get_available_cameras()
+    def update_camera_combo(self, cameras):
+        """用探测结果更新摄像头下拉框，尽量保持当前选择"""
+        current_id = self.camera_combo.currentData()
+        self.camera_combo.clear()
         if cameras:
             for camera in cameras:
                 self.camera_combo.addItem(f"{camera['name']} ({camera['resolution']})", camera['id'])
         else:
             self.camera_combo.addItem("未检测到摄像头", -1)
+        index = self.camera_combo.findData(current_id)
+        if index >= 0:
+            self.camera_combo.setCurrentIndex(index)
+        self.update_button_states()
 
     def on_model_changed(self, model_text):
         """模型选择改变"""
@@ -475,6 +538,15 @@ class EnhancedDetectionUI(QMainWindow):
             if item.widget():
                 item.widget().setVisible(is_camera)
 
+        # 显示/隐藏视频节奏选择
+        is_video = self.current_source_type == "video"
+        for i in range(self.pacing_layout.count()):
+            item = self.pacing_layout.itemAt(i)
+            if item.widget():
+                item.widget().setVisible(is_video)
+        self.video_stats_label.setVisible(is_video)
+        self.video_stats_label.setText("")
+
         self.current_source_path = None
         self.current_file_label.setText("未选择文件")
         self.clear_display_windows()
@@ -553,9 +625,11 @@ class EnhancedDetectionUI(QMainWindow):
                 return
 
         self.detection_thread = DetectionThread(
-            self.model, self.current_source_type, self.current_source_path, camera_id, self.confidence_threshold
+            self.model, self.current_source_type, self.current_source_path, camera_id, self.confidence_threshold,
+            pacing_mode=self.pacing_combo.currentData()
         )
         self.detection_thread.result_ready.connect(self.on_detection_result)
+        self.detection_thread.video_stats.connect(self.on_video_stats)
         self.detection_thread.progress_updated.connect(self.progress_bar.setValue)
         self.detection_thread.status_changed.connect(self.statusBar().showMessage)
         self.detection_thread.error_occurred.connect(self.log_message)
@@ -571,8 +645,10 @@ class EnhancedDetectionUI(QMainWindow):
         """开始批量检测"""
         self.batch_results.clear()
 
+        output_dir = self.batch_output_dir(self.current_source_path)
         self.batch_detection_thread = BatchDetectionThread(
-            self.model, self.current_source_path, self.confidence_threshold
+            self.model, self.current_source_path, self.confidence_threshold, output_dir=output_dir,
+            renderer=self.renderer
         )
         self.batch_detection_thread.result_ready.connect(self.on_batch_result)
         self.batch_detection_thread.progress_updated.connect(self.progress_bar.setValue)
@@ -584,6 +660,14 @@ class EnhancedDetectionUI(QMainWindow):
 
         self.batch_detection_thread.start()
         self.log_message("🚀 开始批量检测...")
+        self.log_message(f"📒 结果清单: {output_dir}（未变化的图片将直接复用已有结果）")
+
+    @staticmethod
+    def batch_output_dir(folder_path):
+        """批量检测输出目录（保存结果清单），每个源文件夹一个"""
+        folder = Path(folder_path).resolve()
+        digest = hashlib.sha1(str(folder).encode('utf-8')).hexdigest()[:8]
+        return Path("batch_outputs") / f"{folder.name}_{digest}"
 
     def update_detection_ui_state(self, detecting):
         """更新检测状态的UI"""
@@ -593,6 +677,7 @@ class EnhancedDetectionUI(QMainWindow):
         self.source_combo.setEnabled(not detecting)
         self.select_file_btn.setEnabled(not detecting and self.current_source_type != "camera")
         self.model_combo.setEnabled(not detecting)
+        self.pacing_combo.setEnabled(not detecting)
 
     def pause_detection(self):
         """暂停/恢复检测"""
@@ -618,48 +703,34 @@ class EnhancedDetectionUI(QMainWindow):
 
         self.on_detection_finished()
 
-    def on_detection_result(self, original_img, result_img, inference_time, results, class_names):
-        """检测结果回调"""
+    def on_detection_result(self, frame, detections, inference_time, class_names):
+        """检测结果回调（frame 为BGR原图，检测框按显示控件尺寸绘制）"""
         # 显示图像
-        self.display_image(original_img, self.original_label)
-        self.display_image(result_img, self.result_label)
+        self.display_image(self.renderer.render(frame, None, target_size=self._label_size(self.original_label)),
+                           self.original_label)
+        self.display_image(self.renderer.render(frame, detections, class_names, self._label_size(self.result_label)),
+                           self.result_label)
 
         # 更新结果详情
-        self.result_detail_widget.update_results(results, class_names, inference_time)
+        self.result_detail_widget.update_results(detections, class_names, inference_time)
 
         # 记录日志（简化版，避免过多输出）
-        if results and results[0].boxes and len(results[0].boxes) > 0:
-            object_count = len(results[0].boxes)
+        if len(detections) > 0:
+            object_count = len(detections)
 
             # 统计类别
-            classes = results[0].boxes.cls.cpu().numpy().astype(int)
-            class_counts = {}
-            for cls in classes:
-                class_name = class_names[cls] if cls < len(class_names) else f"类别{cls}"
-                class_counts[class_name] = class_counts.get(class_name, 0) + 1
+            class_counts = detections.class_counts(class_names)
 
             class_summary = ", ".join([f"{name}:{count}" for name, count in class_counts.items()])
             self.log_message(f"🎯 检测到 {object_count} 个目标: {class_summary} (耗时: {inference_time:.3f}s)")
         else:
             self.log_message(f"⚪ 未检测到目标 (耗时: {inference_time:.3f}s)")
 
-    def on_batch_result(self, file_path, original_img, result_img, inference_time, results, class_names):
+    def on_batch_result(self, file_path, thumbnail, detections, inference_time, class_names):
         """批量检测结果回调"""
-        # 计算目标数量
-        object_count = len(results[0].boxes) if results and results[0].boxes else 0
-
-        # 保存结果
-        result_data = {
-            'file_path': file_path,
-            'original_img': original_img,
-            'result_img': result_img,
-            'inference_time': inference_time,
-            'results': results,
-            'class_names': class_names,
-            'object_count': object_count
-        }
-
-        self.batch_results.append(result_data)
+        # 只保留检测数组和缩略图，结果图在浏览时才绘制，原图需要时再从源文件读取
+        index = self.batch_results.add(file_path, detections, inference_time, class_names, thumbnail)
+        object_count = self.batch_results[index]['object_count']
 
         # 显示第一个结果
         if len(self.batch_results) == 1:
@@ -668,7 +739,9 @@ class EnhancedDetectionUI(QMainWindow):
 
         self.update_batch_navigation()
 
-        # 记录日志
+        # 记录日志（thumbnail 为None表示复用了清单中的结果，只在完成时汇总）
+        if thumbnail is None:
+            return
         filename = Path(file_path).name
         if object_count > 0:
             self.log_message(f"✅ {filename}: {object_count} 个目标 ({inference_time:.3f}s)")
@@ -678,9 +751,12 @@ class EnhancedDetectionUI(QMainWindow):
     def on_batch_finished(self):
         """批量检测完成"""
         total_count = len(self.batch_results)
-        total_objects = sum(result['object_count'] for result in self.batch_results)
+        total_objects = self.batch_results.total_objects()
 
         self.log_message(f"🎉 批量检测完成! 处理了 {total_count} 张图片，检测到 {total_objects} 个目标")
+        skipped = self.batch_detection_thread.skipped_count if self.batch_detection_thread else 0
+        if skipped:
+            self.log_message(f"♻️ 其中 {skipped} 张图片未变化，已复用结果清单")
         self.statusBar().showMessage(f"批量检测完成 - {total_count} 张图片，{total_objects} 个目标")
 
         self.save_results_btn.setEnabled(True)
@@ -688,8 +764,17 @@ class EnhancedDetectionUI(QMainWindow):
         self.result_index_label.setText(f"1/{len(self.batch_results)}")
         self.on_detection_finished()
 
+    def on_video_stats(self, processed, dropped, effective_fps):
+        """视频处理统计"""
+        total = processed + dropped
+        drop_rate = dropped / total * 100 if total else 0.0
+        self.video_stats_label.setText(
+            f"🎞️ 已处理 {processed} 帧 | 丢弃 {dropped} 帧 ({drop_rate:.1f}%) | 有效FPS {effective_fps:.1f}")
+
     def on_detection_finished(self):
         """检测完成回调"""
+        if self.current_source_type == "video" and self.video_stats_label.text():
+            self.log_message(f"📊 视频处理统计: {self.video_stats_label.text()}")
         self.update_detection_ui_state(False)
         self.pause_btn.setText("⏸️ 暂停")
         self.progress_bar.setValue(0)
@@ -699,8 +784,13 @@ class EnhancedDetectionUI(QMainWindow):
         if 0 <= index < len(self.batch_results):
             result = self.batch_results[index]
 
-            self.display_image(result['original_img'], self.batch_original_label)
-            self.display_image(result['result_img'], self.batch_result_label)
+            if not self.batch_results.is_cached(index):
+                # 先显示缩略图，完整图片在后台线程读取和绘制；快速翻页时中间的图片不会被读取
+                thumbnail = self.batch_results.thumbnail(index)
+                if thumbnail is not None:
+                    self.display_image(thumbnail, self.batch_result_label)
+            self.batch_results.request_images(index, self._label_size(self.batch_original_label),
+                                              self._label_size(self.batch_result_label))
 
             filename = Path(result['file_path']).name
             object_count = result['object_count']
@@ -710,23 +800,23 @@ class EnhancedDetectionUI(QMainWindow):
             info_text += f"🎯 检测目标: {object_count} 个\n"
             info_text += f"⏱️ 推理耗时: {inference_time:.3f} 秒\n"
 
-            if result['results'] and result['results'][0].boxes and len(result['results'][0].boxes) > 0:
+            if object_count > 0:
                 # 显示类别统计
-                classes = result['results'][0].boxes.cls.cpu().numpy().astype(int)
-                confidences = result['results'][0].boxes.conf.cpu().numpy()
-
-                class_counts = {}
-                for cls in classes:
-                    class_name = result['class_names'][cls] if cls < len(result['class_names']) else f"类别{cls}"
-                    class_counts[class_name] = class_counts.get(class_name, 0) + 1
-
+                class_counts = self.batch_results.class_counts(index)
                 info_text += "📊 类别统计: " + ", ".join(
                     [f"{name}:{count}" for name, count in class_counts.items()]) + ""
-                info_text += f"🎯 平均置信度: {np.mean(confidences):.3f}"
+                info_text += f"🎯 平均置信度: {np.mean(result['detections'].scores):.3f}"
 
             self.batch_info_label.setText(info_text)
             self.result_index_label.setText(f"{index + 1}/{len(self.batch_results)}")
 
+    def on_batch_images_loaded(self, index, original, result):
+        """显示后台读取的批量结果完整图片（已翻到其他结果时丢弃）"""
+        if index != self.current_batch_index or index >= len(self.batch_results):
+            return
+        self.display_image(original, self.batch_original_label)
+        self.display_image(result, self.batch_result_label)
+
     def show_prev_result(self):
         """显示上一个结果"""
         if self.current_batch_index > 0:
@@ -778,9 +868,8 @@ class EnhancedDetectionUI(QMainWindow):
             # 保存检测结果图片
             for i, result in enumerate(self.batch_results):
                 file_name = Path(result['file_path']).stem
-                result_img = cv2.cvtColor(result['result_img'], cv2.COLOR_RGB2BGR)
                 result_save_path = result_dir / f"{file_name}_result.jpg"
-                cv2.imwrite(str(result_save_path), result_img)
+                self.batch_results.export_result(i, str(result_save_path))
 
             # 保存检测报告
             self.save_detection_report(result_dir)
@@ -802,7 +891,7 @@ class EnhancedDetectionUI(QMainWindow):
             f.write(f"📅 处理时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"🎚️ 置信度阈值: {self.confidence_threshold}\n")
             f.write(f"📂 处理图片数量: {len(self.batch_results)}\n")
-            f.write(f"🎯 总检测目标数: {sum(r['object_count'] for r in self.batch_results)}\n")
+            f.write(f"🎯 总检测目标数: {self.batch_results.total_objects()}\n")
             f.write("\n📊 详细结果:\n")
             f.write("-" * 60 + "\n")
 
@@ -811,17 +900,13 @@ class EnhancedDetectionUI(QMainWindow):
                 f.write(f"   🎯 检测目标: {result['object_count']} 个\n")
                 f.write(f"   ⏱️ 推理耗时: {result['inference_time']:.3f} 秒\n")
 
-                if result['results'] and result['results'][0].boxes and len(result['results'][0].boxes) > 0:
-                    confidences = result['results'][0].boxes.conf.cpu().numpy()
-                    classes = result['results'][0].boxes.cls.cpu().numpy().astype(int)
+                if result['object_count'] > 0:
+                    confidences = result['detections'].scores
 
                     f.write(f"   📈 置信度范围: {np.min(confidences):.3f} - {np.max(confidences):.3f}\n")
 
                     # 类别统计
-                    class_counts = {}
-                    for cls in classes:
-                        class_name = result['class_names'][cls] if cls < len(result['class_names']) else f"类别{cls}"
-                        class_counts[class_name] = class_counts.get(class_name, 0) + 1
+                    class_counts = self.batch_results.class_counts(i - 1)
 
                     f.write("   📊 类别分布: " + ", ".join(
                         [f"{name}:{count}" for name, count in class_counts.items()]) + "\n")
@@ -835,6 +920,11 @@ class EnhancedDetectionUI(QMainWindow):
         self.result_label.clear()
         self.result_label.setText("等待检测结果...")
 
+    @staticmethod
+    def _label_size(label):
+        """显示控件的 (宽, 高)，结果图按该尺寸绘制"""
+        return label.width(), label.height()
+
     def display_image(self, img_array, label):
         """显示图像"""
         if img_array is None:
@@ -870,6 +960,12 @@ class EnhancedDetectionUI(QMainWindow):
         self.log_text.clear()
         self.log_message("🗑️ 日志已清除")
 
+    def closeEvent(self, event):
+        """关闭窗口时停止检测并释放批量结果"""
+        self.stop_detection()
+        self.batch_results.close()
+        super().closeEvent(event)
+
     def create_enhanced_icon(self, size=64):
         """创建增强的应用图标"""
         icon = QIcon()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Scanner - 图片文件夹流式扫描
+用 os.scandir 对文件夹只遍历一次，扩展名不区分大小写；后台线程边遍历边把路径送入队列，
+检测线程拿到第一张图片即可开始推理，不必等整棵目录树扫描完，
+扫描过程中根据已扫描/待扫描的目录数估算图片总数
+"""
+import os
+import queue
+import threading
+from collections import deque
+
+DEFAULT_IMAGE_FORMATS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp', '.tif')
+
+_DONE = object()
+
+
+class FolderScanner:
+    """后台遍历文件夹，按发现顺序产出图片路径（str）"""
+
+    def __init__(self, folder_path, supported_formats=None, recursive=True, stream=True):
+        """
+        Args:
+            folder_path: 要扫描的文件夹
+            supported_formats: 支持的扩展名（不区分大小写），默认 DEFAULT_IMAGE_FORMATS
+            recursive: 是否扫描子文件夹
+            stream: 是否把路径送入队列供迭代；只统计数量时设为False
+        """
+        self.folder_path = str(folder_path)
+        self.formats = {fmt.lower() for fmt in (supported_formats or DEFAULT_IMAGE_FORMATS)}
+        self.recursive = recursive
+        self.stream = stream
+
+        self.found = 0            # 已找到的图片数
+        self.dirs_scanned = 0     # 已扫描的目录数
+        self.dirs_pending = 0     # 已发现但尚未扫描的目录数
+        self.errors = []          # 无法读取的目录 [(路径, 错误信息)]
+        self.finished = False
+
+        self._queue = queue.SimpleQueue()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台扫描线程，返回自身以便链式调用"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._walk, name="FolderScanner", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def __iter__(self):
+        """按发现顺序产出图片路径，扫描结束（或停止）时结束"""
+        self.start()
+        while True:
+            path = self._queue.get()
+            if path is _DONE or self._stop_event.is_set():
+                return
+            yield path
+
+    def _walk(self):
+        pending = deque([self.folder_path])   # 广度优先：先发现各层目录，总数估计更早收敛
+        self.dirs_pending = 1
+        try:
+            while pending and not self._stop_event.is_set():
+                directory = pending.popleft()
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if self._stop_event.is_set():
+                                break
+                            try:
+                                if entry.is_file():
+                                    if os.path.splitext(entry.name)[1].lower() in self.formats:
+                                        self.found += 1
+                                        if self.stream:
+                                            self._queue.put(entry.path)
+                                elif self.recursive and entry.is_dir(follow_symlinks=False):
+                                    pending.append(entry.path)
+                                    self.dirs_pending += 1
+                            except OSError:
+                                continue
+                except OSError as e:
+                    self.errors.append((directory, str(e)))
+                self.dirs_scanned += 1
+                self.dirs_pending -= 1
+        finally:
+            self.finished = True
+            self._queue.put(_DONE)
+
+    def estimated_total(self):
+        """
+        图片总数估计：扫描完成时为精确值；扫描中按每个已扫描目录的平均图片数外推到待扫描目录
+        """
+        found = self.found
+        if self.finished or self.dirs_scanned == 0:
+            return found
+        per_dir = found / self.dirs_scanned
+        return int(round(found + per_dir * self.dirs_pending))
+
+    def progress_text(self, done):
+        """进度文字：扫描中显示为 done/~估计值"""
+        if self.finished:
+            return f"{done}/{self.found}"
+        return f"{done}/~{max(self.estimated_total(), done)}"
+
+    def wait(self, timeout=None):
+        """等待扫描结束（不消费队列）"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.finished
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model Registry - 共享模型注册表
+进程内所有界面组件共用一个注册表：按 (模型路径, 修改时间) 缓存已加载的模型，超过容量时
+淘汰最久未使用的模型；加载在后台线程完成并做一次预热推理，界面不会卡住，
+切换回已加载过的模型是即时的
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+
+
+def _load_yolo(model_path):
+    from ultralytics import YOLO
+    return YOLO(model_path)
+
+
+class SharedModel:
+    """
+    多个组件/线程共享的模型：推理调用加锁串行执行（ultralytics 模型对象不是线程安全的），
+    其余属性（names、ckpt_path 等）直接转发给原模型
+    """
+
+    def __init__(self, model, model_path):
+        self.model = model
+        self.model_path = model_path
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            return self.model(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+class ModelRegistry(QObject):
+    """共享模型注册表"""
+    model_loaded = Signal(str, object)  # 模型绝对路径, SharedModel
+    load_failed = Signal(str, str)      # 模型绝对路径, 错误信息
+
+    def __init__(self, capacity=3, warmup_size=640, loader=None):
+        """
+        Args:
+            capacity: 同时保留在内存中的模型数
+            warmup_size: 预热推理使用的空白图尺寸，为0时不预热
+            loader: 模型加载函数 loader(path)，默认使用 ultralytics.YOLO
+        """
+        super().__init__()
+        self.capacity = max(1, capacity)
+        self.warmup_size = warmup_size
+        self.loader = loader or _load_yolo
+
+        self._models = OrderedDict()    # {(绝对路径, mtime_ns): SharedModel}
+        self._loading = {}              # {(绝对路径, mtime_ns): Future}
+        self._lock = threading.Lock()
+        # 单线程加载：避免同时加载多个模型造成内存峰值
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ModelLoader")
+
+    @staticmethod
+    def _key(model_path):
+        path = os.path.abspath(str(model_path))
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = 0
+        return path, mtime
+
+    def get(self, model_path):
+        """已加载的模型（SharedModel），未加载时返回None"""
+        key = self._key(model_path)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+            return model
+
+    def request(self, model_path):
+        """
+        请求模型（不阻塞）：已加载时直接返回；否则在后台加载，完成后发出 model_loaded/load_failed，
+        返回None
+        """
+        model = self.get(model_path)
+        if model is None:
+            self._submit(self._key(model_path))
+        return model
+
+    def load(self, model_path):
+        """加载模型（阻塞），失败时抛出异常"""
+        model = self.get(model_path)
+        if model is not None:
+            return model
+        return self._submit(self._key(model_path)).result()
+
+    def set_capacity(self, capacity):
+        with self._lock:
+            self.capacity = max(1, capacity)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def loaded_paths(self):
+        with self._lock:
+            return [path for path, _ in self._models]
+
+    # ----------------- 私有工具 -----------------
+    def _submit(self, key):
+        with self._lock:
+            future = self._loading.get(key)
+            if future is None:
+                future = self._executor.submit(self._load, key)
+                self._loading[key] = future
+            return future
+
+    def _load(self, key):
+        path = key[0]
+        try:
+            model = SharedModel(self.loader(path), path)
+            if self.warmup_size:
+                # 预热：首次推理会初始化推理器和分配内存，提前完成可避免第一帧卡顿
+                model(np.zeros((self.warmup_size, self.warmup_size, 3), dtype=np.uint8), verbose=False)
+        except Exception as e:
+            with self._lock:
+                self._loading.pop(key, None)
+            self.load_failed.emit(path, str(e))
+            raise
+
+        with self._lock:
+            # 同一路径的旧版本（文件已更新）不再保留
+            for old_key in [k for k in self._models if k[0] == path]:
+                del self._models[old_key]
+            self._models[key] = model
+            self._evict()
+            self._loading.pop(key, None)
+        self.model_loaded.emit(path, model)
+        return model
+
+    def _evict(self):
+        while len(self._models) > self.capacity:
+            self._models.popitem(last=False)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """进程内共享的模型注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Video Pacing - 视频帧节奏控制
+实时模式按视频文件自身的时间戳播放：推理跟不上时丢弃已经过时的帧，画面不会越放越慢；
+推理很快时等到帧的时间戳再处理，不会快进。最大吞吐模式不等待、不丢帧，逐帧尽快处理。
+两种模式都统计已处理帧数、丢弃帧数和有效FPS
+"""
+import time
+
+import cv2
+
+PACING_REALTIME = 'realtime'
+PACING_THROUGHPUT = 'throughput'
+
+PACING_TEXT = {
+    PACING_REALTIME: "实时（按视频时间戳，跟不上时丢帧）",
+    PACING_THROUGHPUT: "最大吞吐（逐帧处理，不等待）",
+}
+
+DEFAULT_FPS = 30.0
+
+
+class VideoPacer:
+    """以视频时间戳为时钟的帧调度器（只在检测线程中使用）"""
+
+    def __init__(self, mode=PACING_REALTIME, fps=0.0):
+        """
+        Args:
+            mode: PACING_REALTIME 或 PACING_THROUGHPUT
+            fps: 视频标称帧率，没有时间戳时用于推算，<=0 时按 DEFAULT_FPS
+        """
+        self.mode = mode
+        self.frame_interval = 1.0 / (fps if fps and fps > 0 else DEFAULT_FPS)
+
+        self.processed = 0            # 已推理的帧数
+        self.dropped = 0              # 实时模式下因过时而丢弃的帧数
+        self._start = None            # 视频时间0对应的时钟时间
+        self._paused_at = None
+        self._last_timestamp = -1.0
+        self._wall_start = None       # 统计有效FPS用（不含暂停时间）
+        self._paused_total = 0.0
+
+    @property
+    def realtime(self):
+        return self.mode == PACING_REALTIME
+
+    # ----------------- 时钟 -----------------
+    def frame_timestamp(self, cap, index):
+        """
+        刚读取（grab）的帧的时间戳（秒）：优先使用 CAP_PROP_POS_MSEC，
+        后端不提供或时间戳不递增时按帧序号和帧率推算
+        """
+        self.clock()  # 第一帧开始计时
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if timestamp <= self._last_timestamp or (timestamp <= 0 and index > 0):
+            timestamp = index * self.frame_interval
+        self._last_timestamp = timestamp
+        return timestamp
+
+    def clock(self):
+        """当前应播放到的视频时间（秒）"""
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+            self._wall_start = now
+        if self._paused_at is not None:
+            now = self._paused_at
+        return now - self._start
+
+    def should_drop(self, timestamp):
+        """实时模式下，帧的显示时段（timestamp 到下一帧）已经过去则丢弃"""
+        if not self.realtime:
+            return False
+        if timestamp + self.frame_interval < self.clock():
+            self.dropped += 1
+            return True
+        return False
+
+    def wait(self, timestamp, stop=None):
+        """实时模式下等到帧的时间戳；stop() 返回True时提前返回"""
+        if not self.realtime:
+            return
+        while True:
+            remaining = timestamp - self.clock()
+            if remaining <= 0 or (stop is not None and stop()):
+                return
+            time.sleep(min(remaining, 0.05))
+
+    def pause(self):
+        if self._paused_at is None and self._start is not None:
+            self._paused_at = time.perf_counter()
+
+    def resume(self):
+        """恢复后时钟从暂停处继续，暂停期间的帧不算过时"""
+        if self._paused_at is not None:
+            paused = time.perf_counter() - self._paused_at
+            self._start += paused
+            self._paused_total += paused
+            self._paused_at = None
+
+    # ----------------- 统计 -----------------
+    def frame_done(self):
+        self.processed += 1
+
+    def effective_fps(self):
+        """平均每秒实际推理并输出的帧数（不含暂停时间）"""
+        if self._wall_start is None:
+            return 0.0
+        end = self._paused_at if self._paused_at is not None else time.perf_counter()
+        elapsed = end - self._wall_start - self._paused_total
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """统计文字"""
+        total = self.processed + self.dropped
+        drop_rate = self.dropped / total * 100 if total else 0.0
+        return (f"已处理 {self.processed} 帧, 丢弃 {self.dropped} 帧 ({drop_rate:.1f}%), "
+                f"有效FPS {self.effective_fps():.1f}")